@@ -1,12 +1,37 @@
 """Main navigation module"""
 
+import time
 import numpy as np
 from Gerer_donnees import NavInput, NavOutput
 from tqdm import tqdm
 from functions import *
+import warnings
+from geodesie import DEG2RAD, RAD2DEG, RT
+from noyau_nav import NUMBA_DISPONIBLE, EtatNav, integrer_nav
+from noyau_multicadence import integrer_multicadence
+from reprise_nav import INTERVALLE_REPRISE, PointReprise, integrer_avec_reprise
+from filtre_kalman import ParametresFiltre, integrer_hybride, reglages_odometre
+from odometre import OdometrePretraite, odometre_donnees
+from profilage_nav import ProfilNav
 
+# Noyaux de calcul disponibles pour la boucle de navigation
+BACKENDS = ("fusionne", "numba", "auto", "reference")
 
-def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
+
+def calcul_nav(
+    data_in: NavInput,
+    donnees_NI_dispo: bool,
+    backend: str = "fusionne",
+    attitude: str = "dcm",
+    progression: bool = True,
+    rep_reprise=None,
+    intervalle_reprise: int = INTERVALLE_REPRISE,
+    reprendre: bool = False,
+    frequence_nav: float = None,
+    hybridation=None,
+    params_filtre: ParametresFiltre = None,
+    profil: ProfilNav = None,
+):
     r"""Script qui permet d'itérer sur le temps et de calculer chaque paramètre
     de la navigation
 
@@ -14,6 +39,58 @@ def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
     ----------
     data_in : class structtype
         structure rassemblant toutes les données de la navigation qui seront utilisée et/ou calculées
+    donnees_NI_dispo : bool
+        présence de données non inertielles
+    backend : str
+        noyau de calcul de la boucle : 'fusionne' (noyau scalaire sans
+        allocation de noyau_nav.py), 'numba' (même noyau compilé, repli sur
+        'fusionne' si numba n'est pas installé), 'auto' ('numba' si disponible,
+        sans avertissement) ou 'reference' (boucle matricielle d'origine,
+        conservée pour la validation). Les noyaux 'fusionne' et 'numba'
+        reproduisent la référence à noyau_nav.TOLERANCE_NOYAUX près.
+    attitude : str
+        propagation de t_b_g et t_g_t : 'dcm' (intégration au premier ordre
+        des matrices, comme la référence) ou 'quaternion' (mise à jour exacte
+        par vecteur rotation, matrices toujours orthonormées ; non disponible
+        avec backend='reference'). En Python pur, le mode 'quaternion' tourne
+        à quelques pour cent près au débit de 'dcm' (moins d'appels
+        trigonométriques, mais deux produits de quaternions et deux
+        renormalisations par pas) ; compilé par numba, il est le plus rapide
+        des deux (environ 5 % de pas/s en plus). Mesure :
+        bench_calcul_nav.py --backends fusionne numba --attitude dcm quaternion
+    progression : bool
+        affichage de la barre de progression
+    rep_reprise : str or Path
+        dossier des points de reprise (reprise_nav.py) ; si None, aucun point
+        de reprise n'est écrit. Non disponible avec backend='reference'
+    intervalle_reprise : int
+        nombre de pas entre deux points de reprise
+    reprendre : bool
+        reprise au dernier point de reprise de rep_reprise au lieu du pas 1
+    frequence_nav : float
+        fréquence [Hz] des mises à jour de la navigation (ex: 10 ou 20) ; les
+        incréments à 100 Hz sont cumulés entre deux mises à jour avec
+        compensation coning / sculling (noyau_multicadence.py) et les sorties
+        interpolées. Si None, mise à jour à chaque échantillon. Disponible
+        uniquement en attitude 'dcm', sans point de reprise.
+    hybridation : str or tuple of str
+        hybridation par filtre de Kalman à état d'erreur (filtre_kalman.py) :
+        'gps', 'odo', 'zupt' ou 'vordme', ou plusieurs d'entre elles (leurs
+        mesures sont fusionnées par ordonnanceur_mesures.py). Appliquée seulement si
+        donnees_NI_dispo (sauf 'zupt', qui n'utilise que les incréments) ;
+        remplit les champs Bacc_*, Dgyr_* et Sigma_*. Disponible uniquement
+        avec un noyau fusionné, en attitude 'dcm', à pleine cadence et sans
+        point de reprise.
+    params_filtre : ParametresFiltre
+        réglages du filtre (valeurs par défaut si None)
+    profil : ProfilNav
+        profilage de l'exécution (profilage_nav.py), complété en place :
+        durées cumulées du noyau, de l'intégration (conversions des blocs et
+        barre de progression comprises) et de la création de la sortie, et
+        détail par étape d'un pas sur profil.periode (noyau
+        'fusionne' en attitude 'dcm' seulement ; les autres exécutions sont
+        listées dans etapes_non_echantillonnees du résumé). Si None, aucune
+        mesure
 
     Returns
     -------
@@ -22,39 +99,18 @@ def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
 
     """
 
+    debut_ns = time.perf_counter_ns() if profil is not None else 0
+    pas_avant = profil.pas if profil is not None else 0
+
     # Définition des variables locales de la fonction à l'aide des données
     # initialisées de la navigation
     temps = data_in.temps_s
-    Lon = data_in.Lon_calculee_deg * np.pi / 180
-    Lat = data_in.Lat_calculee_deg * np.pi / 180
+    Lon = data_in.Lon_calculee_deg * DEG2RAD
+    Lat = data_in.Lat_calculee_deg * DEG2RAD
     Alt = data_in.Alt_calculee_m
-    Vn = data_in.Vn_calculee_ms
-    Vw = data_in.Vw_calculee_ms
-    Vz = data_in.Vz_calculee_ms
     Cap = data_in.Cap_calcule_rad
     Rou = data_in.Roulis_calcule_rad
     Tan = data_in.Tangage_calcule_rad
-    Bx = data_in.Bacc_x_estime
-    By = data_in.Bacc_y_estime
-    Bz = data_in.Bacc_z_estime
-    Dx = data_in.Dgyr_x_estime
-    Dy = data_in.Dgyr_y_estime
-    Dz = data_in.Dgyr_z_estime
-    Sigma_Lon = data_in.Sigma_Lon_calculee_deg * np.pi / 180
-    Sigma_Lat = data_in.Sigma_Lat_calculee_deg * np.pi / 180
-    Sigma_Alt = data_in.Sigma_Alt_calculee_m
-    Sigma_Vn = data_in.Sigma_Vn_calculee_ms
-    Sigma_Vw = data_in.Sigma_Vw_calculee_ms
-    Sigma_Vz = data_in.Sigma_Vz_calculee_ms
-    Sigma_C = data_in.Sigma_Cap_calcule_rad
-    Sigma_R = data_in.Sigma_Roulis_calcule_rad
-    Sigma_T = data_in.Sigma_Tangage_calcule_rad
-    Sigma_Bx = data_in.Sigma_Bacc_x_estime
-    Sigma_By = data_in.Sigma_Bacc_y_estime
-    Sigma_Bz = data_in.Sigma_Bacc_z_estime
-    Sigma_Dx = data_in.Sigma_Dgyr_x_estime
-    Sigma_Dy = data_in.Sigma_Dgyr_y_estime
-    Sigma_Dz = data_in.Sigma_Dgyr_z_estime
     ivx = data_in.inc_vit_x_ms
     ivy = data_in.inc_vit_y_ms
     ivz = data_in.inc_vit_z_ms
@@ -68,11 +124,10 @@ def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
     # Constantes utiles aux calculs
     g = 9.81  # attraction terrestre
     dt = 0.01  # pas de temps
-    Rt = 6378000.0  # Rayon terrestre en mètres
     ksi = 0.8  # Coefficient d'amortissementdu correcteur
     Tau = 2.0  # Constante de temps du correcteur
     omega = 2 * np.pi / Tau  # Pulsation du correcteur
-    k_phi = (omega**2 / g) - (1 / Rt)  # coefficient de correction des attitudes
+    k_phi = (omega**2 / g) - (1 / RT)  # coefficient de correction des attitudes
     k_v = 2 * ksi * omega  # coefficient de correction des vitesses
 
     # Initialisation de la navigation
@@ -84,12 +139,209 @@ def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
     Lon[0, 0] = data_in.Lon_initiale_rad  # Initialisation de la valeur de longitude
     Lat[0, 0] = data_in.Lat_initiale_rad  # Initialisation de la valeur de latitude
     Alt[0, 0] = data_in.Alt_initiale_m  # Initialisation de la valeur d'altitude
+    if backend not in BACKENDS:
+        raise ValueError(f"backend inconnu : {backend!r}, choix disponibles : {BACKENDS}")
+    if backend == "reference" and attitude != "dcm":
+        raise ValueError("la boucle de référence ne propage l'attitude qu'en 'dcm'")
+    if backend == "reference" and rep_reprise is not None:
+        raise ValueError("la boucle de référence n'écrit pas de points de reprise")
+    if frequence_nav is not None and (
+        backend == "reference" or attitude != "dcm" or rep_reprise is not None
+    ):
+        raise ValueError(
+            "la navigation multi-cadence n'est disponible qu'avec un noyau fusionné, "
+            "en attitude 'dcm' et sans point de reprise"
+        )
+    hybride = hybridation is not None and (
+        donnees_NI_dispo or set(np.atleast_1d(hybridation)) == {"zupt"}
+    )
+    if hybride and (
+        backend == "reference" or attitude != "dcm" or rep_reprise is not None
+        or frequence_nav is not None
+    ):
+        raise ValueError(
+            "l'hybridation n'est disponible qu'avec un noyau fusionné, en attitude 'dcm', "
+            "à pleine cadence et sans point de reprise"
+        )
+    # Odomètre prétraité une seule fois, pour le filtre et pour la sortie (la
+    # fenêtre de vitesse est celle du filtre, la distance n'en dépend pas)
+    odometre = odometre_donnees(data_in, reglages_odometre(params_filtre or ParametresFiltre()))
+    if backend == "numba" and not NUMBA_DISPONIBLE:
+        warnings.warn("numba n'est pas installé, repli sur le noyau 'fusionne'")
+    if backend != "reference":
+        # Noyau fusionné : tampons d'état préalloués, aucune matrice par pas
+        etat = EtatNav.initialiser(Cap[0, 0], Rou[0, 0], Tan[0, 0], Lat[0, 0], Lon[0, 0])
+        entrees = (ivx[0], ivy[0], ivz[0], iax[0], iay[0], iaz[0], Alt[0])
+        sorties = (Lat[0], Lon[0], Cap[0], Rou[0], Tan[0], Vxm[0], Vym[0], Vzm[0])
+        compile = backend in ("numba", "auto") and NUMBA_DISPONIBLE
+        n = np.shape(temps)[1]
+        if hybride:
+            # Navigation corrigée à chaque mesure par le filtre à état d'erreur
+            integrer_hybride(
+                etat, entrees, sorties, data_in, hybridation, params_filtre,
+                compile=compile, progression=progression, odometre=odometre,
+            )
+        elif frequence_nav is not None:
+            # Mises à jour toutes les m échantillons, incréments cumulés entre deux
+            integrer_multicadence(
+                etat, *entrees, *sorties, max(1, round(1 / (frequence_nav * dt))),
+                compile=compile, progression=progression,
+            )
+        elif rep_reprise is None:
+            integrer_nav(
+                etat, *entrees, *sorties, 1, n,
+                compile=compile, attitude=attitude, progression=progression,
+                bloc=profil.executer_bloc if profil is not None else None,
+            )
+        else:
+            # Calcul par segments, chaque segment ajoute ses sorties au point de reprise
+            integrer_avec_reprise(
+                PointReprise(rep_reprise, n, attitude), etat, entrees, sorties, n,
+                intervalle_reprise, reprendre, progression,
+                compile=compile, attitude=attitude,
+            )
+    else:
+        _boucle_reference(
+            temps, ivx, ivy, ivz, iax, iay, iaz, Alt, Lat, Lon, Cap, Rou, Tan,
+            Vxm, Vym, Vzm, dt, progression,
+        )
+    # --------------------------------------------------------------------------------
+
+    # Création d'une nouvelle structure pour les données en sortie
+    if profil is None:
+        data_out = creer_sortie(data_in, Lon, Lat, odometre)
+    else:
+        fin_integration_ns = time.perf_counter_ns()
+        data_out = creer_sortie(data_in, Lon, Lat, odometre)
+        fin_ns = time.perf_counter_ns()
+        if profil.pas == pas_avant:
+            # Boucle sans mesure interne : durée globale seulement
+            profil.compter_pas(
+                np.shape(temps)[1] - 1,
+                "backend 'reference'" if backend == "reference"
+                else "hybridation" if hybride
+                else "multi-cadence" if frequence_nav is not None
+                else "points de reprise",
+            )
+        profil.ajouter("integration", fin_integration_ns - debut_ns)
+        profil.ajouter("creer_sortie", fin_ns - fin_integration_ns)
+        profil.ajouter("calcul_nav", fin_ns - debut_ns)
+    # Renvoie de la nouvelle structure
+    return data_out
+
+
+def creer_sortie(
+    data_in: NavInput, Lon: np.ndarray, Lat: np.ndarray, odometre: OdometrePretraite = None
+):
+    r"""Rassemble dans une structure NavOutput les données calculées
+
+    Parameters
+    ----------
+    data_in : class structtype
+        structure d'entrée dont les champs calculés ont été remplis en place
+    Lon : np.ndarray
+        longitude calculée [rad] (dim (1,N))
+    Lat : np.ndarray
+        latitude calculée [rad] (dim (1,N))
+    odometre : OdometrePretraite
+        odomètre prétraité de data_in (odometre_donnees) ; calculé ici si None
+
+    Returns
+    -------
+    data_out : class structtype
+        structure rassemblant toutes les données calculées de la navigation
+
+    """
+    # Distance odomètre rééchantillonnée sur temps_s (relevés bruts s'il n'y en a pas)
+    if odometre is None:
+        odometre = odometre_donnees(data_in)
+    dist_odo = odometre.distance_m[np.newaxis, :] if odometre is not None else data_in.odo
+
+    data_out = NavOutput(
+        # Attribution des éléments locaux aux éléments globaux dans la structure
+        # Cette structure peut être complétée selon vos besoins, n'oubliez pas de mettre
+        # à jour la définition de cette classe dans le fichier "Gerer_donnees.py"
+        temps_s=data_in.temps_s,
+        Lon_calculee_deg=Lon * RAD2DEG,
+        Lat_calculee_deg=Lat * RAD2DEG,
+        Alt_calculee_m=data_in.Alt_calculee_m,
+        Vn_calculee_ms=data_in.Vn_calculee_ms,
+        Vw_calculee_ms=data_in.Vw_calculee_ms,
+        Vz_calculee_ms=data_in.Vz_calculee_ms,
+        Cap_calcule_rad=data_in.Cap_calcule_rad,
+        Roulis_calcule_rad=data_in.Roulis_calcule_rad,
+        Tangage_calcule_rad=data_in.Tangage_calcule_rad,
+        Bacc_x_estime=data_in.Bacc_x_estime,
+        Bacc_y_estime=data_in.Bacc_y_estime,
+        Bacc_z_estime=data_in.Bacc_z_estime,
+        Dgyr_x_estime=data_in.Dgyr_x_estime,
+        Dgyr_y_estime=data_in.Dgyr_y_estime,
+        Dgyr_z_estime=data_in.Dgyr_z_estime,
+        Sigma_Lon_calculee_deg=data_in.Sigma_Lon_calculee_deg,
+        Sigma_Lat_calculee_deg=data_in.Sigma_Lat_calculee_deg,
+        Sigma_Alt_calculee_m=data_in.Sigma_Alt_calculee_m,
+        Sigma_Vn_calculee_ms=data_in.Sigma_Vn_calculee_ms,
+        Sigma_Vw_calculee_ms=data_in.Sigma_Vw_calculee_ms,
+        Sigma_Vz_calculee_ms=data_in.Sigma_Vz_calculee_ms,
+        Sigma_Cap_calcule_rad=data_in.Sigma_Cap_calcule_rad,
+        Sigma_Roulis_calcule_rad=data_in.Sigma_Roulis_calcule_rad,
+        Sigma_Tangage_calcule_rad=data_in.Sigma_Tangage_calcule_rad,
+        Sigma_Bacc_x_estime=data_in.Sigma_Bacc_x_estime,
+        Sigma_Bacc_y_estime=data_in.Sigma_Bacc_y_estime,
+        Sigma_Bacc_z_estime=data_in.Sigma_Bacc_z_estime,
+        Sigma_Dgyr_x_estime=data_in.Sigma_Dgyr_x_estime,
+        Sigma_Dgyr_y_estime=data_in.Sigma_Dgyr_y_estime,
+        Sigma_Dgyr_z_estime=data_in.Sigma_Dgyr_z_estime,
+        Inc_Vit_Xm=data_in.inc_vit_x_ms,
+        Inc_Vit_Ym=data_in.inc_vit_y_ms,
+        Inc_Vit_Zm=data_in.inc_vit_z_ms,
+        Inc_Ang_Xm=data_in.inc_angl_x_rad,
+        Inc_Ang_Ym=data_in.inc_angl_y_rad,
+        Inc_Ang_Zm=data_in.inc_angl_z_rad,
+        # Lat_gnss = temps,
+        # Lon_gnss = temps,
+        # Alt_gnss = temps,
+        # nb_sat_gnss = temps,
+        # val_gnss = temps,
+        Lat_gnss=data_in.lat_gnss,
+        Lon_gnss=data_in.lon_gnss,
+        Alt_gnss=data_in.alt_gnss,
+        nb_sat_gnss=data_in.nsat_gnss,
+        val_gnss=data_in.val_gnss,
+        dist_odo=dist_odo,
+        # vor_bvs = temps,
+        # dme_bvs = temps,
+        # vor_dvl = temps,
+        # dme_dvl = temps,
+        # vor_pon = temps,
+        # dme_pon = temps,
+        # vor_rou = temps,
+        # dme_rou = temps,
+        vor_bvs=data_in.vor_bvs,
+        dme_bvs=data_in.dme_bvs,
+        vor_dvl=data_in.vor_dvl,
+        dme_dvl=data_in.dme_dvl,
+        vor_pon=data_in.vor_pon,
+        dme_pon=data_in.dme_pon,
+        vor_rou=data_in.vor_rou,
+        dme_rou=data_in.dme_rou,
+    )
+    return data_out
+
+
+def _boucle_reference(
+    temps, ivx, ivy, ivz, iax, iay, iaz, Alt, Lat, Lon, Cap, Rou, Tan, Vxm, Vym, Vzm, dt,
+    progression=True,
+):
+    """Boucle matricielle d'origine, pas à pas sur les tableaux (1, N)"""
     t_g_b = compute_t_g_b(Cap[0, 0], Rou[0, 0], Tan[0, 0])
     t_b_g = t_g_b.T
     # heading_aln_error = Dy / (omega_t * np.cos(Lat[0, 0]))
     v_geo_vector = np.zeros((3, 1))
     for t in tqdm.tqdm(
-        range(1, np.shape(temps)[1]), desc="Processing inertial navigation"
+        range(1, np.shape(temps)[1]),
+        desc="Processing inertial navigation",
+        disable=not progression,
     ):
         # Vector of speed increments
         Iv_b = np.array([[ivx[0, t - 1]], [ivy[0, t - 1]], [ivz[0, t - 1]]])
@@ -115,9 +367,9 @@ def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
             )
             * dt
         )
-        Vxm[0, t] = v_geo_vector[0]
-        Vym[0, t] = v_geo_vector[1]
-        Vzm[0, t] = v_geo_vector[2]
+        Vxm[0, t] = v_geo_vector[0, 0]
+        Vym[0, t] = v_geo_vector[1, 0]
+        Vzm[0, t] = v_geo_vector[2, 0]
         # Computing omega_g_g_t = rho_g with NEW geo speeds, altitude and latitude
         omega_g_g_t = compute_omega_g_g_t(Vxm[0, t], Vym[0, t], Alt[0, t], Lat[0, t])
         # Integration of t_g_t
@@ -133,78 +385,3 @@ def calcul_nav(data_in: NavInput, donnees_NI_dispo: bool):
         # Integration of t_b_g
         t_b_g = t_b_g - antisymmetric(omega_b_b_g) @ t_b_g * dt
         Cap[0, t], Rou[0, t], Tan[0, t] = extract_h_r_p(t_b_g)
-    # --------------------------------------------------------------------------------
-
-    # Création d'une nouvelle structure pour les données en sortie
-    data_out = NavOutput(
-        # Attribution des éléments locaux aux éléments globaux dans la structure
-        # Cette structure peut être complétée selon vos besoins, n'oubliez pas de mettre
-        # à jour la définition de cette classe dans le fichier "Gerer_donnees.py"
-        temps_s=temps,
-        Lon_calculee_deg=Lon * 180 / np.pi,
-        Lat_calculee_deg=Lat * 180 / np.pi,
-        Alt_calculee_m=Alt,
-        Vn_calculee_ms=Vn,
-        Vw_calculee_ms=Vw,
-        Vz_calculee_ms=Vz,
-        Cap_calcule_rad=Cap,
-        Roulis_calcule_rad=Rou,
-        Tangage_calcule_rad=Tan,
-        Bacc_x_estime=Bx,
-        Bacc_y_estime=By,
-        Bacc_z_estime=Bz,
-        Dgyr_x_estime=Dx,
-        Dgyr_y_estime=Dy,
-        Dgyr_z_estime=Dz,
-        Sigma_Lon_calculee_deg=Sigma_Lon * 180 / np.pi,
-        Sigma_Lat_calculee_deg=Sigma_Lat * 180 / np.pi,
-        Sigma_Alt_calculee_m=Sigma_Alt,
-        Sigma_Vn_calculee_ms=Sigma_Vn,
-        Sigma_Vw_calculee_ms=Sigma_Vw,
-        Sigma_Vz_calculee_ms=Sigma_Vz,
-        Sigma_Cap_calcule_rad=Sigma_C,
-        Sigma_Roulis_calcule_rad=Sigma_R,
-        Sigma_Tangage_calcule_rad=Sigma_T,
-        Sigma_Bacc_x_estime=Sigma_Bx,
-        Sigma_Bacc_y_estime=Sigma_By,
-        Sigma_Bacc_z_estime=Sigma_Bz,
-        Sigma_Dgyr_x_estime=Sigma_Dx,
-        Sigma_Dgyr_y_estime=Sigma_Dy,
-        Sigma_Dgyr_z_estime=Sigma_Dz,
-        Inc_Vit_Xm=ivx,
-        Inc_Vit_Ym=ivy,
-        Inc_Vit_Zm=ivz,
-        Inc_Ang_Xm=iax,
-        Inc_Ang_Ym=iay,
-        Inc_Ang_Zm=iaz,
-        # Lat_gnss = temps,
-        # Lon_gnss = temps,
-        # Alt_gnss = temps,
-        # nb_sat_gnss = temps,
-        # val_gnss = temps,
-        Lat_gnss=data_in.lat_gnss,
-        Lon_gnss=data_in.lon_gnss,
-        Alt_gnss=data_in.alt_gnss,
-        nb_sat_gnss=data_in.nsat_gnss,
-        val_gnss=data_in.val_gnss,
-        # dist_odo = data_in.odo,
-        dist_odo=temps,
-        # vor_bvs = temps,
-        # dme_bvs = temps,
-        # vor_dvl = temps,
-        # dme_dvl = temps,
-        # vor_pon = temps,
-        # dme_pon = temps,
-        # vor_rou = temps,
-        # dme_rou = temps,
-        vor_bvs=data_in.vor_bvs,
-        dme_bvs=data_in.dme_bvs,
-        vor_dvl=data_in.vor_dvl,
-        dme_dvl=data_in.dme_dvl,
-        vor_pon=data_in.vor_pon,
-        dme_pon=data_in.dme_pon,
-        vor_rou=data_in.vor_rou,
-        dme_rou=data_in.dme_rou,
-    )
-    # Renvoie de la nouvelle structure
-    return data_out
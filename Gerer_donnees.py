@@ -6,8 +6,16 @@ Fichier fonctionnel qui permet de créer une classe vide en ayant des champs
 prédéfinis mis à 0 et une classe de sortie permettant de sortir les 
 données intéressantes de la fonction de calcul
 
+Les canaux alloués par alloc_memoire sont des vues (1, N) d'un même bloc
+contigu (une ligne par canal). Les canaux inutilisés par l'hybridation ne
+sont pas alloués : ils valent une vue en lecture seule d'un unique zéro
+jusqu'à leur allocation explicite (allouer_canaux). Les Sigma_* peuvent être
+stockés en float32, et toute la structure s'écrit en une seule fois dans un
+fichier .npz (sauvegarder_bloc / charger_bloc).
+
 Classes Disponibles :
    
+   - class StockageBloc
    - class NavInput
    - class NavOutput
    
@@ -18,12 +26,172 @@ Créé le 10 juillet 2024
 """
 
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import numpy as np
-from dataclasses import asdict
+
+# Canaux calculés par la navigation, alloués par défaut par alloc_memoire
+CANAUX_NAVIGATION = (
+    "Lon_calculee_deg",
+    "Lat_calculee_deg",
+    "Alt_calculee_m",
+    "Vn_calculee_ms",
+    "Vw_calculee_ms",
+    "Vz_calculee_ms",
+    "Cap_calcule_rad",
+    "Roulis_calcule_rad",
+    "Tangage_calcule_rad",
+    "Vx_m",
+    "Vy_m",
+    "Vz_m",
+)
+
+# Canaux des biais et dérives estimés par une hybridation
+CANAUX_ESTIMATION = (
+    "Bacc_x_estime",
+    "Bacc_y_estime",
+    "Bacc_z_estime",
+    "Dgyr_x_estime",
+    "Dgyr_y_estime",
+    "Dgyr_z_estime",
+)
+
+# Canaux des variances estimées par une hybridation
+CANAUX_SIGMA = (
+    "Sigma_Lon_calculee_deg",
+    "Sigma_Lat_calculee_deg",
+    "Sigma_Alt_calculee_m",
+    "Sigma_Vn_calculee_ms",
+    "Sigma_Vw_calculee_ms",
+    "Sigma_Vz_calculee_ms",
+    "Sigma_Cap_calcule_rad",
+    "Sigma_Roulis_calcule_rad",
+    "Sigma_Tangage_calcule_rad",
+    "Sigma_Bacc_x_estime",
+    "Sigma_Bacc_y_estime",
+    "Sigma_Bacc_z_estime",
+    "Sigma_Dgyr_x_estime",
+    "Sigma_Dgyr_y_estime",
+    "Sigma_Dgyr_z_estime",
+)
+
+
+def zeros_paresseux(n: int):
+    """Canal non alloué : vue (1, N) en lecture seule d'un unique zéro"""
+    return np.broadcast_to(np.zeros((1, 1)), (1, n))
+
+
+def est_paresseux(tab):
+    """True si tab est un canal non alloué (aucune mémoire propre)"""
+    return isinstance(tab, np.ndarray) and tab.size > 1 and tab.strides[-1] == 0
+
+
+class StockageBloc:
+    """Stockage des canaux (1, N) en blocs contigus, commun à NavInput et NavOutput"""
+
+    def _blocs(self):
+        """Liste des (noms, bloc) alloués, créée au premier appel"""
+        return self.__dict__.setdefault("_liste_blocs", [])
+
+    def allouer_canaux(self, *noms, sigma_float32: bool = False):
+        r"""Alloue les canaux demandés dans un nouveau bloc contigu
+
+        Les canaux déjà alloués (ni None, ni paresseux) ne sont pas modifiés.
+
+        Parameters
+        ----------
+        *noms : str
+            noms des canaux à allouer
+        sigma_float32 : bool
+            stockage des canaux Sigma_* en float32 (bloc séparé)
+
+        """
+        n = np.shape(self.temps_s)[1]
+        a_allouer = [
+            nom for nom in dict.fromkeys(noms)
+            if getattr(self, nom) is None or est_paresseux(getattr(self, nom))
+        ]
+        groupes = {}
+        for nom in a_allouer:
+            simple = sigma_float32 and nom.startswith("Sigma_")
+            groupes.setdefault(np.float32 if simple else np.float64, []).append(nom)
+        for dtype, noms_bloc in groupes.items():
+            bloc = np.zeros((len(noms_bloc), n), dtype=dtype)
+            for i, nom in enumerate(noms_bloc):
+                setattr(self, nom, bloc[i : i + 1])
+            self._blocs().append((noms_bloc, bloc))
+
+    def sauvegarder_bloc(self, chemin):
+        r"""Écrit la structure en une seule fois dans un fichier .npz
+
+        Les blocs contigus sont écrits tels quels (sans copie), les autres
+        tableaux (entrées lues dans les fichiers) un par un, et les canaux
+        non alloués ne sont pas écrits.
+
+        Parameters
+        ----------
+        chemin : str or Path
+            fichier .npz à écrire
+
+        """
+        contenu = {}
+        dans_bloc = set()
+        for i, (noms, bloc) in enumerate(self._blocs()):
+            # Seuls les canaux toujours portés par le bloc sont relus depuis celui-ci
+            noms_actifs = [nom for nom in noms if getattr(self, nom).base is bloc]
+            contenu[f"_bloc{i}"] = bloc
+            contenu[f"_noms{i}"] = np.array(noms)
+            dans_bloc.update(noms_actifs)
+        paresseux = []
+        for f in fields(self):
+            valeur = getattr(self, f.name)
+            if f.name in dans_bloc or valeur is None:
+                continue
+            if est_paresseux(valeur):
+                paresseux.append(f.name)
+                continue
+            contenu[f.name] = np.asarray(valeur)
+        contenu["_paresseux"] = np.array(paresseux, dtype=str)
+        np.savez(chemin, **contenu)
+
+    @classmethod
+    def charger_bloc(cls, chemin):
+        r"""Relit une structure écrite par sauvegarder_bloc
+
+        Parameters
+        ----------
+        chemin : str or Path
+            fichier .npz écrit par sauvegarder_bloc
+
+        Returns
+        -------
+        structure : NavInput or NavOutput
+            structure dont les canaux sont de nouveau des vues des blocs
+
+        """
+        structure = cls()
+        with np.load(chemin) as contenu:
+            i = 0
+            while f"_bloc{i}" in contenu.files:
+                bloc = contenu[f"_bloc{i}"]
+                noms = [str(nom) for nom in contenu[f"_noms{i}"]]
+                for j, nom in enumerate(noms):
+                    setattr(structure, nom, bloc[j : j + 1])
+                structure._blocs().append((noms, bloc))
+                i += 1
+            for nom in contenu.files:
+                if nom.startswith("_"):
+                    continue
+                valeur = contenu[nom]
+                setattr(structure, nom, valeur.item() if valeur.ndim == 0 else valeur)
+            paresseux = [str(nom) for nom in contenu["_paresseux"]]
+        n = np.shape(structure.temps_s)[1]
+        for nom in paresseux:
+            setattr(structure, nom, zeros_paresseux(n))
+        return structure
+
 
 @dataclass
-class NavInput:
+class NavInput(StockageBloc):
 
     temps_s: np.ndarray = None
     """Temps du système, de dimension (1, N)"""
@@ -157,15 +325,31 @@ class NavInput:
 
     odo: np.ndarray = None
 
-    def alloc_memoire(self):
-        for k, v in asdict(self).items():
-            if v is not None:
-                continue
-            setattr(self, k, np.zeros_like(self.temps_s))
+    def alloc_memoire(self, canaux=(), sigma_float32: bool = False):
+        r"""Alloue les canaux de la navigation dans un bloc contigu
+
+        Les canaux de CANAUX_NAVIGATION et ceux demandés sont alloués (mis à
+        0), les autres canaux encore à None deviennent des zéros en lecture
+        seule qui n'occupent pas de mémoire.
+
+        Parameters
+        ----------
+        canaux : iterable of str
+            canaux à allouer en plus de CANAUX_NAVIGATION (ex: CANAUX_ESTIMATION
+            + CANAUX_SIGMA pour une hybridation)
+        sigma_float32 : bool
+            stockage des canaux Sigma_* en float32
+
+        """
+        self.allouer_canaux(*CANAUX_NAVIGATION, *canaux, sigma_float32=sigma_float32)
+        n = np.shape(self.temps_s)[1]
+        for f in fields(self):
+            if getattr(self, f.name) is None:
+                setattr(self, f.name, zeros_paresseux(n))
 
 
 @dataclass
-class NavOutput:
+class NavOutput(StockageBloc):
     
     temps_s: np.ndarray = None
     """Temps du système, de dimension (1, N)"""
@@ -14,6 +14,7 @@ Dictionnaires Disponibles :
    
    - corres_tp_chemin : Permet de sélectionner l'hybridation choisie
    - corres_traj_chemin : Permet de sélectionner le trajet voulu
+   - corres_champs_NI : Nom des variables non inertielles lues pour chaque champ de NavInput
    
 Liste Disponible :
     
@@ -39,6 +40,25 @@ corres_traj_chemin = {
     'soutenance': "boucle_2"
 }
 
+#Dictionnaire des variables des fichiers de données non inertielles (champ de NavInput : variable du fichier)
+corres_champs_NI = {
+    'lat_gnss': "lat_gps_deg",
+    'lon_gnss': "lon_gps_deg",
+    'alt_gnss': "alt_gps_m",
+    'nsat_gnss': "nb_sat",
+    'val_gnss': "val",
+    'temps_gnss': "temps_s",
+    'dme_bvs': "dist_vor_beauvais_nav_m",
+    'vor_bvs': "ang_vor_beauvais_nav_deg",
+    'dme_dvl': "dist_vor_deauville_nav_m",
+    'vor_dvl': "ang_vor_deauville_nav_deg",
+    'dme_pon': "dist_vor_pontoise_nav_m",
+    'vor_pon': "ang_vor_pontoise_nav_deg",
+    'dme_rou': "dist_vor_rouen_nav_m",
+    'vor_rou': "ang_vor_rouen_nav_deg",
+    'odo': "Dist_Odo_m",
+}
+
 #Liste contenant les champs à garder pour le fichier à destination du prof (NE PAS MODIFIER)
 to_keep = [
     "temps_s",
@@ -0,0 +1,140 @@
+"""
+Description
+-----------
+
+Script de lancement en parallèle des calculs de navigation sur tout ou partie
+de la matrice hybridation x essai (corres_tp_chemin x corres_traj_chemin).
+Chaque combinaison est calculée dans un processus du pool et écrit ses propres
+fichiers binaires, suffixés par '_<hybridation>_<essai>'. Un tableau des durées
+par calcul est affiché à la fin. Avec --filtre, chaque combinaison est de plus
+hybridée par le filtre à état d'erreur selon son hybridation (filtre_kalman.py).
+
+Utilisation :
+
+    python MAIN_lancer_essais.py
+    python MAIN_lancer_essais.py --hyb odo gps --traj boucle --workers 4
+    python MAIN_lancer_essais.py --hyb gps --filtre
+
+--------------------------------
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from Entretien_localisation import BACKENDS
+from Lecture_donnees import corres_tp_chemin, corres_traj_chemin
+from MAIN_calcul_nav import lancer_essai
+
+
+def _executer(choix_hyb: str, choix_traj: str, rep_sortie: Path, filtre: bool, options: dict):
+    """Calcul d'une combinaison dans un processus du pool, ne lève jamais"""
+    debut = time.perf_counter()
+    try:
+        if filtre:
+            options = dict(options, hybridation=choix_hyb)
+        chemins = lancer_essai(
+            choix_hyb,
+            choix_traj,
+            rep_sortie,
+            suffixe=f"_{choix_hyb}_{choix_traj}",
+            verbeux=False,
+            **options,
+        )
+        statut = "ok"
+    except Exception as erreur:
+        chemins = []
+        statut = f"échec : {type(erreur).__name__}: {erreur}"
+    return choix_hyb, choix_traj, time.perf_counter() - debut, statut, chemins
+
+
+def lancer_matrice(
+    hybridations=None,
+    trajectoires=None,
+    workers: int = None,
+    rep_sortie: Path = Path("."),
+    filtre: bool = False,
+    **options,
+):
+    r"""Calcule en parallèle toutes les combinaisons hybridation x essai choisies
+
+    Parameters
+    ----------
+    hybridations : list of str
+        hybridations à calculer (toutes par défaut)
+    trajectoires : list of str
+        essais à calculer (tous par défaut)
+    workers : int
+        nombre de processus (nombre de coeurs par défaut)
+    rep_sortie : Path
+        dossier d'écriture des fichiers
+    filtre : bool
+        hybridation de chaque combinaison par le filtre à état d'erreur
+        (hybridation=<hybridation de la combinaison>) ; navigation inertielle
+        seule sinon
+    **options :
+        options transmises à calcul_nav (backend, attitude, ...)
+
+    Returns
+    -------
+    resultats : list of tuple
+        (hybridation, essai, durée [s], statut, chemins écrits) par combinaison,
+        dans l'ordre de la matrice
+
+    """
+    hybridations = list(hybridations or corres_tp_chemin)
+    trajectoires = list(trajectoires or corres_traj_chemin)
+    rep_sortie = Path(rep_sortie)
+    rep_sortie.mkdir(parents=True, exist_ok=True)
+    combinaisons = list(itertools.product(hybridations, trajectoires))
+    workers = min(workers or os.cpu_count() or 1, len(combinaisons))
+
+    resultats = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futurs = [
+            pool.submit(_executer, hyb, traj, rep_sortie, filtre, options)
+            for hyb, traj in combinaisons
+        ]
+        for futur in as_completed(futurs):
+            hyb, traj, duree, statut, chemins = futur.result()
+            print(f"  {hyb:<8}{traj:<12}{duree:>8.1f} s  {statut}")
+            resultats[hyb, traj] = (hyb, traj, duree, statut, chemins)
+    return [resultats[c] for c in combinaisons]
+
+
+def afficher_durees(resultats: list, duree_totale: float):
+    """Affiche le tableau des durées par calcul"""
+    print(f"\n{'hybridation':<13}{'essai':<12}{'durée [s]':>10}  statut")
+    for hyb, traj, duree, statut, _ in resultats:
+        print(f"{hyb:<13}{traj:<12}{duree:>10.1f}  {statut}")
+    somme = sum(r[2] for r in resultats)
+    print(f"{'total':<25}{duree_totale:>10.1f}  (somme des calculs : {somme:.1f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--hyb", nargs="+", choices=list(corres_tp_chemin))
+    parser.add_argument("--traj", nargs="+", choices=list(corres_traj_chemin))
+    parser.add_argument("--workers", type=int, help="nombre de processus")
+    parser.add_argument("--sortie", type=Path, default=Path("."), help="dossier de sortie")
+    parser.add_argument("--backend", default="fusionne", choices=BACKENDS)
+    parser.add_argument("--attitude", default="dcm", choices=("dcm", "quaternion"))
+    parser.add_argument(
+        "--filtre", action="store_true", help="hybridation par le filtre à état d'erreur"
+    )
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    resultats = lancer_matrice(
+        args.hyb,
+        args.traj,
+        args.workers,
+        args.sortie,
+        args.filtre,
+        backend=args.backend,
+        attitude=args.attitude,
+    )
+    afficher_durees(resultats, time.perf_counter() - debut)
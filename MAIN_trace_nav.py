@@ -28,7 +28,10 @@ from trace_figures import (trace_figure_nav_pontoise,
                            trace_data_vordme,
                            trace_positions_vordme,
 )
-import scipy
+from cache_mat import charger_mat
+from analyse_erreurs import analyser_erreurs
+from rapport_html import construire_rapport
+from export_statique import exporter_figures
 from pathlib import Path
 from Lecture_donnees import (
     def_map,
@@ -43,20 +46,30 @@ CHOIX_TRAJ = 'boucle'
 # CHOIX_TRAJ = 'aller'
 # Choix de la sauvegarde des figures, choix disponibles : True ou False (booléen)
 SAVE_FIG = False
+# Rassemblement des figures dans un seul rapport html hors ligne (rapport_html.py)
+# au lieu d'un onglet par figure, choix disponibles : True ou False (booléen)
+RAPPORT = False
+# Affichage du résumé des erreurs (RMS, max, CEP, dérives), choix disponibles : True ou False (booléen)
+RESUME_ERREURS = False
+# Export des figures en PNG par matplotlib (export_statique.py), sans navigateur,
+# choix disponibles : True ou False (booléen)
+EXPORT_STATIQUE = False
 
 #-----------------------------------------------------------------------------
 
 print ("Import des fichiers de données en cours...")
 
-# Lecture du fichier binaire de la navigation calculée
-contenu_nav_calculee = scipy.io.loadmat('Nav_calculee_etudiants_modifiable.mat')
+# Lecture du fichier binaire de la navigation calculée (par le cache .npy
+# projeté en mémoire, écrit avec le fichier par MAIN_calcul_nav : seules les
+# variables tracées sont lues, sans reconversion du fichier)
+contenu_nav_calculee = charger_mat('Nav_calculee_etudiants_modifiable.mat')
 
 # On remonte au dossier parent du script actuel
 rep_tp = Path(__file__).parent
 # Le chemin va chercher la navigation parfaite de l'essai choisi
 chemin_nav_parfaite = rep_tp / '02-Navigations_parfaites' / f"Nav_reference_{corres_traj_chemin[CHOIX_TRAJ]}.mat"
 # On importe les données contenues dans le fichier
-contenu_nav_parfaite = scipy.io.loadmat(chemin_nav_parfaite)
+contenu_nav_parfaite = charger_mat(chemin_nav_parfaite)
 # On récupère le nom du fichier
 file_name = f"Nav_reference_{corres_traj_chemin[CHOIX_TRAJ]}.mat"
 
@@ -65,20 +78,32 @@ map_utile = def_map(file_name)
 
 print("Fin de l'import de données, début de tracé et de calcul des figures.")
 
+#%% Résumé des erreurs par rapport à la navigation parfaite (analyse_erreurs.py)
+if RESUME_ERREURS:
+    resume = analyser_erreurs(contenu_nav_calculee["temps_s"], contenu_nav_calculee, contenu_nav_parfaite)
+    print(f"CEP50 : {resume.cep50_m:.1f} m, CEP95 : {resume.cep95_m:.1f} m")
+    for serie in resume.rms:
+        print(f"{serie:>15} : RMS {resume.rms[serie]:10.3f}  max {resume.max_abs[serie]:10.3f}"
+              f"  dérive {resume.derive_par_h[serie]:10.3f} /h")
+
 #%% Tracé position + erreurs de position
 # Tracé des navigations parfaite et calculée en 2D dans une fenêtre HTML
+# (dans le rapport, la carte est intégrée à la figure)
+fig0 = None
 if map_utile == 'Pontoise':
-    trace_figure_nav_pontoise(contenu_nav_calculee["Lon_calculee_deg"],
+    fig0 = trace_figure_nav_pontoise(contenu_nav_calculee["Lon_calculee_deg"],
                             contenu_nav_calculee["Lat_calculee_deg"],
                             contenu_nav_parfaite["longitude_ins"],
                             contenu_nav_parfaite["latitude_ins"],
-                            contenu_nav_calculee["Lon_gnss"],
-                            contenu_nav_calculee["Lat_gnss"])
+                            rep_sortie=None if RAPPORT else ".",
+                            afficher=not (RAPPORT or EXPORT_STATIQUE))
 elif map_utile == 'Fecamp':
-    trace_figure_nav_fecamp(contenu_nav_calculee["Lon_calculee_deg"],
+    fig0 = trace_figure_nav_fecamp(contenu_nav_calculee["Lon_calculee_deg"],
                             contenu_nav_calculee["Lat_calculee_deg"],
                             contenu_nav_parfaite["longitude_ins"],
-                            contenu_nav_parfaite["latitude_ins"])
+                            contenu_nav_parfaite["latitude_ins"],
+                            rep_sortie=None if RAPPORT else ".",
+                            afficher=not (RAPPORT or EXPORT_STATIQUE))
 
 # Calcul des erreurs de position de la navigation calculée par rapport à la navigation parfaite
 # err_pos_x, err_pos_y, err_pos_z = calcul_erreurs_position(contenu_nav_parfaite["longitude_ins"],
@@ -156,7 +181,27 @@ print("Fin d'appel des figures, vous pouvez les visualiser maintenant.")
 
 #%% Enregistrement des figures
 
-if SAVE_FIG == True :
+if RAPPORT:
+    # Un seul fichier : plotly.js intégré une fois, figures dessinées à l'affichage
+    # (les figures fig1 à fig7 décommentées plus haut peuvent être ajoutées à la liste)
+    chemin_rapport = construire_rapport(
+        [("Navigation 2D", fig0),
+         ("Données VOR/DME", fig8),
+         ("Positions VOR/DME", fig9)],
+        f"Rapport_nav_{CHOIX_TRAJ}.html",
+        titre=f"Navigation calculée - essai {CHOIX_TRAJ}")
+    webbrowser.open(chemin_rapport.resolve().as_uri())
+
+elif EXPORT_STATIQUE:
+    # Figures dessinées en parallèle par matplotlib (moteur Agg)
+    chemins = exporter_figures(
+        [("Navigation_2D", fig0),
+         ("Donnees_VORDME", fig8),
+         ("Positions_VORDME", fig9)],
+        f"Figures_{CHOIX_TRAJ}")
+    print(f"{len(chemins)} figures écrites dans Figures_{CHOIX_TRAJ}")
+
+elif SAVE_FIG == True :
     # Enregistrer les figures dans le répertoire
     # Enregistrement des figures en HTML
     # fig1.write_html("Erreurs_de_position.html")
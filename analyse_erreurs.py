@@ -0,0 +1,355 @@
+"""
+Description
+-----------
+
+Analyse des erreurs de la navigation calculée par rapport à la navigation de
+référence, sans dépendance à plotly.
+
+La référence est alignée sur temps_s par interpolation linéaire (np.interp) :
+les deux navigations peuvent avoir des cadences et des longueurs différentes,
+seuls les instants de temps_s couverts par la référence sont analysés. Les
+angles de référence sont déroulés avant interpolation et les écarts d'angle
+ramenés dans [-pi, pi].
+
+Les erreurs sont comptées référence moins calculé, comme dans les fonctions
+calcul_erreurs_* de trace_figures.py qui alimentent les mêmes figures :
+
+   - position : nord, est [m] dans le repère NED WGS84 de la position de
+     référence (geodesie.geodesique_vers_ned), altitude [m] et écart
+     horizontal [m] ; elles diffèrent de quelques millièmes en relatif de
+     celles de calcul_erreurs_position, comptées sur la sphère de rayon RT ;
+   - vitesse : nord, ouest, verticale [m/s] ;
+   - attitude : cap, roulis, tangage [mrad].
+
+Les statistiques (moyenne, RMS, maximum, pente de dérive, CEP50 / CEP95 de
+l'écart horizontal) sont cumulées bloc par bloc dans StatistiquesErreurs :
+analyser_erreurs parcourt les enregistrements par tranches de taille_bloc
+échantillons, si bien que des tableaux projetés en mémoire (cache_mat) plus
+grands que la mémoire sont lus une seule fois, par morceaux. Les CEP sont
+lus sur un histogramme logarithmique de l'écart horizontal (résolution
+relative de RESOLUTION_CEP).
+
+Classes Disponibles :
+
+   - class ErreursNavigation
+   - class ResumeErreurs
+   - class StatistiquesErreurs
+
+Fonctions Disponibles :
+
+   - aligner : interpolation d'un canal de référence sur temps_s
+   - calculer_erreurs : séries d'erreurs d'un bloc d'échantillons
+   - analyser_erreurs : statistiques des erreurs de tout un enregistrement
+
+--------------------------------
+"""
+
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+from geodesie import DEG2RAD, geodesique_vers_ned
+
+# Canaux de la navigation calculée (champs de NavOutput) et de la navigation
+# de référence (variables des fichiers Nav_reference_*.mat)
+CANAUX_CALCULES = {
+    "lat": "Lat_calculee_deg",
+    "lon": "Lon_calculee_deg",
+    "alt": "Alt_calculee_m",
+    "vn": "Vn_calculee_ms",
+    "vw": "Vw_calculee_ms",
+    "vz": "Vz_calculee_ms",
+    "cap": "Cap_calcule_rad",
+    "roulis": "Roulis_calcule_rad",
+    "tangage": "Tangage_calcule_rad",
+}
+CANAUX_REFERENCE = {
+    "lat": "latitude_ins",
+    "lon": "longitude_ins",
+    "alt": "altitude_ins",
+    "vn": "vit_ins_n",
+    "vw": "vit_ins_w",
+    "vz": "vit_ins_z",
+    "cap": "cap_ins",
+    "roulis": "roulis_ins",
+    "tangage": "tangage_ins",
+}
+# Canaux angulaires de la référence (en degrés, déroulés avant interpolation)
+_ANGLES = ("cap", "roulis", "tangage")
+
+# Nombre d'échantillons lus par bloc dans analyser_erreurs
+TAILLE_BLOC = 1_000_000
+# Histogramme de l'écart horizontal : bornes [m] et résolution relative des CEP
+BORNES_CEP_M = (1e-3, 1e7)
+RESOLUTION_CEP = 1e-3
+
+
+@dataclass
+class ErreursNavigation:
+    """Erreurs (référence - calculé) d'un bloc, tableaux de dimension (M,)"""
+
+    temps_s: np.ndarray = None
+    """Instants analysés (ceux de temps_s couverts par la référence) [s]"""
+    nord_m: np.ndarray = None
+    """Erreur de position nord [m]"""
+    est_m: np.ndarray = None
+    """Erreur de position est [m]"""
+    alt_m: np.ndarray = None
+    """Erreur d'altitude [m]"""
+    horizontale_m: np.ndarray = None
+    """Écart horizontal [m]"""
+    vn_ms: np.ndarray = None
+    """Erreur de vitesse nord [m/s]"""
+    vw_ms: np.ndarray = None
+    """Erreur de vitesse ouest [m/s]"""
+    vz_ms: np.ndarray = None
+    """Erreur de vitesse verticale [m/s]"""
+    cap_mrad: np.ndarray = None
+    """Erreur de cap [mrad]"""
+    roulis_mrad: np.ndarray = None
+    """Erreur de roulis [mrad]"""
+    tangage_mrad: np.ndarray = None
+    """Erreur de tangage [mrad]"""
+
+
+# Séries d'erreurs résumées par StatistiquesErreurs
+_SERIES = tuple(f.name for f in fields(ErreursNavigation) if f.name != "temps_s")
+
+
+@dataclass
+class ResumeErreurs:
+    """Statistiques des erreurs, dictionnaires indexés par les séries de ErreursNavigation"""
+
+    nb_echantillons: int = 0
+    """Nombre d'échantillons analysés"""
+    duree_s: float = 0.0
+    """Durée couverte par les échantillons analysés [s]"""
+    moyenne: dict = field(default_factory=dict)
+    """Moyenne de chaque série"""
+    rms: dict = field(default_factory=dict)
+    """Moyenne quadratique de chaque série"""
+    max_abs: dict = field(default_factory=dict)
+    """Maximum de la valeur absolue de chaque série"""
+    derive_par_h: dict = field(default_factory=dict)
+    """Pente de la droite des moindres carrés de chaque série, par heure"""
+    cep50_m: float = np.nan
+    """Rayon contenant 50 % des écarts horizontaux [m]"""
+    cep95_m: float = np.nan
+    """Rayon contenant 95 % des écarts horizontaux [m]"""
+
+
+def aligner(t_ref, valeurs, temps_s, angle: bool = False):
+    r"""Interpole un canal de référence sur les instants temps_s
+
+    Parameters
+    ----------
+    t_ref : np.ndarray
+        instants de la référence [s], croissants
+    valeurs : np.ndarray
+        valeurs de la référence, même taille que t_ref
+    temps_s : np.ndarray
+        instants d'interpolation [s]
+    angle : bool
+        canal angulaire [rad] : déroulé avant interpolation
+
+    Returns
+    -------
+    valeurs_alignees : np.ndarray
+        valeurs interpolées (M,)
+
+    """
+    valeurs = np.ravel(valeurs).astype(float)
+    if angle:
+        valeurs = np.unwrap(valeurs)
+    return np.interp(np.ravel(temps_s), np.ravel(t_ref), valeurs)
+
+
+def _ecart_angle(a, b):
+    """Écart a - b ramené dans [-pi, pi]"""
+    return (a - b + np.pi) % (2 * np.pi) - np.pi
+
+
+def calculer_erreurs(temps_s, calcul, reference, t_ref=None):
+    r"""Séries d'erreurs d'un bloc de la navigation calculée
+
+    Parameters
+    ----------
+    temps_s : np.ndarray
+        instants de la navigation calculée [s] (N,) ou (1, N)
+    calcul : Mapping
+        canaux calculés (noms de CANAUX_CALCULES), même taille que temps_s
+    reference : Mapping
+        canaux de référence (noms de CANAUX_REFERENCE), angles en degrés
+    t_ref : np.ndarray
+        instants de la référence [s] ; si None, la référence est supposée
+        échantillonnée sur temps_s (les deux sont tronqués à la plus courte)
+
+    Returns
+    -------
+    erreurs : ErreursNavigation
+        erreurs aux instants de temps_s couverts par la référence
+
+    """
+    temps_s = np.ravel(temps_s).astype(float)
+    cal = {cle: np.ravel(calcul[nom]) for cle, nom in CANAUX_CALCULES.items()}
+    if t_ref is None:
+        m = min(len(temps_s), *(np.size(reference[nom]) for nom in CANAUX_REFERENCE.values()))
+        garde = slice(0, m)
+        ref = {
+            cle: np.ravel(reference[nom])[:m].astype(float) * (DEG2RAD if cle in _ANGLES else 1.0)
+            for cle, nom in CANAUX_REFERENCE.items()
+        }
+    else:
+        t_ref = np.ravel(t_ref).astype(float)
+        garde = (temps_s >= t_ref[0]) & (temps_s <= t_ref[-1])
+        # Seule la portion de la référence qui encadre le bloc est lue
+        i0 = max(np.searchsorted(t_ref, temps_s[0], side="right") - 1, 0)
+        i1 = np.searchsorted(t_ref, temps_s[-1], side="left") + 1
+        ref = {
+            cle: aligner(
+                t_ref[i0:i1],
+                np.ravel(reference[nom])[i0:i1].astype(float) * (DEG2RAD if cle in _ANGLES else 1.0),
+                temps_s[garde],
+                angle=cle in _ANGLES,
+            )
+            for cle, nom in CANAUX_REFERENCE.items()
+        }
+    cal = {cle: np.asarray(val[garde], dtype=float) for cle, val in cal.items()}
+
+    # Position du calcul dans le repère NED de la position de référence
+    ned = geodesique_vers_ned(
+        cal["lat"] * DEG2RAD, cal["lon"] * DEG2RAD, cal["alt"],
+        ref["lat"] * DEG2RAD, ref["lon"] * DEG2RAD, ref["alt"],
+    )
+    return ErreursNavigation(
+        temps_s=temps_s[garde],
+        nord_m=-ned[:, 0],
+        est_m=-ned[:, 1],
+        alt_m=ref["alt"] - cal["alt"],
+        horizontale_m=np.hypot(ned[:, 0], ned[:, 1]),
+        vn_ms=ref["vn"] - cal["vn"],
+        vw_ms=ref["vw"] - cal["vw"],
+        vz_ms=ref["vz"] - cal["vz"],
+        cap_mrad=_ecart_angle(ref["cap"], cal["cap"]) * 1000,
+        roulis_mrad=_ecart_angle(ref["roulis"], cal["roulis"]) * 1000,
+        tangage_mrad=_ecart_angle(ref["tangage"], cal["tangage"]) * 1000,
+    )
+
+
+class StatistiquesErreurs:
+    """Statistiques des erreurs cumulées bloc par bloc (sommes, extrema, histogramme)"""
+
+    def __init__(self):
+        k = len(_SERIES)
+        self.n = 0
+        self.t_min = np.inf
+        self.t_max = -np.inf
+        # Sommes des séries, de leurs carrés et de leurs produits par le temps
+        self._s = np.zeros(k)
+        self._s2 = np.zeros(k)
+        self._st = np.zeros(k)
+        self._max = np.zeros(k)
+        # Sommes des instants (centrés sur le premier instant, pour la précision)
+        self._t0 = None
+        self._t = 0.0
+        self._t2 = 0.0
+        nb_classes = int(np.ceil(np.log(BORNES_CEP_M[1] / BORNES_CEP_M[0]) / np.log1p(RESOLUTION_CEP)))
+        self._bords = np.geomspace(*BORNES_CEP_M, nb_classes + 1)
+        self._histo = np.zeros(nb_classes + 2, dtype=np.int64)
+
+    def ajouter(self, erreurs: ErreursNavigation):
+        """Cumule les erreurs d'un bloc"""
+        m = len(erreurs.temps_s)
+        if m == 0:
+            return
+        if self._t0 is None:
+            self._t0 = float(erreurs.temps_s[0])
+        t = erreurs.temps_s - self._t0
+        series = np.stack([getattr(erreurs, nom) for nom in _SERIES])
+        self.n += m
+        self.t_min = min(self.t_min, float(erreurs.temps_s[0]))
+        self.t_max = max(self.t_max, float(erreurs.temps_s[-1]))
+        self._s += series.sum(axis=1)
+        self._s2 += (series * series).sum(axis=1)
+        self._st += series @ t
+        self._max = np.maximum(self._max, np.abs(series).max(axis=1))
+        self._t += t.sum()
+        self._t2 += t @ t
+        # Classe 0 : sous la borne basse, dernière classe : au-dessus de la borne haute
+        self._histo += np.bincount(
+            np.searchsorted(self._bords, erreurs.horizontale_m, side="right"),
+            minlength=len(self._histo),
+        )[: len(self._histo)]
+
+    def _quantile_horizontal(self, q: float):
+        """Quantile q de l'écart horizontal lu sur l'histogramme (borne haute de la classe)"""
+        rang = np.searchsorted(np.cumsum(self._histo), q * self.n, side="left")
+        if rang == 0:
+            return BORNES_CEP_M[0]
+        if rang > len(self._bords) - 1:
+            return np.inf
+        return float(self._bords[rang])
+
+    def resume(self):
+        r"""Statistiques des erreurs cumulées
+
+        Returns
+        -------
+        resume : ResumeErreurs
+            moyennes, RMS, maxima, dérives et CEP
+
+        """
+        if self.n == 0:
+            return ResumeErreurs()
+        n = self.n
+        moyenne = self._s / n
+        rms = np.sqrt(self._s2 / n)
+        # Pente des moindres carrés : cov(t, e) / var(t)
+        var_t = self._t2 / n - (self._t / n) ** 2
+        pente = (self._st / n - moyenne * self._t / n) / var_t if var_t > 0 else np.zeros_like(moyenne)
+        return ResumeErreurs(
+            nb_echantillons=n,
+            duree_s=self.t_max - self.t_min,
+            moyenne=dict(zip(_SERIES, moyenne.tolist())),
+            rms=dict(zip(_SERIES, rms.tolist())),
+            max_abs=dict(zip(_SERIES, self._max.tolist())),
+            derive_par_h=dict(zip(_SERIES, (pente * 3600).tolist())),
+            cep50_m=self._quantile_horizontal(0.5),
+            cep95_m=self._quantile_horizontal(0.95),
+        )
+
+
+def analyser_erreurs(temps_s, calcul, reference, t_ref=None, taille_bloc: int = TAILLE_BLOC):
+    r"""Statistiques des erreurs d'un enregistrement complet, lu par blocs
+
+    Parameters
+    ----------
+    temps_s : np.ndarray
+        instants de la navigation calculée [s] (N,) ou (1, N)
+    calcul : Mapping
+        canaux calculés (ex: contenu de Nav_calculee_*.mat lu par charger_mat)
+    reference : Mapping
+        canaux de référence (ex: contenu de Nav_reference_*.mat)
+    t_ref : np.ndarray
+        instants de la référence [s] ; si None, référence échantillonnée sur temps_s
+    taille_bloc : int
+        nombre d'échantillons traités par bloc
+
+    Returns
+    -------
+    resume : ResumeErreurs
+        statistiques de tout l'enregistrement
+
+    """
+    temps_s = np.ravel(temps_s)
+    n = len(temps_s)
+    stats = StatistiquesErreurs()
+    for debut in range(0, n, taille_bloc):
+        bloc = slice(debut, min(debut + taille_bloc, n))
+        cal = {nom: np.ravel(calcul[nom])[bloc] for nom in CANAUX_CALCULES.values()}
+        if t_ref is None:
+            ref = {nom: np.ravel(reference[nom])[bloc] for nom in CANAUX_REFERENCE.values()}
+        else:
+            ref = reference
+        stats.ajouter(calculer_erreurs(temps_s[bloc], cal, ref, t_ref))
+    return stats.resume()
@@ -0,0 +1,118 @@
+"""
+Description
+-----------
+
+Banc de mesure de la boucle de navigation : compare le nombre de pas par
+seconde des différents noyaux de calcul_nav sur des incréments synthétiques
+(porteur immobile bruité) et vérifie l'écart maximal avec la boucle de
+référence. Avec plusieurs modes --attitude, chaque noyau est mesuré dans
+chaque mode (la référence n'existe qu'en 'dcm'). Avec --covariance, mesure
+aussi le nombre de propagations de la covariance du filtre d'hybridation
+(filtre_kalman.py) par seconde.
+
+Utilisation :
+
+    python bench_calcul_nav.py --pas 20000
+    python bench_calcul_nav.py --pas 200000 --backends fusionne numba --attitude dcm quaternion
+    python bench_calcul_nav.py --pas 20000 --covariance 1 10
+
+--------------------------------
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from Entretien_localisation import BACKENDS, calcul_nav
+from filtre_kalman import mesurer_covariance
+from Gerer_donnees import NavInput
+
+
+def donnees_synthetiques(n: int, graine: int = 0) -> NavInput:
+    r"""Construit une structure NavInput de n pas pour un porteur immobile
+
+    Parameters
+    ----------
+    n : int
+        nombre de pas de temps
+    graine : int
+        graine du générateur aléatoire
+
+    Returns
+    -------
+    donnees_in : NavInput
+        structure initialisée et allouée
+
+    """
+    rng = np.random.default_rng(graine)
+    donnees_in = NavInput(temps_s=(np.arange(n) * 0.01)[np.newaxis, :])
+    donnees_in.alloc_memoire()
+    donnees_in.inc_vit_x_ms = 1e-3 * rng.standard_normal((1, n))
+    donnees_in.inc_vit_y_ms = 1e-3 * rng.standard_normal((1, n))
+    donnees_in.inc_vit_z_ms = -0.0981 + 1e-3 * rng.standard_normal((1, n))
+    donnees_in.inc_angl_x_rad = 1e-6 * rng.standard_normal((1, n))
+    donnees_in.inc_angl_y_rad = 1e-6 * rng.standard_normal((1, n))
+    donnees_in.inc_angl_z_rad = 1e-6 * rng.standard_normal((1, n))
+    donnees_in.Cap_initial_rad = 41.14 * np.pi / 180
+    donnees_in.Lon_initiale_rad = 2.110168 * np.pi / 180
+    donnees_in.Lat_initiale_rad = 49.02621 * np.pi / 180
+    return donnees_in
+
+
+def mesurer(backend: str, n: int, attitude: str = "dcm"):
+    """Renvoie la durée [s] et la sortie de calcul_nav pour un noyau donné"""
+    donnees_in = donnees_synthetiques(n)
+    debut = time.perf_counter()
+    donnees_out = calcul_nav(donnees_in, False, backend=backend, attitude=attitude)
+    return time.perf_counter() - debut, donnees_out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--pas", type=int, default=20000, help="nombre de pas")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=[b for b in BACKENDS if b != "auto"],
+        choices=BACKENDS,
+    )
+    parser.add_argument("--attitude", nargs="+", default=["dcm"], choices=("dcm", "quaternion"))
+    parser.add_argument(
+        "--covariance",
+        nargs="*",
+        type=int,
+        help="cadences de propagation de la covariance à mesurer (nombre de pas)",
+    )
+    args = parser.parse_args()
+    # La référence n'existe qu'en DCM : elle est mesurée une fois, en dernier
+    cas = [(b, a) for b in args.backends if b != "reference" for a in args.attitude]
+    if "reference" in args.backends:
+        cas.append(("reference", "dcm"))
+
+    warnings.simplefilter("ignore", RuntimeWarning)
+    if "numba" in args.backends:
+        # Compilation (ou chargement du cache) hors mesure
+        for attitude in args.attitude:
+            mesurer("numba", 10, attitude)
+    resultats = {(b, a): mesurer(b, args.pas, a) for b, a in cas}
+
+    print(f"\n{'noyau':<12}{'attitude':<12}{'durée [s]':>12}{'pas/s':>14}{'écart max':>14}")
+    ref = resultats.get(("reference", "dcm"), (None, None))[1]
+    for (backend, attitude), (duree, sortie) in resultats.items():
+        ecart = ""
+        if ref is not None:
+            ecart = max(
+                np.nanmax(np.abs(getattr(sortie, k) - getattr(ref, k)))
+                for k in ("Lat_calculee_deg", "Lon_calculee_deg", "Cap_calcule_rad",
+                          "Roulis_calcule_rad", "Tangage_calcule_rad")
+            )
+            ecart = f"{ecart:.2e}"
+        print(f"{backend:<12}{attitude:<12}{duree:>12.3f}{(args.pas - 1) / duree:>14.0f}{ecart:>14}")
+
+    if args.covariance is not None:
+        print(f"\n{'cadence cov':<12}{'prop./s':>12}{'pas nav/s':>14}")
+        for cadence in args.covariance or [1]:
+            debit = mesurer_covariance(args.pas // cadence or 1, cadence)
+            print(f"{cadence:<12}{debit:>12.0f}{debit * cadence:>14.0f}")
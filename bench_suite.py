@@ -0,0 +1,203 @@
+"""
+Description
+-----------
+
+Suite de bancs de mesure de bout en bout sur des essais synthétiques
+(generateur_imu.py) de 1 min, 1 h et 10 h : pour chaque durée, mesure le
+temps de génération des incréments, le nombre de pas par seconde de
+calcul_nav, le temps d'écriture des fichiers de sortie (ecrire_resultats) et
+le pic de mémoire résidente du processus.
+
+Chaque cas s'exécute dans un processus neuf, pour que le pic de mémoire soit
+le sien. Les résultats sont ajoutés, une ligne JSON par cas, au fichier de
+résultats (avec la date, le commit git et la machine), et chaque cas est
+comparé à la dernière mesure du même cas dans ce fichier : une régression
+apparaît comme un rapport de débit inférieur à 1.
+
+Utilisation :
+
+    python bench_suite.py
+    python bench_suite.py --cas 1min 1h --backend numba --sortie bench.jsonl
+
+--------------------------------
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Durées des essais synthétiques [s]
+CAS = {"1min": 60.0, "1h": 3600.0, "10h": 36000.0}
+# Fichier de résultats par défaut (une ligne JSON par cas mesuré)
+FICHIER_RESULTATS = Path(__file__).parent / "bench_resultats.jsonl"
+
+
+def _pic_memoire_mo():
+    """Pic de mémoire résidente du processus [Mo], None si indisponible"""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    return pic / (1 << 20) if platform.system() == "Darwin" else pic / 1024
+
+
+def mesurer_cas(duree_s: float, backend: str = "fusionne", attitude: str = "dcm"):
+    r"""Mesure un essai synthétique de bout en bout (à lancer dans un processus neuf)
+
+    Parameters
+    ----------
+    duree_s : float
+        durée de l'essai [s]
+    backend : str
+        noyau de calcul_nav
+    attitude : str
+        propagation de l'attitude de calcul_nav
+
+    Returns
+    -------
+    mesure : dict
+        pas, temps de génération, de calcul et d'écriture [s], débit [pas/s],
+        taille des fichiers écrits [Mo] et pic de mémoire [Mo]
+
+    """
+    from Entretien_localisation import calcul_nav
+    from generateur_imu import donnees_inertielles, navinput_synthetique, profil_analytique
+    from MAIN_calcul_nav import ecrire_resultats
+
+    warnings.simplefilter("ignore", RuntimeWarning)
+    memoire_initiale = _pic_memoire_mo()
+    debut = time.perf_counter()
+    profil = profil_analytique(duree_s)
+    donnees_in = navinput_synthetique(donnees_inertielles(profil), profil)
+    del profil
+    generation_s = time.perf_counter() - debut
+    n = donnees_in.temps_s.shape[1]
+
+    debut = time.perf_counter()
+    donnees_out = calcul_nav(donnees_in, False, backend=backend, attitude=attitude, progression=False)
+    calcul_s = time.perf_counter() - debut
+
+    with tempfile.TemporaryDirectory() as rep:
+        debut = time.perf_counter()
+        chemins = ecrire_resultats(donnees_out, Path(rep))
+        ecriture_s = time.perf_counter() - debut
+        taille_mo = sum(chemin.stat().st_size for chemin in chemins) / (1 << 20)
+
+    return {
+        "pas": n,
+        "generation_s": generation_s,
+        "calcul_s": calcul_s,
+        "pas_par_s": (n - 1) / calcul_s,
+        "ecriture_s": ecriture_s,
+        "taille_sortie_mo": taille_mo,
+        "memoire_initiale_mo": memoire_initiale,
+        "memoire_pic_mo": _pic_memoire_mo(),
+    }
+
+
+def _commit():
+    """Commit git courant du dépôt, None hors d'un dépôt git"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _derniere_mesure(chemin: Path, cle: dict):
+    """Dernière mesure du fichier de résultats ayant les mêmes valeurs que cle"""
+    if not chemin.exists():
+        return None
+    derniere = None
+    for ligne in chemin.read_text().splitlines():
+        try:
+            mesure = json.loads(ligne)
+        except ValueError:
+            continue
+        if all(mesure.get(k) == v for k, v in cle.items()):
+            derniere = mesure
+    return derniere
+
+
+def lancer_suite(cas=tuple(CAS), backend: str = "fusionne", attitude: str = "dcm",
+                 sortie: Path = FICHIER_RESULTATS):
+    r"""Mesure chaque cas dans un processus neuf et ajoute les résultats au fichier
+
+    Parameters
+    ----------
+    cas : iterable of str
+        cas à mesurer (clés de CAS)
+    backend : str
+        noyau de calcul_nav
+    attitude : str
+        propagation de l'attitude de calcul_nav
+    sortie : Path
+        fichier de résultats, complété d'une ligne JSON par cas
+
+    Returns
+    -------
+    resultats : list of dict
+        mesures ajoutées au fichier, avec le rapport de débit à la mesure
+        précédente du même cas ('rapport_precedent', None sans précédent)
+
+    """
+    sortie = Path(sortie)
+    commun = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "machine": platform.node(),
+        "processeur": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "coeurs": os.cpu_count(),
+    }
+    resultats = []
+    for nom in cas:
+        cle = {"cas": nom, "backend": backend, "attitude": attitude}
+        precedente = _derniere_mesure(sortie, cle)
+        # Processus neuf par cas (spawn) : pic de mémoire propre au cas
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            mesure = pool.submit(mesurer_cas, CAS[nom], backend, attitude).result()
+        resultat = {**cle, "duree_s": CAS[nom], **mesure, **commun}
+        with open(sortie, "a") as f:
+            f.write(json.dumps(resultat) + "\n")
+        resultat["rapport_precedent"] = (
+            resultat["pas_par_s"] / precedente["pas_par_s"] if precedente is not None else None
+        )
+        resultats.append(resultat)
+    return resultats
+
+
+if __name__ == "__main__":
+    from Entretien_localisation import BACKENDS
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--cas", nargs="+", default=list(CAS), choices=list(CAS))
+    parser.add_argument("--backend", default="fusionne", choices=BACKENDS)
+    parser.add_argument("--attitude", default="dcm", choices=("dcm", "quaternion"))
+    parser.add_argument("--sortie", type=Path, default=FICHIER_RESULTATS, help="fichier de résultats JSON lines")
+    args = parser.parse_args()
+
+    print(f"\n{'cas':<8}{'pas':>12}{'génér. [s]':>12}{'pas/s':>12}{'écrit. [s]':>12}"
+          f"{'sortie [Mo]':>13}{'pic [Mo]':>10}{'vs préc.':>10}")
+    for r in lancer_suite(args.cas, args.backend, args.attitude, args.sortie):
+        rapport = f"{r['rapport_precedent']:.2f}" if r["rapport_precedent"] is not None else "-"
+        pic = f"{r['memoire_pic_mo']:.0f}" if r["memoire_pic_mo"] is not None else "-"
+        print(f"{r['cas']:<8}{r['pas']:>12}{r['generation_s']:>12.2f}{r['pas_par_s']:>12.0f}"
+              f"{r['ecriture_s']:>12.2f}{r['taille_sortie_mo']:>13.1f}{pic:>10}{rapport:>10}")
+    print(f"\nRésultats ajoutés à {args.sortie}")
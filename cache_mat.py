@@ -0,0 +1,226 @@
+"""
+Description
+-----------
+
+Cache disque en colonnes des fichiers .mat : chaque variable d'un fichier est
+écrite une fois pour toutes dans un fichier .npy d'un dossier de cache propre
+à ce fichier, puis relue par projection mémoire (np.load(..., mmap_mode='r')).
+Seules les variables effectivement utilisées sont lues, et seules les pages
+effectivement parcourues sont chargées en mémoire.
+
+Le cache est invalidé quand le fichier source change : la date de
+modification et la taille sont comparées à chaque ouverture, et l'empreinte
+SHA-256 n'est recalculée que si elles ont changé (un fichier recopié à
+l'identique ne reconstruit pas le cache).
+
+Les fichiers réécrits à chaque calcul (Nav_calculee_*.mat) sont écrits par
+ecrire_mat, qui produit le cache en même temps que le fichier, à partir des
+tableaux en mémoire : leur première lecture ne paie ni conversion ni empreinte.
+
+Classes Disponibles :
+
+   - class ContenuMat
+
+Fonctions Disponibles :
+
+   - convertir_mat : conversion (si nécessaire) d'un fichier .mat en cache .npy
+   - charger_mat : remplaçant de scipy.io.loadmat lisant le cache
+   - ecrire_mat : remplaçant de scipy.io.savemat écrivant aussi le cache
+
+--------------------------------
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import scipy.io
+
+# Nom du dossier de cache créé à côté des fichiers .mat
+NOM_REP_CACHE = ".cache_mat"
+# Fichier de description de la source dans chaque dossier de cache
+_FICHIER_SOURCE = "source.json"
+
+
+def _empreinte(chemin: Path):
+    """Empreinte SHA-256 du fichier, lu par morceaux"""
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for morceau in iter(lambda: f.read(1 << 20), b""):
+            h.update(morceau)
+    return h.hexdigest()
+
+
+def _rep_cache(chemin: Path, rep_cache: Path = None):
+    """Dossier de cache du fichier chemin"""
+    racine = Path(rep_cache) if rep_cache is not None else chemin.parent / NOM_REP_CACHE
+    return racine / chemin.stem
+
+
+def _cache_valide(chemin: Path, rep: Path):
+    """Vérifie le cache rep du fichier chemin, met à jour sa date si seule celle-ci a changé"""
+    try:
+        source = json.loads((rep / _FICHIER_SOURCE).read_text())
+    except (OSError, ValueError):
+        return False
+    stat = chemin.stat()
+    if source["mtime_ns"] == stat.st_mtime_ns and source["taille"] == stat.st_size:
+        return True
+    if source["taille"] != stat.st_size or source["sha256"] != _empreinte(chemin):
+        return False
+    source["mtime_ns"] = stat.st_mtime_ns
+    (rep / _FICHIER_SOURCE).write_text(json.dumps(source))
+    return True
+
+
+def _ecrire_cache(chemin: Path, stat: os.stat_result, contenu: Mapping, rep: Path, sha256: str):
+    """Écrit les variables numériques de contenu dans le dossier de cache rep"""
+    rep.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{chemin.stem}-", dir=rep.parent))
+    tmp.chmod(0o755)
+    for nom, valeur in contenu.items():
+        # Les en-têtes (__header__, ...) et les structures/cellules ne sont pas cachés
+        if nom.startswith("__") or not isinstance(valeur, np.ndarray) or valeur.dtype.hasobject:
+            continue
+        np.save(tmp / f"{nom}.npy", valeur, allow_pickle=False)
+    source = {
+        "chemin": str(chemin.resolve()),
+        "mtime_ns": stat.st_mtime_ns,
+        "taille": stat.st_size,
+        "sha256": sha256,
+    }
+    (tmp / _FICHIER_SOURCE).write_text(json.dumps(source))
+
+    shutil.rmtree(rep, ignore_errors=True)
+    try:
+        os.rename(tmp, rep)
+    except OSError:
+        # Un autre processus a écrit le même cache entre-temps
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def convertir_mat(chemin, rep_cache: Path = None, forcer: bool = False):
+    r"""Écrit chaque variable numérique d'un fichier .mat dans un fichier .npy
+
+    La conversion n'a lieu que si le cache est absent ou périmé. Elle est
+    écrite dans un dossier temporaire puis renommée, si bien que plusieurs
+    processus peuvent ouvrir le même fichier en parallèle.
+
+    Parameters
+    ----------
+    chemin : str or Path
+        fichier .mat source
+    rep_cache : Path
+        dossier racine du cache (par défaut '.cache_mat' à côté du fichier)
+    forcer : bool
+        reconstruction du cache même s'il est valide
+
+    Returns
+    -------
+    rep : Path
+        dossier de cache contenant un fichier <variable>.npy par variable
+
+    """
+    chemin = Path(chemin)
+    rep = _rep_cache(chemin, rep_cache)
+    if not forcer and _cache_valide(chemin, rep):
+        return rep
+
+    stat = chemin.stat()
+    _ecrire_cache(chemin, stat, scipy.io.loadmat(chemin), rep, _empreinte(chemin))
+    return rep
+
+
+class ContenuMat(Mapping):
+    r"""Contenu d'un fichier .mat, variables lues à la demande depuis le cache
+
+    S'utilise comme le dictionnaire renvoyé par scipy.io.loadmat. Les
+    tableaux renvoyés sont en lecture seule (projection mémoire).
+
+    Parameters
+    ----------
+    rep : Path
+        dossier de cache produit par convertir_mat
+    mmap : bool
+        projection mémoire (True) ou lecture complète à la demande (False)
+
+    """
+
+    def __init__(self, rep: Path, mmap: bool = True):
+        self.rep = Path(rep)
+        self.mmap_mode = "r" if mmap else None
+        self._noms = sorted(p.stem for p in self.rep.glob("*.npy"))
+        self._charges = {}
+
+    def __getitem__(self, nom):
+        if nom not in self._charges:
+            if nom not in self._noms:
+                raise KeyError(nom)
+            self._charges[nom] = np.load(self.rep / f"{nom}.npy", mmap_mode=self.mmap_mode)
+        return self._charges[nom]
+
+    def __iter__(self):
+        return iter(self._noms)
+
+    def __len__(self):
+        return len(self._noms)
+
+    def __repr__(self):
+        return f"ContenuMat({str(self.rep)!r}, variables={self._noms})"
+
+
+def charger_mat(chemin, rep_cache: Path = None, mmap: bool = True):
+    r"""Remplaçant de scipy.io.loadmat passant par le cache .npy
+
+    Parameters
+    ----------
+    chemin : str or Path
+        fichier .mat source
+    rep_cache : Path
+        dossier racine du cache (par défaut '.cache_mat' à côté du fichier)
+    mmap : bool
+        projection mémoire des variables
+
+    Returns
+    -------
+    contenu : ContenuMat
+        variables du fichier, lues à la demande
+
+    """
+    return ContenuMat(convertir_mat(chemin, rep_cache), mmap)
+
+
+def ecrire_mat(chemin, variables: Mapping, rep_cache: Path = None):
+    r"""Remplaçant de scipy.io.savemat écrivant aussi le cache .npy du fichier
+
+    Les variables sont cachées directement depuis les tableaux en mémoire, au
+    moins 2D comme les renvoie scipy.io.loadmat : la lecture suivante par
+    charger_mat ne relit pas le fichier .mat. L'empreinte SHA-256 n'est pas
+    calculée ; si le fichier est ensuite modifié (date ou taille), le cache
+    est reconstruit par convertir_mat.
+
+    Parameters
+    ----------
+    chemin : str or Path
+        fichier .mat à écrire
+    variables : Mapping
+        variables à écrire (nom -> tableau)
+    rep_cache : Path
+        dossier racine du cache (par défaut '.cache_mat' à côté du fichier)
+
+    Returns
+    -------
+    chemin : Path
+        fichier .mat écrit
+
+    """
+    chemin = Path(chemin)
+    scipy.io.savemat(chemin, variables)
+    contenu = {nom: np.atleast_2d(valeur) for nom, valeur in variables.items()}
+    _ecrire_cache(chemin, chemin.stat(), contenu, _rep_cache(chemin, rep_cache), None)
+    return chemin
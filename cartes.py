@@ -0,0 +1,120 @@
+"""
+Description
+-----------
+
+Cache des fonds de carte des tracés de navigation (images du dossier
+01-Cartes, emprises dans geodesie.CARTES).
+
+Chaque carte est lue, réduite à la largeur de la figure et encodée une seule
+fois par processus (les variantes sont gardées en mémoire par largeur). Une
+figure reçoit ensuite soit :
+
+   - le chemin relatif d'un fichier image écrit une seule fois à côté des
+     fichiers html (dossier REP_IMAGES), partagé par toutes les figures au
+     lieu d'être recopié dans chacune ;
+   - soit, pour une figure autonome, l'image réduite encodée en base64.
+
+La réduction utilise Pillow (installé avec matplotlib) ; sans Pillow,
+l'image d'origine est utilisée telle quelle.
+
+Fonctions Disponibles :
+
+   - chemin_carte : fichier image d'origine d'une carte
+   - image_carte : image réduite et encodée (octets, type MIME), en cache
+   - source_carte : source d'image plotly (fichier partagé ou base64)
+
+--------------------------------
+"""
+
+import base64
+import io
+from functools import lru_cache
+from pathlib import Path
+
+from geodesie import CARTES, EmpriseCarte
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Dossier des images de fond de carte
+REP_CARTES = Path(__file__).parent / "01-Cartes"
+# Dossier des images partagées, relatif au dossier des fichiers html
+REP_IMAGES = "cartes"
+# Largeur par défaut des cartes réduites [pixels], de l'ordre de celle d'une figure
+LARGEUR_CARTE_PX = 1200
+# Qualité JPEG des cartes réduites
+QUALITE_JPEG = 85
+
+
+def chemin_carte(carte: EmpriseCarte):
+    """Fichier image d'origine de la carte dans REP_CARTES"""
+    chemin = REP_CARTES / carte.fichier
+    if not chemin.exists():
+        raise FileNotFoundError(f"fond de carte introuvable : {chemin}")
+    return chemin
+
+
+@lru_cache(maxsize=None)
+def image_carte(nom: str, largeur_px: int = LARGEUR_CARTE_PX):
+    r"""Image d'une carte réduite à une largeur donnée, encodée une fois par processus
+
+    Parameters
+    ----------
+    nom : str
+        nom de la carte dans geodesie.CARTES ('Pontoise' ou 'Fecamp')
+    largeur_px : int
+        largeur de l'image réduite [pixels] (l'image n'est jamais agrandie)
+
+    Returns
+    -------
+    octets : bytes
+        contenu du fichier image
+    mime : str
+        type MIME de l'image ('image/jpeg' ou, sans Pillow, 'image/png')
+
+    """
+    chemin = chemin_carte(CARTES[nom])
+    if Image is None:
+        return chemin.read_bytes(), "image/png"
+    with Image.open(chemin) as image:
+        if image.width > largeur_px:
+            hauteur = round(image.height * largeur_px / image.width)
+            image = image.resize((largeur_px, hauteur), Image.LANCZOS)
+        tampon = io.BytesIO()
+        image.convert("RGB").save(tampon, format="JPEG", quality=QUALITE_JPEG, optimize=True)
+    return tampon.getvalue(), "image/jpeg"
+
+
+def source_carte(nom: str, largeur_px: int = LARGEUR_CARTE_PX, rep_sortie=None):
+    r"""Source de l'image de fond d'une figure plotly
+
+    Parameters
+    ----------
+    nom : str
+        nom de la carte dans geodesie.CARTES
+    largeur_px : int
+        largeur de l'image réduite [pixels]
+    rep_sortie : str or Path
+        dossier des fichiers html : l'image y est écrite une seule fois (sous
+        REP_IMAGES) et la figure y fait référence ; si None, l'image est
+        intégrée à la figure en base64
+
+    Returns
+    -------
+    source : str
+        chemin relatif de l'image partagée ou URI data: base64
+
+    """
+    octets, mime = image_carte(nom, largeur_px)
+    if rep_sortie is None:
+        return f"data:{mime};base64,{base64.b64encode(octets).decode()}"
+    extension = "jpg" if mime == "image/jpeg" else "png"
+    relatif = f"{REP_IMAGES}/{Path(CARTES[nom].fichier).stem}_{largeur_px}.{extension}"
+    fichier = Path(rep_sortie) / relatif
+    # Écriture unique : l'image existante est réutilisée si elle est identique
+    if not fichier.exists() or fichier.stat().st_size != len(octets):
+        fichier.parent.mkdir(parents=True, exist_ok=True)
+        fichier.write_bytes(octets)
+    return relatif
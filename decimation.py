@@ -0,0 +1,157 @@
+"""
+Description
+-----------
+
+Décimation visuelle des séries à tracer : une série de N points est réduite à
+un budget de points fixe qui conserve son aspect à l'écran, si bien que la
+taille des figures et leur temps d'affichage ne dépendent plus de la durée
+de l'enregistrement.
+
+Deux méthodes :
+
+   - 'minmax' : les échantillons sont répartis en paquets consécutifs (un par
+     colonne de pixels) et le minimum et le maximum de chaque paquet sont
+     gardés : l'enveloppe de la série, pics compris, est exacte. Vectorisée
+     (un reshape et un argmin / argmax), elle s'applique aussi aux
+     trajectoires (x, y) en gardant les extrema de chaque coordonnée ;
+   - 'lttb' (Largest Triangle Three Buckets) : un point par paquet, celui qui
+     forme le plus grand triangle avec le point retenu au paquet précédent et
+     la moyenne du paquet suivant ; mieux adaptée aux courbes lisses.
+
+Les valeurs nan (trous de mesure) sont conservées : un paquet qui en contient
+garde sa première valeur nan, pour que la ligne tracée reste interrompue.
+
+Fonctions Disponibles :
+
+   - indices_minmax : indices retenus par paquets min / max
+   - indices_lttb : indices retenus par LTTB
+   - decimer : série (ou trajectoire) décimée à un budget de points
+
+--------------------------------
+"""
+
+import numpy as np
+
+# Méthodes de décimation disponibles
+METHODES = ("minmax", "lttb")
+
+
+def _paquets(n: int, nb_paquets: int):
+    """Taille des paquets et nombre de paquets couvrant n échantillons"""
+    taille = -(-n // nb_paquets)
+    return taille, -(-n // taille)
+
+
+def indices_minmax(series, budget: int):
+    r"""Indices des extrema de chaque paquet d'échantillons
+
+    Parameters
+    ----------
+    series : sequence of np.ndarray
+        séries de même taille N dont les extrema sont gardés (ex: [y] pour une
+        série temporelle, [x, y] pour une trajectoire)
+    budget : int
+        nombre maximal de points retenus (hors premières valeurs nan des paquets)
+
+    Returns
+    -------
+    indices : np.ndarray
+        indices retenus, triés, premier et dernier échantillons compris
+
+    """
+    n = len(series[0])
+    nb_paquets = max((budget - 2) // (2 * len(series)), 1)
+    taille, nb_paquets = _paquets(n, nb_paquets)
+    retenus = [np.array([0, n - 1])]
+    for y in series:
+        y = np.asarray(y, dtype=float)
+        # Complétion du dernier paquet par la dernière valeur
+        y = np.concatenate((y, np.full(taille * nb_paquets - n, y[-1]))).reshape(nb_paquets, taille)
+        manquant = np.isnan(y)
+        debut = np.arange(nb_paquets) * taille
+        retenus.append(debut + np.argmin(np.where(manquant, np.inf, y), axis=1))
+        retenus.append(debut + np.argmax(np.where(manquant, -np.inf, y), axis=1))
+        avec_trou = manquant.any(axis=1)
+        retenus.append(debut[avec_trou] + np.argmax(manquant[avec_trou], axis=1))
+    return np.unique(np.minimum(np.concatenate(retenus), n - 1))
+
+
+def indices_lttb(x, y, budget: int):
+    r"""Indices retenus par l'algorithme LTTB (Largest Triangle Three Buckets)
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        abscisses croissantes et ordonnées (N,), sans nan
+    budget : int
+        nombre de points retenus (au moins 3)
+
+    Returns
+    -------
+    indices : np.ndarray
+        indices retenus, triés, premier et dernier échantillons compris
+
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    # Paquets des points intérieurs, le premier et le dernier points sont gardés
+    bords = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    indices = np.empty(budget, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    # Moyenne de chaque paquet (le dernier « paquet suivant » est le dernier point)
+    sx = np.concatenate(([0.0], np.cumsum(x)))
+    sy = np.concatenate(([0.0], np.cumsum(y)))
+    nb = np.maximum(bords[1:] - bords[:-1], 1)
+    moy_x = np.append((sx[bords[1:]] - sx[bords[:-1]]) / nb, x[-1])
+    moy_y = np.append((sy[bords[1:]] - sy[bords[:-1]]) / nb, y[-1])
+    a = 0
+    for k in range(budget - 2):
+        d, f = bords[k], max(bords[k + 1], bords[k] + 1)
+        cx, cy = moy_x[k + 1], moy_y[k + 1]
+        aire = np.abs((x[a] - cx) * (y[d:f] - y[a]) - (x[a] - x[d:f]) * (cy - y[a]))
+        a = d + int(np.argmax(aire))
+        indices[k + 1] = a
+    return indices
+
+
+def decimer(x, y, budget: int, methode: str = "minmax", trajectoire: bool = False):
+    r"""Décime une série (ou une trajectoire) à un budget de points
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        abscisses et ordonnées ; de dimension (N,) ou (1, N), tronquées à la
+        plus courte des deux
+    budget : int
+        nombre maximal de points tracés ; la série est rendue telle quelle si
+        elle n'en a pas plus (ou si budget est None)
+    methode : str
+        'minmax' ou 'lttb' (repli sur 'minmax' en présence de nan ou pour une
+        trajectoire)
+    trajectoire : bool
+        x n'est pas croissant (ex: longitude / latitude) : les extrema des
+        deux coordonnées sont gardés
+
+    Returns
+    -------
+    x, y : np.ndarray
+        série décimée
+
+    """
+    if methode not in METHODES:
+        raise ValueError(f"méthode de décimation inconnue : {methode!r}, choix disponibles : {METHODES}")
+    x = np.ravel(x)
+    y = np.ravel(y)
+    n = min(len(x), len(y))
+    x, y = x[:n], y[:n]
+    if budget is None or n <= budget:
+        return x, y
+    if trajectoire:
+        indices = indices_minmax([x, y], budget)
+    elif methode == "lttb" and budget >= 3 and not np.isnan(y).any():
+        indices = indices_lttb(x, y, budget)
+    else:
+        indices = indices_minmax([y], budget)
+    return x[indices], y[indices]
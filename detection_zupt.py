@@ -0,0 +1,198 @@
+"""
+Description
+-----------
+
+Détection des périodes d'immobilité (ZUPT) à partir des incréments de vitesse
+(inc_vit_*) et d'angle (inc_angl_*) de la centrale.
+
+Un échantillon est déclaré immobile quand, sur une fenêtre glissante centrée
+sur lui :
+
+   - la norme moyenne de la force spécifique est proche de g ;
+   - la variance de cette norme est faible ;
+   - la norme moyenne de la vitesse angulaire est faible.
+
+Les moyennes et variances glissantes sont tirées de sommes cumulées calculées
+une seule fois à la création du détecteur : chaque statistique coûte O(N)
+quelle que soit la longueur de la fenêtre, et les statistiques d'une fenêtre
+sont gardées en mémoire, si bien qu'un nouveau jeu de seuils ne demande plus
+que des comparaisons, sans relire les incréments.
+
+Le résultat est un tableau compact (K, 2) d'intervalles [début, fin)
+d'échantillons immobiles, converti en instants de mise à jour de vitesse
+nulle par echantillons_intervalles.
+
+Classes Disponibles :
+
+   - class ReglagesZUPT
+   - class DetecteurZUPT
+
+Fonctions Disponibles :
+
+   - intervalles_masque : intervalles [début, fin) des échantillons vrais d'un masque
+   - echantillons_intervalles : échantillons régulièrement espacés dans des intervalles
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from noyau_nav import DT, G
+
+
+@dataclass
+class ReglagesZUPT:
+    """Fenêtre et seuils du détecteur d'immobilité"""
+
+    fenetre: int = 10
+    """Longueur de la fenêtre glissante [échantillons]"""
+    seuil_acc: float = 0.2
+    """Écart maximal entre la norme moyenne de la force spécifique et g [m/s^2]"""
+    seuil_var_acc: float = 0.05
+    """Variance maximale de la norme de la force spécifique [(m/s^2)^2]"""
+    seuil_gyro: float = 5e-3
+    """Norme moyenne maximale de la vitesse angulaire [rad/s]"""
+    duree_min: int = 1
+    """Durée minimale d'un intervalle immobile [échantillons]"""
+
+
+def _sommes_cumulees(x: np.ndarray):
+    """Sommes cumulées de x précédées d'un zéro, (N + 1,)"""
+    c = np.empty(len(x) + 1)
+    c[0] = 0.0
+    np.cumsum(x, out=c[1:])
+    return c
+
+
+def intervalles_masque(masque: np.ndarray, duree_min: int = 1):
+    r"""Intervalles [début, fin) des suites d'échantillons vrais d'un masque
+
+    Parameters
+    ----------
+    masque : np.ndarray
+        masque booléen (N,)
+    duree_min : int
+        longueur minimale d'un intervalle conservé [échantillons]
+
+    Returns
+    -------
+    intervalles : np.ndarray
+        débuts et fins (exclues) des intervalles, (K, 2), triés
+
+    """
+    bords = np.diff(np.concatenate(([0], np.asarray(masque, dtype=np.int8), [0])))
+    intervalles = np.stack((np.flatnonzero(bords == 1), np.flatnonzero(bords == -1)), axis=1)
+    return intervalles[intervalles[:, 1] - intervalles[:, 0] >= duree_min]
+
+
+def echantillons_intervalles(intervalles: np.ndarray, pas: int):
+    r"""Échantillons espacés de pas à l'intérieur de chaque intervalle
+
+    Dans un intervalle [d, f), les échantillons retenus sont d + pas - 1,
+    d + 2 pas - 1, ... (strictement avant f) : chacun clôt pas échantillons
+    immobiles.
+
+    Parameters
+    ----------
+    intervalles : np.ndarray
+        intervalles [début, fin), (K, 2)
+    pas : int
+        espacement des échantillons [échantillons]
+
+    Returns
+    -------
+    echantillons : np.ndarray
+        échantillons retenus, triés (M,)
+
+    """
+    debuts = intervalles[:, 0]
+    nombres = (intervalles[:, 1] - debuts) // pas
+    total = int(nombres.sum())
+    # Rang de chaque échantillon dans son intervalle
+    rangs = np.arange(total) - np.repeat(np.cumsum(nombres) - nombres, nombres)
+    return np.repeat(debuts, nombres) + (rangs + 1) * pas - 1
+
+
+class DetecteurZUPT:
+    r"""Détecteur d'immobilité sur les incréments de la centrale
+
+    Parameters
+    ----------
+    ivx, ivy, ivz : np.ndarray
+        incréments de vitesse [m/s] (N,) ou (1, N)
+    iax, iay, iaz : np.ndarray
+        incréments d'angle [rad] (N,) ou (1, N)
+    dt : float
+        période d'échantillonnage des incréments [s]
+
+    """
+
+    def __init__(self, ivx, ivy, ivz, iax, iay, iaz, dt: float = DT):
+        acc = np.sqrt(sum(np.ravel(tab).astype(float) ** 2 for tab in (ivx, ivy, ivz))) / dt
+        gyro = np.sqrt(sum(np.ravel(tab).astype(float) ** 2 for tab in (iax, iay, iaz))) / dt
+        # Norme de la force spécifique centrée sur g : les sommes cumulées des
+        # carrés restent petites et la variance ne perd pas de chiffres
+        ecart = acc - G
+        self.n = len(ecart)
+        self._c_acc = _sommes_cumulees(ecart)
+        self._c_acc2 = _sommes_cumulees(ecart * ecart)
+        self._c_gyro = _sommes_cumulees(gyro)
+        self._statistiques = {}
+
+    def statistiques(self, fenetre: int):
+        r"""Statistiques glissantes sur une fenêtre centrée (tronquée aux bords)
+
+        Parameters
+        ----------
+        fenetre : int
+            longueur de la fenêtre [échantillons]
+
+        Returns
+        -------
+        ecart_acc : np.ndarray
+            norme moyenne de la force spécifique moins g [m/s^2] (N,)
+        var_acc : np.ndarray
+            variance de la norme de la force spécifique [(m/s^2)^2] (N,)
+        gyro : np.ndarray
+            norme moyenne de la vitesse angulaire [rad/s] (N,)
+
+        """
+        if fenetre not in self._statistiques:
+            i = np.arange(self.n)
+            bas = np.maximum(i - fenetre // 2, 0)
+            haut = np.minimum(bas + fenetre, self.n)
+            nb = haut - bas
+            moy = (self._c_acc[haut] - self._c_acc[bas]) / nb
+            moy2 = (self._c_acc2[haut] - self._c_acc2[bas]) / nb
+            gyro = (self._c_gyro[haut] - self._c_gyro[bas]) / nb
+            self._statistiques[fenetre] = (moy, np.maximum(moy2 - moy * moy, 0.0), gyro)
+        return self._statistiques[fenetre]
+
+    def masque(self, reglages: ReglagesZUPT = None):
+        """Masque (N,) des échantillons immobiles"""
+        reglages = reglages or ReglagesZUPT()
+        ecart_acc, var_acc, gyro = self.statistiques(reglages.fenetre)
+        return (
+            (np.abs(ecart_acc) < reglages.seuil_acc)
+            & (var_acc < reglages.seuil_var_acc)
+            & (gyro < reglages.seuil_gyro)
+        )
+
+    def intervalles(self, reglages: ReglagesZUPT = None):
+        r"""Intervalles d'immobilité
+
+        Parameters
+        ----------
+        reglages : ReglagesZUPT
+            fenêtre et seuils (valeurs par défaut si None)
+
+        Returns
+        -------
+        intervalles : np.ndarray
+            débuts et fins (exclues) des intervalles immobiles, (K, 2)
+
+        """
+        reglages = reglages or ReglagesZUPT()
+        return intervalles_masque(self.masque(reglages), reglages.duree_min)
@@ -0,0 +1,462 @@
+"""
+Description
+-----------
+
+Export statique (PNG, SVG, PDF) des figures de trace_figures.py par
+matplotlib (moteur Agg), sans navigateur, pour les traitements par lots.
+
+Les fonctions trace_* construisent toujours leurs figures plotly (courbes déjà
+décimées par trace_serie) ; chaque figure est ensuite réduite à une
+description légère (courbes, axes placés selon leurs domaines, titres,
+images de fond) dessinée par matplotlib dans des processus séparés :
+
+   - les courbes sont des LineCollection rastérisées (une seule image par
+     courbe dans les fichiers vectoriels SVG / PDF) ;
+   - chaque processus dessine ses figures avec une matplotlib.figure.Figure
+     et un canevas Agg, sans l'état global de pyplot.
+
+Fonctions Disponibles :
+
+   - description_figure : description d'une figure plotly, transmissible à un processus
+   - rendre_figure : dessin d'une description et écriture de ses fichiers
+   - exporter_figures : export en parallèle d'une liste de figures
+   - constructeurs_essai : constructeurs des figures de trace_figures.py d'un essai
+   - figures_essai : toutes les figures de trace_figures.py d'un essai
+   - fichiers_essai : fichiers et carte de fond d'un essai
+   - exporter_essais : export des figures de plusieurs essais
+
+Utilisation :
+
+    python export_statique.py
+    python export_statique.py --traj boucle aller --formats png svg --workers 4
+
+--------------------------------
+"""
+
+import argparse
+import base64
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+# Largeur des figures [pouces] et résolution par défaut [points par pouce]
+LARGEUR_POUCES = 12.0
+DPI = 100
+# Hauteur des figures plotly sans hauteur explicite [pixels]
+HAUTEUR_DEFAUT_PX = 450
+# Bords gauche et droit de la zone des axes [fraction de la largeur]
+MARGES_X = (0.08, 0.82)
+# Marges basse et haute de la zone des axes [pixels]
+MARGES_Y_PX = (50, 50)
+
+
+def _axe_layout(reference: str, lettre: str):
+    """Nom de l'axe de layout correspondant à une référence de courbe ('x', 'x2', ...)"""
+    return f"{lettre}axis{reference[1:]}"
+
+
+def _texte(texte):
+    """Texte plotly pour matplotlib : retours à la ligne <br> convertis"""
+    return texte.replace("<br>", "\n") if texte else texte
+
+
+def description_figure(fig):
+    r"""Description d'une figure plotly utile à son dessin par matplotlib
+
+    Parameters
+    ----------
+    fig : go.Figure
+        figure construite par une fonction trace_*
+
+    Returns
+    -------
+    description : dict
+        courbes (tableaux numpy), axes, titres, annotations et images de fond ;
+        ne contient que des types simples et peut être envoyée à un processus
+
+    """
+    layout = fig.layout
+    courbes = []
+    axes = {}
+    for trace in fig.data:
+        ref_x, ref_y = trace.xaxis or "x", trace.yaxis or "y"
+        courbes.append(
+            {
+                "x": np.asarray(trace.x, dtype=float),
+                "y": np.asarray(trace.y, dtype=float),
+                "nom": trace.name,
+                "couleur": trace.line.color if trace.line is not None else None,
+                "marqueurs": "markers" in (trace.mode or "lines") and "lines" not in (trace.mode or "lines"),
+                "axes": (ref_x, ref_y),
+            }
+        )
+        if (ref_x, ref_y) not in axes:
+            ax_x = layout[_axe_layout(ref_x, "x")]
+            ax_y = layout[_axe_layout(ref_y, "y")]
+            axes[ref_x, ref_y] = {
+                "domaine_x": tuple(ax_x.domain or (0, 1)),
+                "domaine_y": tuple(ax_y.domain or (0, 1)),
+                "titre_x": _texte(ax_x.title.text),
+                "titre_y": _texte(ax_y.title.text),
+                "plage_x": tuple(ax_x.range) if ax_x.range is not None else None,
+                "plage_y": tuple(ax_y.range) if ax_y.range is not None else None,
+                "graduations_x": ax_x.showticklabels is not False,
+            }
+    images = []
+    for image in layout.images or ():
+        source = image.source
+        if isinstance(source, str) and source.startswith("data:"):
+            contenu = base64.b64decode(source.split(",", 1)[1])
+        else:
+            contenu = Path(str(source)).read_bytes()
+        images.append(
+            {
+                "contenu": contenu,
+                "etendue": (image.x, image.x + image.sizex, image.y - image.sizey, image.y),
+                "axes": ((image.xref or "x"), (image.yref or "y")),
+            }
+        )
+    return {
+        "titre": _texte(layout.title.text),
+        "hauteur_px": layout.height or HAUTEUR_DEFAUT_PX,
+        "courbes": courbes,
+        "axes": axes,
+        "annotations": [(_texte(a.text), a.x, a.y) for a in layout.annotations or ()],
+        "images": images,
+    }
+
+
+def _segments(x, y):
+    """Morceaux (K, 2) de la courbe entre les valeurs nan"""
+    points = np.column_stack((x, y))
+    valide = np.isfinite(points).all(axis=1)
+    coupures = np.flatnonzero(np.diff(valide.astype(np.int8))) + 1
+    return [
+        morceau for morceau, ok in zip(np.split(points, coupures), np.split(valide, coupures))
+        if ok[0] and len(morceau) > 1
+    ]
+
+
+def rendre_figure(description: dict, chemin_base, formats=("png",), dpi: int = DPI):
+    r"""Dessine une description de figure avec le moteur Agg et écrit ses fichiers
+
+    Parameters
+    ----------
+    description : dict
+        description construite par description_figure
+    chemin_base : str or Path
+        chemin des fichiers sans extension
+    formats : tuple of str
+        extensions des fichiers écrits ('png', 'svg', 'pdf', ...)
+    dpi : int
+        résolution des fichiers matriciels et des courbes rastérisées
+
+    Returns
+    -------
+    chemins : list of Path
+        fichiers écrits
+
+    """
+    # Import local : seuls les processus de dessin chargent matplotlib
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+    from PIL import Image
+
+    gauche, droite = MARGES_X
+    bas = MARGES_Y_PX[0] / description["hauteur_px"]
+    haut = 1 - MARGES_Y_PX[1] / description["hauteur_px"]
+    fig = Figure(figsize=(LARGEUR_POUCES, description["hauteur_px"] / DPI))
+    FigureCanvasAgg(fig)
+    axes = {}
+    for cle, ax_desc in description["axes"].items():
+        (x0, x1), (y0, y1) = ax_desc["domaine_x"], ax_desc["domaine_y"]
+        ax = fig.add_axes(
+            (
+                gauche + x0 * (droite - gauche),
+                bas + y0 * (haut - bas),
+                (x1 - x0) * (droite - gauche),
+                (y1 - y0) * (haut - bas),
+            )
+        )
+        ax.set_xlabel(ax_desc["titre_x"] or "")
+        ax.set_ylabel(ax_desc["titre_y"] or "")
+        ax.tick_params(labelbottom=ax_desc["graduations_x"])
+        ax.grid(True, alpha=0.3)
+        axes[cle] = ax
+
+    cycle = [c["color"] for c in matplotlib.rcParams["axes.prop_cycle"]]
+    for k, courbe in enumerate(description["courbes"]):
+        ax = axes[courbe["axes"]]
+        couleur = courbe["couleur"] or cycle[k % len(cycle)]
+        if courbe["marqueurs"]:
+            ax.scatter(courbe["x"], courbe["y"], s=4, color=couleur, label=courbe["nom"], rasterized=True)
+        else:
+            collection = LineCollection(
+                _segments(courbe["x"], courbe["y"]), colors=couleur, linewidths=1.0,
+                label=courbe["nom"], rasterized=True,
+            )
+            ax.add_collection(collection)
+    for cle, ax in axes.items():
+        ax.autoscale_view()
+        ax_desc = description["axes"][cle]
+        if ax_desc["plage_x"] is not None:
+            ax.set_xlim(*ax_desc["plage_x"])
+        if ax_desc["plage_y"] is not None:
+            ax.set_ylim(*ax_desc["plage_y"])
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(loc="upper left", bbox_to_anchor=(1.01, 1.0), fontsize="small")
+    for image in description["images"]:
+        ax = axes.get(image["axes"])
+        if ax is not None:
+            with Image.open(io.BytesIO(image["contenu"])) as fond:
+                tableau = np.asarray(fond.convert("RGB"))
+            ax.imshow(tableau, extent=image["etendue"], aspect="auto", zorder=0)
+    for texte, x, y in description["annotations"]:
+        fig.text(gauche + x * (droite - gauche), bas + y * (haut - bas), texte, ha="center", va="bottom")
+    if description["titre"]:
+        fig.suptitle(description["titre"])
+
+    chemins = []
+    Path(chemin_base).parent.mkdir(parents=True, exist_ok=True)
+    for extension in formats:
+        chemin = Path(f"{chemin_base}.{extension}")
+        fig.savefig(chemin, dpi=dpi)
+        chemins.append(chemin)
+    return chemins
+
+
+def exporter_figures(figures, rep_sortie, formats=("png",), processus: int = None, dpi: int = DPI):
+    r"""Exporte des figures plotly en fichiers statiques, dessinés en parallèle
+
+    Parameters
+    ----------
+    figures : iterable of (str, go.Figure)
+        nom de fichier (sans extension) et figure ; les figures None sont ignorées
+    rep_sortie : str or Path
+        dossier d'écriture
+    formats : tuple of str
+        extensions des fichiers écrits
+    processus : int
+        nombre de processus de dessin (nombre de coeurs par défaut, 1 : dessin
+        dans le processus courant)
+    dpi : int
+        résolution
+
+    Returns
+    -------
+    chemins : list of Path
+        fichiers écrits, dans l'ordre des figures
+
+    """
+    rep_sortie = Path(rep_sortie)
+    rep_sortie.mkdir(parents=True, exist_ok=True)
+    taches = [
+        (description_figure(fig), rep_sortie / nom, tuple(formats), dpi)
+        for nom, fig in figures if fig is not None
+    ]
+    processus = min(processus or os.cpu_count() or 1, max(len(taches), 1))
+    if processus == 1:
+        resultats = [rendre_figure(*tache) for tache in taches]
+    else:
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            resultats = list(pool.map(rendre_figure, *zip(*taches)))
+    return [chemin for chemins in resultats for chemin in chemins]
+
+
+def constructeurs_essai(calcule, reference, carte: str = None, budget: int = None):
+    r"""Constructeurs des figures de trace_figures.py pour un essai
+
+    Chaque figure n'est construite qu'à l'appel de son constructeur (les
+    erreurs, calculées par analyse_erreurs.calculer_erreurs, une seule fois
+    pour toutes les figures d'erreurs). Ces erreurs sont celles des fonctions
+    calcul_erreurs_* de trace_figures.py (référence moins calculé, mêmes
+    valeurs à cadence identique) : les figures exportées sont celles de
+    MAIN_trace_nav. Les figures GNSS et VOR/DME ne sont proposées que si
+    leurs variables sont présentes.
+
+    Parameters
+    ----------
+    calcule : Mapping
+        contenu de Nav_calculee_etudiants_modifiable*.mat (ex: lu par charger_mat)
+    reference : Mapping
+        contenu de Nav_reference_*.mat
+    carte : str
+        carte de fond ('Pontoise' ou 'Fecamp'), pas de figure 2D si None
+    budget : int
+        nombre maximal de points par courbe (trace_figures.BUDGET_POINTS si None)
+
+    Returns
+    -------
+    constructeurs : dict
+        nom de fichier -> fonction sans argument renvoyant la figure
+
+    """
+    import trace_figures as tf
+    from analyse_erreurs import calculer_erreurs
+
+    def ligne(tab):
+        return np.asarray(tab, dtype=float).reshape(1, -1)
+
+    @lru_cache(maxsize=None)
+    def erreurs():
+        err = calculer_erreurs(calcule["temps_s"], calcule, reference)
+        return {nom: ligne(valeur) for nom, valeur in vars(err).items()}
+
+    def t():
+        return ligne(calcule["temps_s"])
+
+    constructeurs = {}
+    trace_carte = {"Pontoise": tf.trace_figure_nav_pontoise, "Fecamp": tf.trace_figure_nav_fecamp}.get(carte)
+    if trace_carte is not None:
+        constructeurs["Trace_nav_2D"] = lambda: trace_carte(
+            ligne(calcule["Lon_calculee_deg"]), ligne(calcule["Lat_calculee_deg"]),
+            ligne(reference["longitude_ins"]), ligne(reference["latitude_ins"]),
+            rep_sortie=None, afficher=False, budget=budget,
+        )
+    constructeurs.update({
+        "Erreurs_de_position": lambda: tf.trace_erreurs_position(
+            *(erreurs()[nom] for nom in ("temps_s", "est_m", "nord_m", "alt_m")), budget=budget),
+        "Vitesses_geographiques": lambda: tf.trace_figure_vitesses(
+            t(), ligne(calcule["Vn_calculee_ms"]), ligne(calcule["Vw_calculee_ms"]), ligne(calcule["Vz_calculee_ms"]),
+            budget=budget),
+        "Erreurs_de_vitesse": lambda: tf.trace_erreurs_vitesse(
+            *(erreurs()[nom] for nom in ("temps_s", "vn_ms", "vw_ms", "vz_ms")), budget=budget),
+        "Attitudes": lambda: tf.trace_figure_attitudes(
+            t(), ligne(calcule["Cap_calcule_rad"]), ligne(calcule["Roulis_calcule_rad"]),
+            ligne(calcule["Tangage_calcule_rad"]), budget=budget),
+        "Erreurs_d_attitudes": lambda: tf.trace_erreurs_attitude(
+            *(erreurs()[nom] for nom in ("temps_s", "cap_mrad", "roulis_mrad", "tangage_mrad")),
+            budget=budget),
+        "Increments": lambda: tf.trace_increments(
+            t(), *(ligne(calcule[f"Inc_{g}_{a}m"]) for g in ("Vit", "Ang") for a in "XYZ"), budget=budget),
+    })
+    if all(nom in calcule for nom in ("Lat_gnss", "Lon_gnss", "Alt_gnss")):
+        constructeurs["Positions_GNSS"] = lambda: tf.trace_positions_gnss(
+            t(), ligne(calcule["Lat_gnss"]), ligne(calcule["Lon_gnss"]), ligne(calcule["Alt_gnss"]),
+            ligne(reference["latitude_ins"]), ligne(reference["longitude_ins"]), ligne(reference["altitude_ins"]),
+            budget=budget)
+    noms_vordme = [f"{mesure}_{balise}" for balise in ("bvs", "dvl", "pon", "rou") for mesure in ("vor", "dme")]
+    if all(nom in calcule for nom in noms_vordme):
+        constructeurs["Donnees_VORDME"] = lambda: tf.trace_data_vordme(
+            t(), *(ligne(calcule[nom]) for nom in noms_vordme), budget=budget)
+        constructeurs["Positions_VORDME"] = lambda: tf.trace_positions_vordme(
+            t(), ligne(reference["latitude_ins"]), ligne(reference["longitude_ins"]),
+            ligne(reference["altitude_ins"]), *(ligne(calcule[nom]) for nom in noms_vordme),
+            budget=budget)
+    return constructeurs
+
+
+def figures_essai(calcule, reference, carte: str = None):
+    r"""Construit toutes les figures de trace_figures.py pour un essai
+
+    Parameters
+    ----------
+    calcule, reference, carte :
+        voir constructeurs_essai
+
+    Returns
+    -------
+    figures : list of (str, go.Figure)
+        nom de fichier et figure
+
+    """
+    return [(nom, construire()) for nom, construire in constructeurs_essai(calcule, reference, carte).items()]
+
+
+def fichiers_essai(traj: str, rep_entree=Path("."), suffixe: str = ""):
+    r"""Fichiers d'un essai et carte de fond associée
+
+    Parameters
+    ----------
+    traj : str
+        essai (clé de corres_traj_chemin)
+    rep_entree : Path
+        dossier des fichiers Nav_calculee_etudiants_modifiable<suffixe>.mat
+    suffixe : str
+        suffixe des fichiers de navigation calculée ; '{traj}' y est remplacé
+        par l'essai (ex: '_gps_{traj}' pour les fichiers de MAIN_lancer_essais.py)
+
+    Returns
+    -------
+    chemin_calcule : Path
+        fichier de la navigation calculée
+    chemin_reference : Path
+        fichier de la navigation de référence
+    carte : str
+        carte de fond ('Pontoise' ou 'Fecamp')
+
+    """
+    from Lecture_donnees import corres_traj_chemin, def_map
+
+    nom_reference = f"Nav_reference_{corres_traj_chemin[traj]}.mat"
+    return (
+        Path(rep_entree) / f"Nav_calculee_etudiants_modifiable{suffixe.format(traj=traj)}.mat",
+        Path(__file__).parent / "02-Navigations_parfaites" / nom_reference,
+        def_map(nom_reference),
+    )
+
+
+def exporter_essais(trajectoires=None, rep_entree=Path("."), rep_sortie=Path("Figures"),
+                    suffixe: str = "", formats=("png",), processus: int = None):
+    r"""Exporte les figures de plusieurs essais en une seule passe parallèle
+
+    Parameters
+    ----------
+    trajectoires : list of str
+        essais (clés de corres_traj_chemin), tous par défaut
+    rep_entree : Path
+        dossier des fichiers Nav_calculee_etudiants_modifiable<suffixe>.mat
+    rep_sortie : Path
+        dossier d'écriture, un sous-dossier par essai
+    suffixe : str
+        suffixe des fichiers de navigation calculée (voir fichiers_essai)
+    formats : tuple of str
+        extensions des fichiers écrits
+    processus : int
+        nombre de processus de dessin
+
+    Returns
+    -------
+    chemins : list of Path
+        fichiers écrits
+
+    """
+    from cache_mat import charger_mat
+    from Lecture_donnees import corres_traj_chemin
+
+    figures = []
+    for traj in trajectoires or corres_traj_chemin:
+        chemin_calcule, chemin_reference, carte = fichiers_essai(traj, rep_entree, suffixe)
+        if not (chemin_calcule.exists() and chemin_reference.exists()):
+            print(f"  {traj:<12}fichiers absents, essai ignoré")
+            continue
+        calcule, reference = charger_mat(chemin_calcule), charger_mat(chemin_reference)
+        figures += [
+            (f"{traj}/{nom}", fig)
+            for nom, fig in figures_essai(calcule, reference, carte)
+        ]
+    return exporter_figures(figures, rep_sortie, formats, processus)
+
+
+if __name__ == "__main__":
+    from Lecture_donnees import corres_traj_chemin
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--traj", nargs="+", choices=list(corres_traj_chemin))
+    parser.add_argument("--entree", type=Path, default=Path("."), help="dossier des navigations calculées")
+    parser.add_argument("--sortie", type=Path, default=Path("Figures"), help="dossier de sortie")
+    parser.add_argument("--suffixe", default="", help="suffixe des fichiers calculés, ex: '_gps_{traj}'")
+    parser.add_argument("--formats", nargs="+", default=["png"])
+    parser.add_argument("--workers", type=int, help="nombre de processus")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    chemins = exporter_essais(args.traj, args.entree, args.sortie, args.suffixe, args.formats, args.workers)
+    print(f"{len(chemins)} fichiers écrits en {time.perf_counter() - debut:.1f} s")
@@ -0,0 +1,602 @@
+"""
+Description
+-----------
+
+Filtre de Kalman à état d'erreur (15 états) des hybridations 'gps', 'odo',
+'zupt' et 'vordme'. La navigation inertielle reste calculée par
+noyau_nav.integrer_nav d'une mesure à la suivante ; à chaque mesure, l'erreur
+estimée est réinjectée dans la navigation (boucle fermée) et les biais estimés
+sont retranchés des incréments suivants.
+
+États d'erreur (valeur calculée moins valeur vraie) :
+
+   - 0:3   position [m] (nord, est, haut)
+   - 3:6   vitesse [m/s], composantes de la vitesse géographique de la navigation
+   - 6:9   attitude psi [rad], repère géographique
+   - 9:12  biais accéléro [m/s^2], repère porteur
+   - 12:15 dérive gyro [rad/s], repère porteur
+
+Le modèle d'erreur linéarise la mécanisation de noyau_nav telle qu'elle est
+écrite : t_g_t y est intégrée à chaque pas sans dt et les incréments d'angle
+y sont multipliés par dt, d'où les facteurs 1 / DT du couplage
+position / vitesse et DT du couplage attitude / dérive. L'altitude n'étant pas
+entretenue par la mécanisation, seules des mesures horizontales sont utilisées.
+
+Calcul : matrices préallouées, propagation P <- Phi P Phi^T + Q limitée aux
+blocs non nuls de F, index des événements de mesure construit avant la
+boucle (ordonnanceur_mesures.py), mises à jour scalaires séquentielles (aucune
+inversion) et, si demandé, propagation de la covariance à cadence réduite
+(cadence_cov).
+
+Classes Disponibles :
+
+   - class ParametresFiltre
+   - class FiltreKalman
+
+Fonctions Disponibles :
+
+   - integrer_hybride : navigation hybridée sur les tableaux (N,) de calcul_nav
+   - reglages_odometre : réglages du prétraitement odomètre utilisé par le filtre
+   - mesurer_covariance : nombre de propagations de covariance par seconde
+
+--------------------------------
+"""
+
+import math
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+import tqdm
+
+from detection_zupt import DetecteurZUPT, ReglagesZUPT, echantillons_intervalles
+from functions import compute_t_g_b
+from geodesie import BALISES, DEG2RAD, RAD2DEG, RT
+from Gerer_donnees import CANAUX_ESTIMATION, CANAUX_SIGMA, NavInput
+from noyau_nav import DT, G, EtatNav, integrer_nav
+from odometre import OdometrePretraite, ParametresOdometre, odometre_donnees
+from ordonnanceur_mesures import SourceMesure, construire_index
+
+# Hybridations disponibles
+HYBRIDATIONS = ("gps", "odo", "zupt", "vordme")
+
+# Nombre d'états d'erreur et tranches de l'état
+N_ETATS = 15
+_P, _V, _A, _BA, _BG = slice(0, 3), slice(3, 6), slice(6, 9), slice(9, 12), slice(12, 15)
+
+# La mécanisation multiplie les incréments d'angle par dt : une dérive gyro
+# b_g [rad/s] produit une erreur d'attitude de b_g * DT par seconde
+FACTEUR_GYRO = DT
+
+
+@dataclass
+class ParametresFiltre:
+    """Réglages du filtre : incertitudes initiales, bruits de modèle et de mesure"""
+
+    sigma_pos_init_m: float = 10.0
+    """Écart-type initial de position [m]"""
+    sigma_vit_init_ms: float = 0.5
+    """Écart-type initial de vitesse [m/s]"""
+    sigma_att_init_rad: float = 1e-2
+    """Écart-type initial d'attitude [rad]"""
+    sigma_bacc_init: float = 1e-2
+    """Écart-type initial des biais accéléro [m/s^2]"""
+    sigma_dgyr_init: float = 1e-4
+    """Écart-type initial des dérives gyro [rad/s]"""
+    bruit_acc: float = 1e-2
+    """Bruit blanc accéléro [m/s/sqrt(s)]"""
+    bruit_gyro: float = 1e-4
+    """Bruit blanc gyro [rad/sqrt(s)]"""
+    marche_bacc: float = 1e-4
+    """Marche aléatoire des biais accéléro [m/s^2/sqrt(s)]"""
+    marche_dgyr: float = 1e-6
+    """Marche aléatoire des dérives gyro [rad/s/sqrt(s)]"""
+    sigma_gnss_m: float = 5.0
+    """Écart-type des positions GNSS horizontales [m]"""
+    nsat_min: int = 4
+    """Nombre minimal de satellites d'une position GNSS valide"""
+    sigma_odo_ms: float = 0.1
+    """Écart-type de la vitesse odomètre [m/s]"""
+    sigma_nhc_ms: float = 0.1
+    """Écart-type de la contrainte de vitesse latérale nulle [m/s]"""
+    pas_odo: int = 10
+    """Nombre de pas entre deux mesures odomètre (et fenêtre de calcul de leur vitesse)"""
+    odometre: ParametresOdometre = None
+    """Réglages du prétraitement odomètre (valeurs par défaut si None)"""
+    sigma_zupt_ms: float = 0.01
+    """Écart-type des mises à jour de vitesse nulle [m/s]"""
+    pas_zupt: int = 10
+    """Nombre de pas entre deux mises à jour de vitesse nulle"""
+    seuil_zupt_gyro: float = 5e-3
+    """Seuil de vitesse angulaire d'immobilité [rad/s]"""
+    seuil_zupt_acc: float = 0.2
+    """Seuil d'écart entre la norme de la force spécifique et g [m/s^2]"""
+    seuil_zupt_var_acc: float = 0.05
+    """Seuil de variance de la norme de la force spécifique [(m/s^2)^2]"""
+    fenetre_zupt: int = 10
+    """Fenêtre glissante du détecteur d'immobilité [pas]"""
+    sigma_dme_m: float = 200.0
+    """Écart-type des distances DME [m]"""
+    sigma_vor_deg: float = 1.0
+    """Écart-type des relèvements VOR [deg]"""
+    pas_vordme: int = 100
+    """Nombre de pas entre deux mesures VOR/DME"""
+    latence_gnss_s: float = 0.0
+    """Retard des positions GNSS sur leur horodatage [s]"""
+    latence_odo_s: float = 0.0
+    """Retard de la vitesse odomètre [s]"""
+    latence_vordme_s: float = 0.0
+    """Retard des mesures VOR/DME [s]"""
+    cadence_cov: int = 1
+    """Nombre de pas entre deux propagations de la covariance"""
+    pas_historique: int = 100
+    """Nombre de pas minimal entre deux écarts-types mémorisés hors mesures"""
+
+
+def _antisym(u):
+    """Matrice du produit vectoriel par u (3,)"""
+    return np.array([[0.0, -u[2], u[1]], [u[2], 0.0, -u[0]], [-u[1], u[0], 0.0]])
+
+
+def _couplage_position(lat: float):
+    r"""Dérivée de l'erreur de position [m/s] par rapport à l'erreur de vitesse
+
+    Un pas de la mécanisation fait avancer la latitude de vx / Rt et la
+    longitude de -vy * sin(lat) / Rt (latitude du pas lue avant écriture).
+    """
+    d = np.zeros((3, 3))
+    d[0, 0] = 1.0 / DT
+    d[1, 1] = -math.sin(lat) * math.cos(lat) / DT
+    return d
+
+
+class FiltreKalman:
+    r"""État d'erreur et covariance, propagation par blocs et mises à jour scalaires
+
+    Parameters
+    ----------
+    params : ParametresFiltre
+        réglages du filtre
+
+    """
+
+    def __init__(self, params: ParametresFiltre):
+        self.params = params
+        self.x = np.zeros(N_ETATS)
+        sigma_init = [
+            params.sigma_pos_init_m,
+            params.sigma_vit_init_ms,
+            params.sigma_att_init_rad,
+            params.sigma_bacc_init,
+            params.sigma_dgyr_init,
+        ]
+        self.P = np.diag(np.repeat(sigma_init, 3) ** 2)
+        # Densité spectrale du bruit de modèle (diagonale)
+        self._q = np.repeat(
+            [
+                0.0,
+                params.bruit_acc**2,
+                (params.bruit_gyro * FACTEUR_GYRO) ** 2,
+                params.marche_bacc**2,
+                params.marche_dgyr**2,
+            ],
+            3,
+        )
+        # Tampons préalloués de la propagation
+        self._fp = np.zeros((9, N_ETATS))
+        self._fpf = np.zeros((9, 9))
+        self._diag = np.diag_indices(N_ETATS)
+
+    def propager(self, c_g_b: np.ndarray, f_g: np.ndarray, lat: float, dt: float):
+        r"""Propage la covariance sur dt : P <- Phi P Phi^T + Q dt, Phi = I + F dt
+
+        Seuls les blocs non nuls de F interviennent : F_pv (couplage de
+        position), F_vpsi = [f_g x], F_vba = t_g_b et F_psibg = -t_g_b * FACTEUR_GYRO.
+
+        Parameters
+        ----------
+        c_g_b : np.ndarray
+            matrice t_g_b au début de l'intervalle, de dimension (3, 3)
+        f_g : np.ndarray
+            force spécifique moyenne dans le repère géographique [m/s^2], (3,)
+        lat : float
+            latitude [rad]
+        dt : float
+            durée de l'intervalle [s]
+
+        """
+        P, fp, fpf = self.P, self._fp, self._fpf
+        d = _couplage_position(lat)
+        s = _antisym(f_g)
+        g = -FACTEUR_GYRO * c_g_b
+        # F P : seules les lignes position, vitesse et attitude de F sont non nulles
+        np.matmul(d, P[_V], out=fp[0:3])
+        np.matmul(s, P[_A], out=fp[3:6])
+        fp[3:6] += c_g_b @ P[_BA]
+        np.matmul(g, P[_BG], out=fp[6:9])
+        # (F P) F^T, bloc 9 x 9
+        np.matmul(fp[:, _V], d.T, out=fpf[:, 0:3])
+        np.matmul(fp[:, _A], s.T, out=fpf[:, 3:6])
+        fpf[:, 3:6] += fp[:, _BA] @ c_g_b.T
+        np.matmul(fp[:, _BG], g.T, out=fpf[:, 6:9])
+        P[:9] += dt * fp
+        P[:, :9] += dt * fp.T
+        P[:9, :9] += (dt * dt) * fpf
+        P[self._diag] += self._q * dt
+
+    def mise_a_jour(self, indices, h: np.ndarray, residu: float, variance: float):
+        r"""Mise à jour scalaire par une mesure d'erreur z = h . x[indices] + bruit
+
+        Parameters
+        ----------
+        indices : list of int
+            états observés par la mesure (h creux)
+        h : np.ndarray
+            coefficients de la mesure sur ces états
+        residu : float
+            mesure prédite par la navigation moins mesure reçue
+        variance : float
+            variance du bruit de mesure
+
+        Returns
+        -------
+        innovation : float
+            innovation de la mesure
+
+        """
+        ph = self.P[:, indices] @ h
+        s = h @ ph[indices] + variance
+        innovation = residu - h @ self.x[indices]
+        k = ph / s
+        self.x += k * innovation
+        self.P -= np.outer(k, ph)
+        return innovation
+
+    def injecter(self, etat: EtatNav, sorties, t: int, biais: np.ndarray):
+        r"""Corrige la navigation au pas t de l'erreur estimée puis remet l'état à zéro
+
+        Parameters
+        ----------
+        etat : EtatNav
+            état de l'intégrateur (t_b_g et vitesse), corrigé en place
+        sorties : tuple of np.ndarray
+            lat, lon, cap, rou, tan, vxm, vym, vzm de dimension (N,)
+        t : int
+            pas corrigé
+        biais : np.ndarray
+            biais accéléro et dérives gyro estimés (6,), complétés en place
+
+        """
+        lat, lon, cap, rou, tan, vxm, vym, vzm = sorties
+        x = self.x
+        lat[t] -= x[0] / RT
+        lon[t] -= x[1] / (RT * math.cos(lat[t]))
+        etat.v_geo -= x[_V]
+        vxm[t], vym[t], vzm[t] = etat.v_geo
+        etat.t_b_g[...] = etat.t_b_g @ (np.eye(3) - _antisym(x[_A]))
+        cap[t], rou[t], tan[t] = _extraire_angles(etat.t_b_g)
+        biais += x[9:]
+        x[:] = 0.0
+
+    def ecarts_types(self, c_g_b: np.ndarray):
+        r"""Écarts-types des 15 états, roulis et tangage exprimés dans le repère porteur
+
+        Parameters
+        ----------
+        c_g_b : np.ndarray
+            matrice t_g_b courante, de dimension (3, 3)
+
+        Returns
+        -------
+        sigma : np.ndarray
+            écarts-types (15,) ; les états 6, 7, 8 sont le roulis, le tangage et le cap
+
+        """
+        sigma = np.sqrt(np.maximum(np.diag(self.P), 0.0))
+        p_att = self.P[_A, _A]
+        c_b_g = c_g_b.T
+        var_porteur = np.einsum("ij,jk,ik->i", c_b_g, p_att, c_b_g)
+        sigma[6:8] = np.sqrt(np.maximum(var_porteur[:2], 0.0))
+        sigma[8] = math.sqrt(max(p_att[2, 2], 0.0))
+        return sigma
+
+
+def _extraire_angles(b: np.ndarray):
+    """Cap, roulis, tangage de t_b_g, comme extract_h_r_p (arguments bornés à [-1, 1])"""
+    tan = math.asin(min(1.0, max(-1.0, b[0, 2])))
+    c = math.cos(tan)
+    rou = math.asin(min(1.0, max(-1.0, -b[1, 2] / c)))
+    cap = math.acos(min(1.0, max(-1.0, b[0, 0] / c)))
+    return cap, rou, tan
+
+
+def _renseigne(tab, n: int):
+    """Vrai si le canal tab est présent, de taille n et non entièrement nul"""
+    tab = np.ravel(tab) if tab is not None else np.zeros(0)
+    return tab.size == n and bool(np.any(tab))
+
+
+def _position_mesuree(tab, t: int, avance: float, temps: np.ndarray):
+    """Valeur de tab à l'instant temps[t] - avance, interpolée entre t - 1 et t"""
+    return tab[t] - (tab[t] - tab[t - 1]) * avance / (temps[t] - temps[t - 1])
+
+
+def _mesures_gps(data_in: NavInput, temps: np.ndarray, params: ParametresFiltre):
+    """Source et mise à jour des positions GNSS valides"""
+    lat_gnss = np.ravel(data_in.lat_gnss).astype(float)
+    lon_gnss = np.ravel(data_in.lon_gnss).astype(float)
+    m = lat_gnss.size
+    # Sans horodatage propre, les positions sont échantillonnées sur temps_s
+    t_gnss = np.ravel(data_in.temps_gnss) if _renseigne(data_in.temps_gnss, m) else temps[:m]
+    valide = np.isfinite(lat_gnss) & np.isfinite(lon_gnss) & (lat_gnss != 0)
+    if _renseigne(data_in.val_gnss, m):
+        valide &= np.ravel(data_in.val_gnss) != 0
+    if _renseigne(data_in.nsat_gnss, m):
+        valide &= np.ravel(data_in.nsat_gnss) >= params.nsat_min
+    lat_m = lat_gnss * DEG2RAD
+    lon_m = lon_gnss * DEG2RAD
+    variance = params.sigma_gnss_m**2
+
+    def mettre_a_jour(filtre: FiltreKalman, j: int, avance: float, t: int, etat: EtatNav, lat, lon):
+        lat_t = _position_mesuree(lat, t, avance, temps)
+        lon_t = _position_mesuree(lon, t, avance, temps)
+        filtre.mise_a_jour([0], np.ones(1), (lat_t - lat_m[j]) * RT, variance)
+        filtre.mise_a_jour([1], np.ones(1), (lon_t - lon_m[j]) * RT * math.cos(lat_t), variance)
+
+    return [(SourceMesure("gnss", t_gnss, valide, params.latence_gnss_s), mettre_a_jour)]
+
+
+def reglages_odometre(params: ParametresFiltre):
+    """Réglages du prétraitement odomètre du filtre : vitesse sur une fenêtre de params.pas_odo pas"""
+    return replace(params.odometre or ParametresOdometre(), fenetre=params.pas_odo)
+
+
+def _mesures_odo(odometre: OdometrePretraite, temps: np.ndarray, params: ParametresFiltre):
+    """Source et mise à jour de la vitesse odomètre et de la contrainte latérale"""
+    pas = params.pas_odo
+    if odometre is None:
+        return []
+    idx = np.arange(pas, len(temps), pas)
+    vitesse = odometre.vitesse_ms[idx]
+    variances = (params.sigma_odo_ms**2, params.sigma_nhc_ms**2)
+
+    def mettre_a_jour(filtre: FiltreKalman, j: int, avance: float, t: int, etat: EtatNav, lat, lon):
+        # Vitesse horizontale dans le repère porteur : avant (odomètre) et latérale (nulle)
+        b = etat.t_b_g[:2, :2]
+        v = np.array([etat.v_geo[0], etat.v_geo[1], 0.0])
+        v_b = b @ v[:2]
+        h_psi = -(etat.t_b_g @ _antisym(v))[:2]
+        for i, residu in enumerate((v_b[0] - vitesse[j], v_b[1])):
+            filtre.mise_a_jour(
+                [3, 4, 6, 7, 8], np.concatenate((b[i], h_psi[i])), residu, variances[i]
+            )
+
+    source = SourceMesure("odo", temps[idx], odometre.valide[idx], params.latence_odo_s)
+    return [(source, mettre_a_jour)]
+
+
+def _mesures_zupt(entrees, temps: np.ndarray, params: ParametresFiltre):
+    """Source (tous les pas_zupt pas des intervalles d'immobilité) et mise à jour de vitesse nulle"""
+    reglages = ReglagesZUPT(
+        fenetre=params.fenetre_zupt,
+        seuil_acc=params.seuil_zupt_acc,
+        seuil_var_acc=params.seuil_zupt_var_acc,
+        seuil_gyro=params.seuil_zupt_gyro,
+        duree_min=params.pas_zupt,
+    )
+    intervalles = DetecteurZUPT(*entrees[:6]).intervalles(reglages)
+    idx = echantillons_intervalles(intervalles, params.pas_zupt)
+    variance = params.sigma_zupt_ms**2
+
+    def mettre_a_jour(filtre: FiltreKalman, j: int, avance: float, t: int, etat: EtatNav, lat, lon):
+        for i in range(2):
+            filtre.mise_a_jour([3 + i], np.ones(1), etat.v_geo[i], variance)
+
+    return [(SourceMesure("zupt", temps[idx]), mettre_a_jour)]
+
+
+def _mesures_vordme(data_in: NavInput, temps: np.ndarray, params: ParametresFiltre):
+    """Sources (une par balise) et mises à jour des distances DME et relèvements VOR"""
+    echantillons = np.arange(params.pas_vordme, len(temps), params.pas_vordme)
+    var_dme = params.sigma_dme_m**2
+    var_vor = (params.sigma_vor_deg * DEG2RAD) ** 2
+    sources = []
+    for nom, balise in BALISES.items():
+        vor = np.ravel(getattr(data_in, f"vor_{nom}"))
+        dme = np.ravel(getattr(data_in, f"dme_{nom}"))
+        if vor.size < len(temps) or dme.size < len(temps):
+            continue
+        vor_m = vor[echantillons] * DEG2RAD
+        dme_m = dme[echantillons]
+        valide = np.isfinite(vor_m) & np.isfinite(dme_m) & (dme_m > 0)
+
+        def mettre_a_jour(
+            filtre: FiltreKalman, j: int, avance: float, t: int, etat: EtatNav, lat, lon,
+            lat_b=balise.lat_rad, lon_b=balise.lon_rad, vor_m=vor_m, dme_m=dme_m,
+        ):
+            lat_t = _position_mesuree(lat, t, avance, temps)
+            lon_t = _position_mesuree(lon, t, avance, temps)
+            dn = (lat_t - lat_b) * RT
+            de = (lon_t - lon_b) * RT * math.cos(lat_t)
+            d2 = dn * dn + de * de
+            d = math.sqrt(d2)
+            filtre.mise_a_jour([0, 1], np.array([dn / d, de / d]), d - dme_m[j], var_dme)
+            # Relèvement du porteur vu de la balise, écart ramené dans [-pi, pi)
+            ecart = (math.atan2(de, dn) - vor_m[j] + np.pi) % (2 * np.pi) - np.pi
+            filtre.mise_a_jour([0, 1], np.array([-de / d2, dn / d2]), ecart, var_vor)
+
+        source = SourceMesure(f"vordme_{nom}", temps[echantillons], valide, params.latence_vordme_s)
+        sources.append((source, mettre_a_jour))
+    return sources
+
+
+def integrer_hybride(
+    etat: EtatNav, entrees, sorties, data_in: NavInput, hybridation,
+    params: ParametresFiltre = None, compile: bool = False, progression: bool = True,
+    odometre: OdometrePretraite = None,
+):
+    r"""Navigation hybridée par le filtre à état d'erreur, sur les tableaux (N,)
+
+    Les mesures de toutes les sources sont fusionnées avant la boucle en un
+    index d'événements (ordonnanceur_mesures.py). La navigation est intégrée
+    d'un événement au suivant avec les incréments corrigés des biais estimés,
+    la covariance est propagée tous les params.cadence_cov pas, puis les
+    mesures de l'échantillon sont traitées et l'erreur estimée réinjectée dans
+    la navigation.
+
+    Parameters
+    ----------
+    etat : EtatNav
+        état initial de l'intégrateur (attitude 'dcm'), mis à jour en place
+    entrees : tuple of np.ndarray
+        ivx, ivy, ivz, iax, iay, iaz, alt de dimension (N,)
+    sorties : tuple of np.ndarray
+        lat, lon, cap, rou, tan, vxm, vym, vzm de dimension (N,)
+    data_in : NavInput
+        structure d'entrée : mesures non inertielles lues ; ses champs
+        Sigma_*, Bacc_* et Dgyr_* sont alloués et remplis
+    hybridation : str or tuple of str
+        'gps', 'odo', 'zupt' ou 'vordme', ou plusieurs d'entre elles combinées
+    params : ParametresFiltre
+        réglages du filtre (valeurs par défaut si None)
+    compile : bool
+        noyau de navigation compilé par numba
+    progression : bool
+        affichage d'une barre de progression
+    odometre : OdometrePretraite
+        odomètre de data_in prétraité avec reglages_odometre(params) ; s'il
+        est None et que l'hybridation 'odo' est demandée, il est calculé ici
+
+    Returns
+    -------
+    filtre : FiltreKalman
+        filtre dans son état final
+
+    """
+    hybridations = (hybridation,) if isinstance(hybridation, str) else tuple(hybridation)
+    for hyb in hybridations:
+        if hyb not in HYBRIDATIONS:
+            raise ValueError(f"hybridation inconnue : {hyb!r}, choix disponibles : {HYBRIDATIONS}")
+    params = params or ParametresFiltre()
+    temps = np.ravel(data_in.temps_s)
+    lat, lon, cap, rou, tan = sorties[:5]
+    n = len(lat)
+    mesures = []
+    for hyb in hybridations:
+        if hyb == "gps":
+            mesures += _mesures_gps(data_in, temps, params)
+        elif hyb == "odo":
+            if odometre is None:
+                odometre = odometre_donnees(data_in, reglages_odometre(params))
+            mesures += _mesures_odo(odometre, temps, params)
+        elif hyb == "zupt":
+            mesures += _mesures_zupt(entrees, temps, params)
+        else:
+            mesures += _mesures_vordme(data_in, temps, params)
+    index = construire_index([source for source, _ in mesures], temps[:n])
+    fonctions = [fonction for _, fonction in mesures]
+    # Propagations de la covariance : cadence régulière et échantillons des événements
+    propagations = np.union1d(np.arange(params.cadence_cov, n, params.cadence_cov), index.pas)
+
+    filtre = FiltreKalman(params)
+    biais = np.zeros(6)
+    increments = entrees[:6]
+    # Écarts-types et biais mémorisés, tenus jusqu'à l'instant mémorisé suivant
+    hist_idx = [0]
+    hist_sigma = [filtre.ecarts_types(etat.t_b_g.T)]
+    hist_biais = [biais.copy()]
+    derniere_prop = 0
+
+    barre = tqdm.tqdm(
+        total=n - 1, desc=f"Navigation hybridée ({'+'.join(hybridations)})", disable=not progression
+    )
+    debut = 1
+    # Segments [debut, t + 1) terminés par les événements de l'échantillon t, puis fin de l'essai
+    for t, evenements in (*index.groupes(), (n - 1, None)):
+        fin = t + 1
+        if fin > debut:
+            # Navigation sur [debut, fin), incréments corrigés des biais estimés
+            loc = slice(debut - 1, fin)
+            corriges = [tab[loc] - b * DT for tab, b in zip(increments, biais)]
+            integrer_nav(
+                etat, *corriges, entrees[6][loc], *(tab[loc] for tab in sorties), 1, fin - debut + 1,
+                progression=False, compile=compile,
+            )
+
+            # Covariance propagée jusqu'au pas t
+            pas = propagations[np.searchsorted(propagations, debut) : np.searchsorted(propagations, fin)]
+            if len(pas):
+                origines = np.concatenate(([derniere_prop], pas[:-1]))
+                c_g_b = compute_t_g_b(cap[origines], rou[origines], tan[origines])
+                dv = np.stack(
+                    [np.add.reduceat(np.asarray(tab[: pas[-1]]), origines) for tab in increments[:3]], axis=1
+                )
+                duree = (pas - origines) * DT
+                dv -= biais[:3] * duree[:, np.newaxis]
+                f_g = np.einsum("kij,kj->ki", c_g_b, dv) / duree[:, np.newaxis]
+                for i in range(len(pas)):
+                    filtre.propager(c_g_b[i], f_g[i], lat[origines[i]], duree[i])
+                    if pas[i] - hist_idx[-1] >= params.pas_historique:
+                        hist_idx.append(pas[i])
+                        hist_sigma.append(filtre.ecarts_types(c_g_b[i]))
+                        hist_biais.append(biais.copy())
+                derniere_prop = pas[-1]
+            barre.update(fin - debut)
+            debut = fin
+
+        if evenements is not None:
+            for code, j, avance in zip(
+                index.source[evenements].tolist(),
+                index.rang[evenements].tolist(),
+                index.avance_s[evenements].tolist(),
+            ):
+                fonctions[code](filtre, j, avance, t, etat, lat, lon)
+            filtre.injecter(etat, sorties, t, biais)
+            hist_idx.append(t)
+            hist_sigma.append(filtre.ecarts_types(etat.t_b_g.T))
+            hist_biais.append(biais.copy())
+    barre.close()
+
+    _ecrire_estimations(data_in, lat, np.array(hist_idx), np.array(hist_sigma), np.array(hist_biais))
+    return filtre
+
+
+def _ecrire_estimations(data_in: NavInput, lat, hist_idx, hist_sigma, hist_biais):
+    """Remplit les champs Sigma_*, Bacc_* et Dgyr_* de data_in à partir de l'historique"""
+    data_in.allouer_canaux(*CANAUX_ESTIMATION, *CANAUX_SIGMA)
+    j = np.searchsorted(hist_idx, np.arange(len(lat)), side="right") - 1
+    sigma = hist_sigma[j]
+    biais = hist_biais[j]
+    for i, nom in enumerate(CANAUX_ESTIMATION):
+        getattr(data_in, nom)[0] = biais[:, i]
+    # Ordre de CANAUX_SIGMA : lon, lat, alt, vitesses, cap, roulis, tangage, biais, dérives
+    colonnes = (1, 0, 2, 3, 4, 5, 8, 6, 7, 9, 10, 11, 12, 13, 14)
+    for nom, col in zip(CANAUX_SIGMA, colonnes):
+        getattr(data_in, nom)[0] = sigma[:, col]
+    data_in.Sigma_Lat_calculee_deg[0] *= RAD2DEG / RT
+    data_in.Sigma_Lon_calculee_deg[0] *= RAD2DEG / (RT * np.cos(lat))
+
+
+def mesurer_covariance(n_pas: int = 100000, cadence_cov: int = 1):
+    r"""Mesure le nombre de propagations de la covariance par seconde
+
+    Parameters
+    ----------
+    n_pas : int
+        nombre de propagations
+    cadence_cov : int
+        nombre de pas de DT par propagation
+
+    Returns
+    -------
+    debit : float
+        propagations par seconde
+
+    """
+    filtre = FiltreKalman(ParametresFiltre(cadence_cov=cadence_cov))
+    c_g_b = compute_t_g_b(0.7, 0.01, -0.02)
+    f_g = c_g_b @ np.array([0.1, -0.05, -G])
+    debut = time.perf_counter()
+    for _ in range(n_pas):
+        filtre.propager(c_g_b, f_g, 0.85, cadence_cov * DT)
+    return n_pas / (time.perf_counter() - debut)
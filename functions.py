@@ -4,6 +4,8 @@ import plotly
 import matplotlib
 import tqdm
 
+from geodesie import RT
+
 
 # ------------------ Boucle ACCELERO -------------------------
 global omega
@@ -71,8 +73,7 @@ def compute_omega_b_b_g(t_b_g, t_g_t, omega_b_b_i, rho_g_x, rho_g_y):
 
 def compute_omega_g_g_t(v_gx: float, v_gy: float, z: float, lat: float):
     """Returns the vector of the angular speeds in the geographical referential"""
-    Rt = 6378000.0  # Rayon terrestre en mètres
-    return np.array([[0], [v_gx / (Rt + z)], [-v_gy / ((Rt + z) * np.cos(lat))]])
+    return np.array([[0], [v_gx / (RT + z)], [-v_gy / ((RT + z) * np.cos(lat))]])
 
 
 def antisymmetric(u: np.ndarray):
@@ -102,3 +103,36 @@ def extract_lat_lon(t_g_t: np.ndarray, time_instant: float):
         print(f"Warning : could not extract latitude at step {time_instant}")
         lon = -1
     return lat, lon
+
+
+def quaternion_to_dcm(q: np.ndarray):
+    """Returns the rotation matrix of the unit quaternion q = [w, x, y, z]"""
+    w, x, y, z = q
+    return np.array(
+        [
+            [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+            [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+            [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)],
+        ]
+    )
+
+
+def dcm_to_quaternion(c: np.ndarray):
+    """Returns the unit quaternion [w, x, y, z] of the rotation matrix c"""
+    # Shepperd method : the largest of the four candidates avoids a division by ~0
+    tr = np.trace(c)
+    i = np.argmax([tr, c[0, 0], c[1, 1], c[2, 2]])
+    if i == 0:
+        s = 2 * np.sqrt(1 + tr)
+        q = [s / 4, (c[2, 1] - c[1, 2]) / s, (c[0, 2] - c[2, 0]) / s, (c[1, 0] - c[0, 1]) / s]
+    elif i == 1:
+        s = 2 * np.sqrt(1 + c[0, 0] - c[1, 1] - c[2, 2])
+        q = [(c[2, 1] - c[1, 2]) / s, s / 4, (c[0, 1] + c[1, 0]) / s, (c[0, 2] + c[2, 0]) / s]
+    elif i == 2:
+        s = 2 * np.sqrt(1 - c[0, 0] + c[1, 1] - c[2, 2])
+        q = [(c[0, 2] - c[2, 0]) / s, (c[0, 1] + c[1, 0]) / s, s / 4, (c[1, 2] + c[2, 1]) / s]
+    else:
+        s = 2 * np.sqrt(1 - c[0, 0] - c[1, 1] + c[2, 2])
+        q = [(c[1, 0] - c[0, 1]) / s, (c[0, 2] + c[2, 0]) / s, (c[1, 2] + c[2, 1]) / s, s / 4]
+    q = np.array(q)
+    return q / np.linalg.norm(q)
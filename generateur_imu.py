@@ -0,0 +1,382 @@
+"""
+Description
+-----------
+
+Générateur d'incréments inertiels synthétiques par strapdown inverse : à
+partir d'une trajectoire de référence (profil analytique de durée quelconque
+ou fichier Nav_reference_*.mat), calcule les incréments de vitesse
+inc_vit_* [m/s] et d'angle inc_angl_* [rad] qu'aurait mesurés une centrale
+parfaite, au format des fichiers Donnees_inertielles_*.mat lus par
+MAIN_calcul_nav.py.
+
+Les repères sont ceux de la mécanisation : géographique Nord / Ouest / Haut,
+porteur avant / droite / bas (compute_t_g_b). Sur chaque intervalle
+[t_k, t_k+1] :
+
+   - la rotation du porteur par rapport au repère géographique est le vecteur
+     rotation de t_b_g(t_k) t_g_b(t_k+1) ; l'incrément d'angle y ajoute la
+     rotation terrestre et la rotation de transport projetées dans le repère
+     porteur à mi-intervalle ;
+   - la force spécifique géographique est dv/dt + (2 Omega + rho) x v - g ;
+     l'incrément de vitesse est sa projection dans le repère porteur à
+     mi-intervalle, multipliée par le pas.
+
+Les incréments sont physiquement cohérents avec la trajectoire (modèle de
+Terre sphérique de rayon RT) ; la mécanisation de calcul_nav, conservée
+telle quelle, ne les ré-intègre pas exactement. Ils servent à produire des
+essais de longueur arbitraire (bancs de mesure, tests de montée en charge).
+Le calcul se fait par blocs : la mémoire de travail ne dépend pas de la durée.
+
+Classes Disponibles :
+
+   - class ProfilTrajectoire
+
+Fonctions Disponibles :
+
+   - profil_analytique : trajectoire routière synthétique (arrêt, virages, côtes)
+   - profil_reference : trajectoire lue dans un fichier Nav_reference_*.mat
+   - donnees_inertielles : incréments au format Donnees_inertielles_*.mat
+   - navinput_synthetique : structure NavInput prête pour calcul_nav
+   - ecrire_essai : écriture des fichiers inertiels et de référence d'un essai
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import scipy.io
+from scipy.spatial.transform import Rotation
+
+from functions import compute_t_g_b
+from geodesie import DEG2RAD, RAD2DEG, RT
+from Gerer_donnees import NavInput
+from monte_carlo import ModeleErreursCapteurs
+from noyau_nav import G, OMEGA_T
+
+# Fréquence d'échantillonnage par défaut des incréments [Hz] (celle de calcul_nav)
+FREQUENCE_HZ = 100.0
+# Nombre d'intervalles traités par bloc par donnees_inertielles
+TAILLE_BLOC = 1 << 18
+# Position et cap initiaux des essais (ceux de MAIN_calcul_nav.py)
+LAT_INITIALE_DEG = 49.02621
+LON_INITIALE_DEG = 2.110168
+CAP_INITIAL_DEG = 41.14
+
+
+@dataclass
+class ProfilTrajectoire:
+    """Trajectoire de référence échantillonnée, tous les tableaux de dimension (N,)"""
+
+    temps_s: np.ndarray = None
+    """Instants [s], régulièrement espacés"""
+    lat_rad: np.ndarray = None
+    """Latitude [rad]"""
+    lon_rad: np.ndarray = None
+    """Longitude [rad]"""
+    alt_m: np.ndarray = None
+    """Altitude [m]"""
+    vn_ms: np.ndarray = None
+    """Vitesse Nord [m/s]"""
+    vw_ms: np.ndarray = None
+    """Vitesse Ouest [m/s]"""
+    vz_ms: np.ndarray = None
+    """Vitesse verticale, vers le haut [m/s]"""
+    cap_rad: np.ndarray = None
+    """Cap, compté de Nord vers Est [rad]"""
+    roulis_rad: np.ndarray = None
+    """Roulis, positif aile droite basse [rad]"""
+    tangage_rad: np.ndarray = None
+    """Tangage, positif nez haut [rad]"""
+
+    @property
+    def pas_s(self):
+        """Pas d'échantillonnage [s]"""
+        return float(self.temps_s[1] - self.temps_s[0])
+
+
+def _integrer(derivee, valeur_initiale, dt):
+    """Primitive par la méthode des trapèzes, de même taille que derivee"""
+    primitive = np.empty_like(derivee)
+    primitive[0] = 0.0
+    np.cumsum((derivee[1:] + derivee[:-1]) * (dt / 2), out=primitive[1:])
+    return primitive + valeur_initiale
+
+
+def profil_analytique(
+    duree_s: float,
+    frequence_hz: float = FREQUENCE_HZ,
+    vitesse_ms: float = 15.0,
+    duree_arret_s: float = 30.0,
+    duree_acceleration_s: float = 20.0,
+    taux_virage_rads: float = 0.05,
+    periode_virage_s: float = 120.0,
+    tangage_max_rad: float = 0.02,
+    periode_tangage_s: float = 300.0,
+):
+    r"""Trajectoire routière synthétique de durée quelconque
+
+    Le porteur reste immobile duree_arret_s secondes (alignement, ZUPT), accélère
+    jusqu'à vitesse_ms puis enchaîne des virages en S coordonnés (roulis
+    atan(V dcap/dt / g)) et des côtes sinusoïdales, sans dérapage. Le profil
+    part de la position et du cap initiaux des essais, à plat.
+
+    Parameters
+    ----------
+    duree_s : float
+        durée de la trajectoire [s]
+    frequence_hz : float
+        fréquence d'échantillonnage [Hz]
+    vitesse_ms : float
+        vitesse de croisière [m/s]
+    duree_arret_s : float
+        durée de l'arrêt initial [s]
+    duree_acceleration_s : float
+        durée de la montée en vitesse [s]
+    taux_virage_rads : float
+        amplitude de la vitesse de rotation en cap [rad/s]
+    periode_virage_s : float
+        période des virages en S [s]
+    tangage_max_rad : float
+        amplitude du tangage [rad]
+    periode_tangage_s : float
+        période des côtes [s]
+
+    Returns
+    -------
+    profil : ProfilTrajectoire
+        trajectoire échantillonnée
+
+    """
+    n = int(round(duree_s * frequence_hz)) + 1
+    dt = 1.0 / frequence_hz
+    t = np.arange(n) * dt
+    # Vitesse : arrêt, montée en vitesse en cosinus, croisière
+    rampe = np.clip((t - duree_arret_s) / duree_acceleration_s, 0.0, 1.0)
+    v = vitesse_ms * (1 - np.cos(np.pi * rampe)) / 2
+    del rampe
+    t_mvt = np.maximum(t - duree_arret_s, 0.0)
+    # Virages et côtes commencent avec le mouvement, à plat et cap constant
+    taux_cap = taux_virage_rads * np.sin(2 * np.pi * t_mvt / periode_virage_s) * (v > 0)
+    tangage = tangage_max_rad * np.sin(2 * np.pi * t_mvt / periode_tangage_s)
+    del t_mvt
+    cap = _integrer(taux_cap, CAP_INITIAL_DEG * DEG2RAD, dt)
+    roulis = np.arctan(v * taux_cap / G)
+    del taux_cap
+
+    # Vitesse portée par l'axe avant du porteur (colonne 0 de t_g_b)
+    vn = v * np.cos(cap) * np.cos(tangage)
+    vw = -v * np.sin(cap) * np.cos(tangage)
+    vz = v * np.sin(tangage)
+    del v
+    alt = _integrer(vz, 0.0, dt)
+    lat = _integrer(vn / (RT + alt), LAT_INITIALE_DEG * DEG2RAD, dt)
+    lon = _integrer(-vw / ((RT + alt) * np.cos(lat)), LON_INITIALE_DEG * DEG2RAD, dt)
+    return ProfilTrajectoire(t, lat, lon, alt, vn, vw, vz, cap, roulis, tangage)
+
+
+def profil_reference(contenu, frequence_hz: float = FREQUENCE_HZ, t_ref=None):
+    r"""Trajectoire lue dans un fichier de navigation de référence
+
+    Parameters
+    ----------
+    contenu : Mapping
+        contenu d'un fichier Nav_reference_*.mat (ex: lu par charger_mat) :
+        latitude_ins, longitude_ins [deg], altitude_ins [m], vit_ins_n / w / z
+        [m/s], cap_ins, roulis_ins, tangage_ins [deg]
+    frequence_hz : float
+        fréquence du profil produit [Hz]
+    t_ref : np.ndarray
+        instants de la référence [s] ; par défaut la variable temps_s du
+        fichier si elle existe, sinon un échantillonnage à FREQUENCE_HZ
+
+    Returns
+    -------
+    profil : ProfilTrajectoire
+        trajectoire rééchantillonnée (angles interpolés après déroulement)
+
+    """
+    n = np.size(contenu["latitude_ins"])
+    if t_ref is None:
+        t_ref = contenu["temps_s"] if "temps_s" in contenu else np.arange(n) / FREQUENCE_HZ
+    t_ref = np.ravel(t_ref)[:n].astype(float)
+    t = np.arange(t_ref[0], t_ref[-1], 1.0 / frequence_hz)
+
+    def canal(nom, echelle=1.0, angle=False):
+        valeurs = np.ravel(contenu[nom])[:n].astype(float) * echelle
+        if angle:
+            valeurs = np.unwrap(valeurs)
+        return np.interp(t, t_ref, valeurs)
+
+    return ProfilTrajectoire(
+        temps_s=t,
+        lat_rad=canal("latitude_ins", DEG2RAD),
+        lon_rad=canal("longitude_ins", DEG2RAD),
+        alt_m=canal("altitude_ins"),
+        vn_ms=canal("vit_ins_n"),
+        vw_ms=canal("vit_ins_w"),
+        vz_ms=canal("vit_ins_z"),
+        cap_rad=canal("cap_ins", DEG2RAD, angle=True),
+        roulis_rad=canal("roulis_ins", DEG2RAD, angle=True),
+        tangage_rad=canal("tangage_ins", DEG2RAD),
+    )
+
+
+def _increments_bloc(p: ProfilTrajectoire, d: int, f: int, dt: float):
+    """Incréments des intervalles [t_k, t_k+1] pour k de d à f - 1, de dimension (f - d, 3) chacun"""
+    c0 = compute_t_g_b(p.cap_rad[d:f], p.roulis_rad[d:f], p.tangage_rad[d:f])
+    c1 = compute_t_g_b(p.cap_rad[d + 1 : f + 1], p.roulis_rad[d + 1 : f + 1], p.tangage_rad[d + 1 : f + 1])
+    # Rotation du porteur / repère géographique, exprimée dans le repère porteur
+    theta_gb = Rotation.from_matrix(np.transpose(c0, (0, 2, 1)) @ c1).as_rotvec()
+    c_mi = c0 @ Rotation.from_rotvec(theta_gb / 2).as_matrix()
+
+    def milieu(tab):
+        return (tab[d:f] + tab[d + 1 : f + 1]) / 2
+
+    lat, alt = milieu(p.lat_rad), milieu(p.alt_m)
+    v = np.stack((milieu(p.vn_ms), milieu(p.vw_ms), milieu(p.vz_ms)), axis=1)
+    dv = np.stack(
+        (p.vn_ms[d + 1 : f + 1] - p.vn_ms[d:f],
+         p.vw_ms[d + 1 : f + 1] - p.vw_ms[d:f],
+         p.vz_ms[d + 1 : f + 1] - p.vz_ms[d:f]),
+        axis=1,
+    )
+    # Rotation terrestre et rotation de transport dans le repère Nord / Ouest / Haut
+    omega = OMEGA_T * np.stack((np.cos(lat), np.zeros_like(lat), np.sin(lat)), axis=1)
+    rho = np.stack((-v[:, 1], v[:, 0], -v[:, 1] * np.tan(lat)), axis=1) / (RT + alt)[:, np.newaxis]
+    force = dv / dt + np.cross(2 * omega + rho, v)
+    force[:, 2] += G
+
+    c_mi_t = np.transpose(c_mi, (0, 2, 1))
+    inc_vit = np.einsum("kij,kj->ki", c_mi_t, force) * dt
+    inc_angl = theta_gb + np.einsum("kij,kj->ki", c_mi_t, omega + rho) * dt
+    return inc_vit, inc_angl
+
+
+def donnees_inertielles(
+    profil: ProfilTrajectoire,
+    modele: ModeleErreursCapteurs = None,
+    graine: int = 0,
+    taille_bloc: int = TAILLE_BLOC,
+):
+    r"""Incréments inertiels d'une centrale parcourant le profil
+
+    L'incrément d'indice k couvre l'intervalle [t_k, t_k+1] (celui que lit
+    calcul_nav pour passer de k à k + 1) ; le dernier reprend l'avant-dernier.
+
+    Parameters
+    ----------
+    profil : ProfilTrajectoire
+        trajectoire de référence
+    modele : ModeleErreursCapteurs
+        erreurs capteurs ajoutées (biais constants tirés une fois par axe,
+        bruits blancs par incrément) ; centrale parfaite si None
+    graine : int
+        graine du générateur aléatoire des erreurs capteurs
+    taille_bloc : int
+        nombre d'intervalles traités à la fois
+
+    Returns
+    -------
+    donnees : dict
+        temps_s, inc_vit_x_ms, ..., inc_angl_z_rad de dimension (1, N), au
+        format des fichiers Donnees_inertielles_*.mat
+
+    """
+    n = len(profil.temps_s)
+    dt = profil.pas_s
+    incs = np.empty((6, n))
+    for d in range(0, n - 1, taille_bloc):
+        f = min(d + taille_bloc, n - 1)
+        inc_vit, inc_angl = _increments_bloc(profil, d, f, dt)
+        incs[:3, d:f] = inc_vit.T
+        incs[3:, d:f] = inc_angl.T
+    incs[:, n - 1] = incs[:, n - 2]
+
+    if modele is not None:
+        rng = np.random.default_rng(graine)
+        biais = rng.standard_normal(6) * np.repeat([modele.biais_acc_ms2, modele.derive_gyro_rads], 3)
+        bruits = np.repeat([modele.bruit_inc_vit_ms, modele.bruit_inc_angl_rad], 3)
+        for i in range(6):
+            incs[i] += biais[i] * dt
+            if bruits[i] > 0:
+                incs[i] += bruits[i] * rng.standard_normal(n)
+
+    noms = ("inc_vit_x_ms", "inc_vit_y_ms", "inc_vit_z_ms", "inc_angl_x_rad", "inc_angl_y_rad", "inc_angl_z_rad")
+    donnees = {"temps_s": profil.temps_s[np.newaxis, :]}
+    donnees.update({nom: incs[i : i + 1] for i, nom in enumerate(noms)})
+    return donnees
+
+
+def navinput_synthetique(donnees: dict, profil: ProfilTrajectoire):
+    r"""Structure NavInput prête pour calcul_nav
+
+    Parameters
+    ----------
+    donnees : dict
+        incréments renvoyés par donnees_inertielles
+    profil : ProfilTrajectoire
+        trajectoire dont sont tirées les conditions initiales
+
+    Returns
+    -------
+    donnees_in : NavInput
+        structure allouée et initialisée (comme par MAIN_calcul_nav.preparer_donnees)
+
+    """
+    donnees_in = NavInput(temps_s=donnees["temps_s"])
+    donnees_in.alloc_memoire()
+    for nom, valeur in donnees.items():
+        if nom != "temps_s":
+            setattr(donnees_in, nom, valeur)
+    donnees_in.Cap_initial_rad = float(profil.cap_rad[0])
+    donnees_in.Lon_initiale_rad = float(profil.lon_rad[0])
+    donnees_in.Lat_initiale_rad = float(profil.lat_rad[0])
+    donnees_in.Alt_initiale_m = float(profil.alt_m[0])
+    return donnees_in
+
+
+def ecrire_essai(profil: ProfilTrajectoire, rep, nom: str, modele: ModeleErreursCapteurs = None, graine: int = 0):
+    r"""Écrit les fichiers inertiels et de référence d'un essai synthétique
+
+    Parameters
+    ----------
+    profil : ProfilTrajectoire
+        trajectoire de référence
+    rep : str or Path
+        dossier d'écriture (ex: le dossier d'une hybridation de corres_tp_chemin)
+    nom : str
+        nom de l'essai, repris dans les noms de fichiers
+    modele : ModeleErreursCapteurs
+        erreurs capteurs ajoutées, centrale parfaite si None
+    graine : int
+        graine du générateur aléatoire des erreurs capteurs
+
+    Returns
+    -------
+    chemins : list of Path
+        Donnees_inertielles_<nom>.mat et Nav_reference_<nom>.mat
+
+    """
+    rep = Path(rep)
+    rep.mkdir(parents=True, exist_ok=True)
+    chemin_inertiel = rep / f"Donnees_inertielles_{nom}.mat"
+    scipy.io.savemat(chemin_inertiel, donnees_inertielles(profil, modele, graine))
+    chemin_reference = rep / f"Nav_reference_{nom}.mat"
+    scipy.io.savemat(
+        chemin_reference,
+        {
+            "temps_s": profil.temps_s[np.newaxis, :],
+            "latitude_ins": profil.lat_rad[np.newaxis, :] * RAD2DEG,
+            "longitude_ins": profil.lon_rad[np.newaxis, :] * RAD2DEG,
+            "altitude_ins": profil.alt_m[np.newaxis, :],
+            "vit_ins_n": profil.vn_ms[np.newaxis, :],
+            "vit_ins_w": profil.vw_ms[np.newaxis, :],
+            "vit_ins_z": profil.vz_ms[np.newaxis, :],
+            "cap_ins": profil.cap_rad[np.newaxis, :] * RAD2DEG,
+            "roulis_ins": profil.roulis_rad[np.newaxis, :] * RAD2DEG,
+            "tangage_ins": profil.tangage_rad[np.newaxis, :] * RAD2DEG,
+        },
+    )
+    return [chemin_inertiel, chemin_reference]
@@ -0,0 +1,386 @@
+"""
+Description
+-----------
+
+Géodésie commune au calcul et aux tracés : constantes terrestres, conversions
+géodésiques <-> ECEF <-> repère local (NED / ENU), distances et relèvements
+orthodromiques, écarts en plan local, ainsi que les registres des balises
+VOR/DME et des emprises des cartes de fond.
+
+Toutes les fonctions prennent et renvoient des tableaux numpy de dimensions
+quelconques (diffusion numpy) : aucune ne boucle sur les échantillons.
+
+Deux modèles de Terre coexistent :
+
+   - la sphère de rayon RT de la mécanisation (noyau_nav, filtre
+     d'hybridation, erreurs des figures de trace_figures), conservée telle
+     quelle ;
+   - l'ellipsoïde WGS84 pour les conversions ECEF et les rayons de courbure,
+     utilisé par la multilatération VOR/DME (positions ECEF des balises
+     calculées une fois dans BALISES) et par analyse_erreurs (écarts NED).
+
+Classes Disponibles :
+
+   - class Balise
+   - class EmpriseCarte
+
+Fonctions Disponibles :
+
+   - rayons_wgs84 : rayons de courbure méridien et transverse
+   - geodesique_vers_ecef / ecef_vers_geodesique
+   - matrice_ecef_ned : matrice de passage ECEF -> NED
+   - ecef_vers_ned / ned_vers_ecef / ecef_vers_enu
+   - geodesique_vers_ned : position NED relative à une origine géodésique
+   - ecarts_plan_local : écarts nord / est [m] sur la sphère de rayon RT
+   - distance_orthodromique / relevement : distance et cap initial sur la sphère
+
+--------------------------------
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Rayon de la sphère terrestre de la mécanisation [m]
+RT = 6378000.0
+
+# Ellipsoïde WGS84
+A_WGS84 = 6378137.0
+"""Demi-grand axe [m]"""
+F_WGS84 = 1 / 298.257223563
+"""Aplatissement"""
+B_WGS84 = A_WGS84 * (1 - F_WGS84)
+"""Demi-petit axe [m]"""
+E2_WGS84 = F_WGS84 * (2 - F_WGS84)
+"""Carré de la première excentricité"""
+EP2_WGS84 = E2_WGS84 / (1 - E2_WGS84)
+"""Carré de la seconde excentricité"""
+
+# Conversions d'angles
+DEG2RAD = np.pi / 180
+RAD2DEG = 180 / np.pi
+
+
+def rayons_wgs84(lat):
+    r"""Rayons de courbure de l'ellipsoïde WGS84
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        latitude [rad]
+
+    Returns
+    -------
+    r_meridien : np.ndarray
+        rayon de courbure méridien (nord) [m]
+    r_transverse : np.ndarray
+        rayon de courbure transverse (est) [m]
+
+    """
+    s2 = np.sin(lat) ** 2
+    w = np.sqrt(1 - E2_WGS84 * s2)
+    return A_WGS84 * (1 - E2_WGS84) / w**3, A_WGS84 / w
+
+
+def geodesique_vers_ecef(lat, lon, alt=0.0):
+    r"""Coordonnées ECEF de positions géodésiques WGS84
+
+    Parameters
+    ----------
+    lat, lon : np.ndarray
+        latitude et longitude [rad]
+    alt : np.ndarray
+        hauteur ellipsoïdale [m]
+
+    Returns
+    -------
+    xyz : np.ndarray
+        coordonnées ECEF [m], de dimension (..., 3)
+
+    """
+    lat, lon, alt = np.broadcast_arrays(lat, lon, alt)
+    _, r_transverse = rayons_wgs84(lat)
+    cl = np.cos(lat)
+    return np.stack(
+        [
+            (r_transverse + alt) * cl * np.cos(lon),
+            (r_transverse + alt) * cl * np.sin(lon),
+            (r_transverse * (1 - E2_WGS84) + alt) * np.sin(lat),
+        ],
+        axis=-1,
+    )
+
+
+def ecef_vers_geodesique(xyz):
+    r"""Positions géodésiques WGS84 de coordonnées ECEF (formule de Bowring)
+
+    Parameters
+    ----------
+    xyz : np.ndarray
+        coordonnées ECEF [m], de dimension (..., 3)
+
+    Returns
+    -------
+    lat, lon : np.ndarray
+        latitude et longitude [rad]
+    alt : np.ndarray
+        hauteur ellipsoïdale [m]
+
+    """
+    x, y, z = np.moveaxis(np.asarray(xyz, dtype=float), -1, 0)
+    p = np.hypot(x, y)
+    theta = np.arctan2(z * A_WGS84, p * B_WGS84)
+    lat = np.arctan2(
+        z + EP2_WGS84 * B_WGS84 * np.sin(theta) ** 3,
+        p - E2_WGS84 * A_WGS84 * np.cos(theta) ** 3,
+    )
+    lon = np.arctan2(y, x)
+    _, r_transverse = rayons_wgs84(lat)
+    cl = np.cos(lat)
+    # Hauteur : expression stable près des pôles quand cos(lat) est petit
+    alt = np.where(
+        np.abs(cl) > 1e-6,
+        p / np.where(np.abs(cl) > 1e-6, cl, 1.0) - r_transverse,
+        np.abs(z) - B_WGS84,
+    )
+    return lat, lon, alt
+
+
+def matrice_ecef_ned(lat0, lon0):
+    r"""Matrice de passage ECEF -> NED à une origine géodésique
+
+    Parameters
+    ----------
+    lat0, lon0 : np.ndarray
+        origine du repère local [rad]
+
+    Returns
+    -------
+    r : np.ndarray
+        matrice de rotation, de dimension (..., 3, 3) : ned = r @ (xyz - origine)
+
+    """
+    lat0, lon0 = np.asarray(lat0, dtype=float), np.asarray(lon0, dtype=float)
+    sl, cl = np.sin(lat0), np.cos(lat0)
+    sg, cg = np.sin(lon0), np.cos(lon0)
+    return np.stack(
+        [
+            np.stack([-sl * cg, -sl * sg, cl], axis=-1),
+            np.stack([-sg, cg, np.zeros_like(sg)], axis=-1),
+            np.stack([-cl * cg, -cl * sg, -sl], axis=-1),
+        ],
+        axis=-2,
+    )
+
+
+def ecef_vers_ned(xyz, lat0, lon0, alt0=0.0):
+    r"""Coordonnées NED de points ECEF, relatives à une origine géodésique
+
+    Parameters
+    ----------
+    xyz : np.ndarray
+        coordonnées ECEF [m], de dimension (..., 3)
+    lat0, lon0 : float or np.ndarray
+        origine du repère local [rad]
+    alt0 : float or np.ndarray
+        hauteur de l'origine [m]
+
+    Returns
+    -------
+    ned : np.ndarray
+        coordonnées nord, est, bas [m], de dimension (..., 3)
+
+    """
+    origine = geodesique_vers_ecef(lat0, lon0, alt0)
+    r = matrice_ecef_ned(lat0, lon0)
+    return np.einsum("...ij,...j->...i", r, np.asarray(xyz) - origine)
+
+
+def ned_vers_ecef(ned, lat0, lon0, alt0=0.0):
+    r"""Coordonnées ECEF de points NED relatifs à une origine géodésique
+
+    Parameters
+    ----------
+    ned : np.ndarray
+        coordonnées nord, est, bas [m], de dimension (..., 3)
+    lat0, lon0 : float or np.ndarray
+        origine du repère local [rad]
+    alt0 : float or np.ndarray
+        hauteur de l'origine [m]
+
+    Returns
+    -------
+    xyz : np.ndarray
+        coordonnées ECEF [m], de dimension (..., 3)
+
+    """
+    origine = geodesique_vers_ecef(lat0, lon0, alt0)
+    r = matrice_ecef_ned(lat0, lon0)
+    return origine + np.einsum("...ji,...j->...i", r, np.asarray(ned))
+
+
+def ecef_vers_enu(xyz, lat0, lon0, alt0=0.0):
+    """Coordonnées est, nord, haut [m] de points ECEF (voir ecef_vers_ned)"""
+    ned = ecef_vers_ned(xyz, lat0, lon0, alt0)
+    return np.stack([ned[..., 1], ned[..., 0], -ned[..., 2]], axis=-1)
+
+
+def geodesique_vers_ned(lat, lon, alt, lat0, lon0, alt0=0.0):
+    r"""Coordonnées NED [m] de positions géodésiques, relatives à une origine géodésique
+
+    Parameters
+    ----------
+    lat, lon : np.ndarray
+        latitude et longitude [rad]
+    alt : np.ndarray
+        hauteur [m]
+    lat0, lon0, alt0 : float
+        origine du repère local [rad] et [m]
+
+    Returns
+    -------
+    ned : np.ndarray
+        coordonnées nord, est, bas [m], de dimension (..., 3)
+
+    """
+    return ecef_vers_ned(geodesique_vers_ecef(lat, lon, alt), lat0, lon0, alt0)
+
+
+def ecarts_plan_local(lat, lon, lat_ref, lon_ref, rayon: float = RT):
+    r"""Écarts nord / est [m] d'une position à une position de référence, sur la sphère
+
+    Approximation plane des petits écarts, l'écart est étant compté à la
+    latitude de référence : c'est la convention du calcul des erreurs de
+    position et du filtre d'hybridation.
+
+    Parameters
+    ----------
+    lat, lon : np.ndarray
+        position [rad]
+    lat_ref, lon_ref : np.ndarray
+        position de référence [rad]
+    rayon : float
+        rayon de la sphère [m]
+
+    Returns
+    -------
+    nord, est : np.ndarray
+        écarts [m]
+
+    """
+    return (lat - lat_ref) * rayon, (lon - lon_ref) * rayon * np.cos(lat_ref)
+
+
+def distance_orthodromique(lat1, lon1, lat2, lon2, rayon: float = RT):
+    r"""Distance orthodromique (formule de haversine) entre deux positions
+
+    Parameters
+    ----------
+    lat1, lon1, lat2, lon2 : np.ndarray
+        positions [rad]
+    rayon : float
+        rayon de la sphère [m]
+
+    Returns
+    -------
+    distance : np.ndarray
+        distance [m]
+
+    """
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * rayon * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def relevement(lat1, lon1, lat2, lon2):
+    r"""Cap initial [rad] de la route orthodromique de la position 1 vers la position 2
+
+    Parameters
+    ----------
+    lat1, lon1, lat2, lon2 : np.ndarray
+        positions [rad]
+
+    Returns
+    -------
+    cap : np.ndarray
+        relèvement compté depuis le nord vers l'est, dans [-pi, pi]
+
+    """
+    dlon = lon2 - lon1
+    return np.arctan2(
+        np.sin(dlon) * np.cos(lat2),
+        np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon),
+    )
+
+
+@dataclass
+class Balise:
+    """Balise VOR/DME, position ECEF calculée une fois à la création"""
+
+    nom: str = ""
+    """Nom court de la balise (suffixe des champs vor_* et dme_*)"""
+    lat_deg: float = 0.0
+    """Latitude [deg]"""
+    lon_deg: float = 0.0
+    """Longitude [deg]"""
+    alt_m: float = 0.0
+    """Hauteur [m]"""
+    ecef: np.ndarray = field(default=None, repr=False)
+    """Coordonnées ECEF [m] (3,)"""
+
+    def __post_init__(self):
+        self.ecef = geodesique_vers_ecef(self.lat_rad, self.lon_rad, self.alt_m)
+
+    @property
+    def lat_rad(self):
+        """Latitude [rad]"""
+        return self.lat_deg * DEG2RAD
+
+    @property
+    def lon_rad(self):
+        """Longitude [rad]"""
+        return self.lon_deg * DEG2RAD
+
+
+# Registre des balises VOR/DME des essais
+BALISES = {
+    balise.nom: balise
+    for balise in (
+        Balise("bvs", 49.459839, 2.114482),
+        Balise("dvl", 49.310750, 0.312722),
+        Balise("pon", 49.096083, 2.035889),
+        Balise("rou", 49.465639, 1.280639),
+    )
+}
+
+
+@dataclass
+class EmpriseCarte:
+    """Emprise géographique d'une image de fond de carte"""
+
+    fichier: str = ""
+    """Nom du fichier image dans le dossier 01-Cartes"""
+    lon_min_deg: float = 0.0
+    """Longitude du bord gauche [deg]"""
+    lat_max_deg: float = 0.0
+    """Latitude du bord haut [deg]"""
+    largeur_deg: float = 0.0
+    """Étendue en longitude [deg]"""
+    hauteur_deg: float = 0.0
+    """Étendue en latitude [deg]"""
+
+    @property
+    def lon_max_deg(self):
+        """Longitude du bord droit [deg]"""
+        return self.lon_min_deg + self.largeur_deg
+
+    @property
+    def lat_min_deg(self):
+        """Latitude du bord bas [deg]"""
+        return self.lat_max_deg - self.hauteur_deg
+
+
+# Registre des cartes de fond des essais
+CARTES = {
+    "Pontoise": EmpriseCarte("map_ilems.png", 1.728479, 49.224106555952380, 0.5771341310408928, 0.2442005559523821),
+    "Fecamp": EmpriseCarte("map_fecamp.png", 0.317211, 49.787612490196075, 1.9932976035555563, 0.819765490196076),
+}
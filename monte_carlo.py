@@ -0,0 +1,214 @@
+"""
+Description
+-----------
+
+Monte Carlo des erreurs capteurs : des biais accéléro, dérives gyro et bruits
+blancs aléatoires sont injectés dans les incréments inc_vit_* / inc_angl_*,
+et l'ensemble des membres est propagé en un seul état vectorisé par
+nav_lot.propager_lot. Le membre 0 n'est pas perturbé et sert de navigation
+de référence : les enveloppes (moyenne et percentiles) des erreurs de
+position, vitesse et attitude sont calculées par rapport à lui.
+
+Le calcul avance par blocs de temps de taille fixe : la mémoire reste bornée
+(de l'ordre de taille_bloc x nombre de membres) quelle que soit la durée de
+l'essai. Les tirages sont reproductibles pour une graine donnée et ne
+dépendent pas de la taille des blocs.
+
+Classes Disponibles :
+
+   - class ModeleErreursCapteurs
+   - class EnveloppesMC
+
+Fonctions Disponibles :
+
+   - monte_carlo_nav : calcul des enveloppes d'erreur d'un ensemble
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import tqdm
+
+from functions import compute_t_g_b
+from Gerer_donnees import NavInput
+from geodesie import DEG2RAD, RT
+from nav_lot import DT, propager_lot
+
+# Grandeurs dont les enveloppes d'erreur sont calculées
+GRANDEURS = (
+    "pos_nord_m",
+    "pos_est_m",
+    "vit_x_ms",
+    "vit_y_ms",
+    "vit_z_ms",
+    "cap_rad",
+    "roulis_rad",
+    "tangage_rad",
+)
+
+
+@dataclass
+class ModeleErreursCapteurs:
+    """Écarts-types des erreurs capteurs tirées pour chaque membre (mêmes sur les 3 axes)"""
+
+    biais_acc_ms2: float = 0.0
+    """Biais accéléro constant [m/s^2]"""
+    derive_gyro_rads: float = 0.0
+    """Dérive gyro constante [rad/s]"""
+    bruit_inc_vit_ms: float = 0.0
+    """Bruit blanc sur chaque incrément de vitesse [m/s]"""
+    bruit_inc_angl_rad: float = 0.0
+    """Bruit blanc sur chaque incrément d'angle [rad]"""
+
+
+@dataclass
+class EnveloppesMC:
+    """Enveloppes des erreurs de l'ensemble par rapport au membre non perturbé"""
+
+    temps_s: np.ndarray = None
+    """Temps du système, de dimension (N,)"""
+    percentiles: tuple = ()
+    """Percentiles calculés, de longueur P"""
+    moyenne: dict = None
+    """Erreur moyenne par grandeur de GRANDEURS, de dimension (N,)"""
+    quantiles: dict = None
+    """Percentiles de l'erreur par grandeur de GRANDEURS, de dimension (P, N)"""
+    biais: np.ndarray = None
+    """Biais tirés (ivx, ivy, ivz [m/s^2], iax, iay, iaz [rad/s]) par membre, de dimension (6, M)"""
+
+
+def _erreurs(lat, lon, vxm, vym, vzm, cap, rou, tan):
+    """Erreurs (lignes, M) de chaque membre par rapport à la colonne 0"""
+    err_cap = cap[:, 1:] - cap[:, :1]
+    return {
+        "pos_nord_m": (lat[:, 1:] - lat[:, :1]) * RT,
+        "pos_est_m": (lon[:, 1:] - lon[:, :1]) * RT * np.cos(lat[:, :1]),
+        "vit_x_ms": vxm[:, 1:] - vxm[:, :1],
+        "vit_y_ms": vym[:, 1:] - vym[:, :1],
+        "vit_z_ms": vzm[:, 1:] - vzm[:, :1],
+        # Erreur de cap ramenée dans [-pi, pi]
+        "cap_rad": (err_cap + np.pi) % (2 * np.pi) - np.pi,
+        "roulis_rad": rou[:, 1:] - rou[:, :1],
+        "tangage_rad": tan[:, 1:] - tan[:, :1],
+    }
+
+
+def monte_carlo_nav(
+    data_in: NavInput,
+    modele: ModeleErreursCapteurs,
+    n_membres: int = 100,
+    graine: int = 0,
+    percentiles: tuple = (5, 50, 95),
+    taille_bloc: int = 1000,
+    progression: bool = True,
+):
+    r"""Propage un ensemble de navigations perturbées et calcule leurs enveloppes d'erreur
+
+    Parameters
+    ----------
+    data_in : NavInput
+        structure allouée et initialisée de l'essai nominal (non modifiée)
+    modele : ModeleErreursCapteurs
+        écarts-types des erreurs capteurs injectées
+    n_membres : int
+        nombre de membres perturbés M
+    graine : int
+        graine du générateur aléatoire (tirages reproductibles)
+    percentiles : tuple
+        percentiles des enveloppes, dans [0, 100]
+    taille_bloc : int
+        nombre de pas propagés par bloc, borne la mémoire utilisée
+    progression : bool
+        affichage d'une barre de progression
+
+    Returns
+    -------
+    enveloppes : EnveloppesMC
+        moyenne et percentiles des erreurs à chaque instant
+
+    """
+    n = np.shape(data_in.temps_s)[1]
+    k = n_membres + 1
+    rng = np.random.default_rng(graine)
+
+    # Biais constants par membre, convertis en erreur par incrément
+    sigmas_biais = np.repeat([modele.biais_acc_ms2, modele.derive_gyro_rads], 3)
+    biais = rng.standard_normal((6, k)) * sigmas_biais[:, np.newaxis]
+    biais[:, 0] = 0.0
+    sigmas_bruit = np.repeat([modele.bruit_inc_vit_ms, modele.bruit_inc_angl_rad], 3)
+
+    nominal = [
+        data_in.inc_vit_x_ms[0],
+        data_in.inc_vit_y_ms[0],
+        data_in.inc_vit_z_ms[0],
+        data_in.inc_angl_x_rad[0],
+        data_in.inc_angl_y_rad[0],
+        data_in.inc_angl_z_rad[0],
+    ]
+    alt = data_in.Alt_calculee_m[0].copy()
+    alt[0] = data_in.Alt_initiale_m
+    lat_init = data_in.Lat_calculee_deg[0] * DEG2RAD
+    lon_init = data_in.Lon_calculee_deg[0] * DEG2RAD
+
+    # État empilé et dernière ligne des sorties (instant 0)
+    t_b_g = np.repeat(
+        compute_t_g_b(data_in.Cap_initial_rad, 0.0, 0.0).T[np.newaxis], k, axis=0
+    )
+    v_geo_vector = np.zeros((k, 3, 1))
+    derniere = np.zeros((8, k))
+    derniere[0] = data_in.Lat_initiale_rad
+    derniere[1] = data_in.Lon_initiale_rad
+    derniere[2] = data_in.Cap_initial_rad
+    derniere[5] = data_in.Vx_m[0, 0]
+    derniere[6] = data_in.Vy_m[0, 0]
+    derniere[7] = data_in.Vz_m[0, 0]
+
+    moyenne = {g: np.zeros(n) for g in GRANDEURS}
+    quantiles = {g: np.zeros((len(percentiles), n)) for g in GRANDEURS}
+
+    barre = tqdm.tqdm(total=n - 1, desc=f"Monte Carlo (M={n_membres})", disable=not progression)
+    for d in range(1, n, taille_bloc):
+        f = min(d + taille_bloc, n)
+        m = f - d
+        # Incréments perturbés des pas d - 1 à f - 2 (+ une ligne non lue)
+        bruit = rng.standard_normal((m, 6, k)) * sigmas_bruit[:, np.newaxis]
+        bruit[:, :, 0] = 0.0
+        entrees = []
+        for i, inc in enumerate(nominal):
+            tab = np.empty((m + 1, k))
+            tab[:m] = inc[d - 1 : f - 1, np.newaxis] + biais[i] * DT + bruit[:, i]
+            tab[m] = 0.0
+            entrees.append(tab)
+        entrees.append(alt[d - 1 : f, np.newaxis])
+
+        # Sorties du bloc, la ligne 0 reprend la fin du bloc précédent
+        sorties = np.zeros((8, m + 1, k))
+        sorties[:, 0] = derniere
+        sorties[0, 1:] = lat_init[d:f, np.newaxis]
+        sorties[1, 1:] = lon_init[d:f, np.newaxis]
+        lat, lon, cap, rou, tan, vxm, vym, vzm = sorties
+        propager_lot(t_b_g, v_geo_vector, entrees, sorties, 1, m + 1)
+        derniere = sorties[:, m].copy()
+
+        erreurs = _erreurs(
+            lat[1:], lon[1:], vxm[1:], vym[1:], vzm[1:], cap[1:], rou[1:], tan[1:]
+        )
+        for g, err in erreurs.items():
+            if np.isnan(err).any():
+                moyenne[g][d:f] = np.nanmean(err, axis=1)
+                quantiles[g][:, d:f] = np.nanpercentile(err, percentiles, axis=1)
+            else:
+                moyenne[g][d:f] = err.mean(axis=1)
+                quantiles[g][:, d:f] = np.percentile(err, percentiles, axis=1)
+        barre.update(m)
+    barre.close()
+
+    return EnveloppesMC(
+        temps_s=data_in.temps_s[0],
+        percentiles=tuple(percentiles),
+        moyenne=moyenne,
+        quantiles=quantiles,
+        biais=biais[:, 1:],
+    )
@@ -0,0 +1,252 @@
+"""
+Description
+-----------
+
+Calcul de positions à partir des mesures VOR/DME des quatre balises (BVS,
+DVL, PON, ROU) : pour chaque instant, point par moindres carrés pondérés des
+distances DME et relèvements VOR de toutes les balises disponibles.
+
+Le calcul est vectorisé sur l'ensemble du vol : les mesures sont rangées en
+tableaux (N, 4) et les itérations de Gauss-Newton résolvent les N systèmes
+normaux 2 x 2 en même temps, sans boucle sur les instants. Le point initial
+est la moyenne pondérée des points obtenus balise par balise (relèvement et
+distance d'une seule balise).
+
+Les inconnues sont les coordonnées (nord, est) dans le plan tangent à
+l'ellipsoïde WGS84 au barycentre des balises, le point étant ramené au sol par
+la courbure terrestre. Les écarts aux balises sont calculés en ECEF à partir
+des positions des balises calculées une fois dans geodesie.BALISES, puis
+projetés dans le repère NED de chaque balise : les relèvements VOR sont ainsi
+comptés depuis le nord de la balise et les distances DME sont traitées comme
+horizontales.
+
+Classes Disponibles :
+
+   - class PointsVORDME
+
+Fonctions Disponibles :
+
+   - multilateration_vordme : points VOR/DME de tous les instants
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from geodesie import (
+    BALISES,
+    ecef_vers_geodesique,
+    ecef_vers_ned,
+    geodesique_vers_ecef,
+    matrice_ecef_ned,
+    ned_vers_ecef,
+    rayons_wgs84,
+)
+
+# Nombre maximal d'itérations de Gauss-Newton (le point initial est déjà à
+# quelques centaines de mètres, deux itérations suffisent en général)
+N_ITERATIONS = 5
+# Arrêt des itérations quand plus aucun point ne bouge de plus de TOLERANCE_M
+TOLERANCE_M = 1.0
+
+
+@dataclass
+class PointsVORDME:
+    """Points VOR/DME calculés, tableaux de dimension (N,) sauf mention contraire"""
+
+    Lat_deg: np.ndarray = None
+    """Latitude du point [deg], nan si le point n'a pas pu être calculé"""
+    Lon_deg: np.ndarray = None
+    """Longitude du point [deg], nan si le point n'a pas pu être calculé"""
+    nord_m: np.ndarray = None
+    """Position nord dans le plan local [m]"""
+    est_m: np.ndarray = None
+    """Position est dans le plan local [m]"""
+    sigma_m: np.ndarray = None
+    """Écart-type horizontal du point, sqrt(trace((J^T W J)^-1)) [m]"""
+    hdop: np.ndarray = None
+    """Dilution de précision horizontale (sigma_m rapporté à l'écart-type DME)"""
+    residus_dme_m: np.ndarray = None
+    """Résidus des distances DME [m], (N, 4), nan si mesure absente"""
+    residus_vor_deg: np.ndarray = None
+    """Résidus des relèvements VOR [deg], (N, 4), nan si mesure absente"""
+    nb_mesures: np.ndarray = None
+    """Nombre de mesures utilisées"""
+    balises: tuple = ()
+    """Noms des balises, dans l'ordre des colonnes des résidus"""
+
+
+def _plan_vers_ned(x, rayon):
+    """Coordonnées NED (N, 3) dans le plan local des points (nord, est) x, ramenés au sol"""
+    return np.stack([x[:, 0], x[:, 1], (x[:, 0] ** 2 + x[:, 1] ** 2) / (2 * rayon)], axis=1)
+
+
+def _ecarts_balises(x, geometrie):
+    r"""Écarts nord / est [m] du porteur à chaque balise, dans le repère NED de la balise, (N, 4)
+
+    geometrie = (t_b, m_b, rayon) : position (4, 3) de l'origine du plan local
+    dans le repère NED de chaque balise, passage (4, 3, 3) du repère local au
+    repère NED de chaque balise et rayon de courbure moyen à l'origine [m].
+    d_dn et d_de donnent les dérivées des écarts par rapport à (nord, est).
+    """
+    t_b, m_b, rayon = geometrie
+    ned = t_b + np.einsum("kij,nj->nki", m_b, _plan_vers_ned(x, rayon))
+    d_dn = (m_b[:, 0, 0], m_b[:, 0, 1])
+    d_de = (m_b[:, 1, 0], m_b[:, 1, 1])
+    return ned[..., 0], ned[..., 1], d_dn, d_de
+
+
+def _jacobiennes(dn, de, d_dn, d_de):
+    """Distances et jacobiennes des distances et relèvements par rapport à (nord, est)"""
+    d2 = np.maximum(dn * dn + de * de, 1.0)
+    d = np.sqrt(d2)
+    j_dme = ((dn * d_dn[0] + de * d_de[0]) / d, (dn * d_dn[1] + de * d_de[1]) / d)
+    j_vor = ((dn * d_de[0] - de * d_dn[0]) / d2, (dn * d_de[1] - de * d_dn[1]) / d2)
+    return d, j_dme, j_vor
+
+
+def _normales(j_dme, j_vor, w_dme, w_vor):
+    """Termes a00, a01, a11 de la matrice normale J^T W J de chaque instant"""
+    a00 = (w_dme * j_dme[0] ** 2 + w_vor * j_vor[0] ** 2).sum(axis=1)
+    a01 = (w_dme * j_dme[0] * j_dme[1] + w_vor * j_vor[0] * j_vor[1]).sum(axis=1)
+    a11 = (w_dme * j_dme[1] ** 2 + w_vor * j_vor[1] ** 2).sum(axis=1)
+    return a00, a01, a11
+
+
+def _pas_gauss_newton(x, geometrie, dme, vor, w_dme, w_vor):
+    """Pas de Gauss-Newton (nord, est) [m] de chaque instant, nul si le système est singulier"""
+    dn, de, d_dn, d_de = _ecarts_balises(x, geometrie)
+    d, j_dme, j_vor = _jacobiennes(dn, de, d_dn, d_de)
+    # Résidus (prédit - mesuré)
+    r_dme = d - dme
+    r_vor = (np.arctan2(de, dn) - vor + np.pi) % (2 * np.pi) - np.pi
+    # Équations normales 2 x 2 de tous les instants
+    a00, a01, a11 = _normales(j_dme, j_vor, w_dme, w_vor)
+    b0 = (w_dme * j_dme[0] * r_dme + w_vor * j_vor[0] * r_vor).sum(axis=1)
+    b1 = (w_dme * j_dme[1] * r_dme + w_vor * j_vor[1] * r_vor).sum(axis=1)
+    det = a00 * a11 - a01 * a01
+    inversible = det > 1e-12 * np.maximum(a00 * a11, 1e-300)
+    det = np.where(inversible, det, 1.0)
+    pas_n = np.where(inversible, (a11 * b0 - a01 * b1) / det, 0.0)
+    pas_e = np.where(inversible, (a00 * b1 - a01 * b0) / det, 0.0)
+    return pas_n, pas_e
+
+
+def multilateration_vordme(
+    vor_deg: dict, dme_m: dict, sigma_vor_deg: float = 1.0, sigma_dme_m: float = 200.0,
+    n_iterations: int = N_ITERATIONS, tolerance_m: float = TOLERANCE_M,
+):
+    r"""Points VOR/DME par moindres carrés pondérés, pour tous les instants à la fois
+
+    Parameters
+    ----------
+    vor_deg : dict of np.ndarray
+        relèvements VOR [deg] par balise ('bvs', 'dvl', 'pon', 'rou'), de
+        dimension (N,) ou (1, N) ; une balise absente ou une valeur nan
+        retire la mesure
+    dme_m : dict of np.ndarray
+        distances DME [m] par balise, mêmes conventions (valeur <= 0 ignorée)
+    sigma_vor_deg : float
+        écart-type des relèvements VOR [deg]
+    sigma_dme_m : float
+        écart-type des distances DME [m]
+    n_iterations : int
+        nombre maximal d'itérations de Gauss-Newton
+    tolerance_m : float
+        déplacement maximal [m] des points en dessous duquel les itérations s'arrêtent
+
+    Returns
+    -------
+    points : PointsVORDME
+        points, précision et résidus de chaque instant
+
+    """
+    noms = tuple(BALISES)
+    n = max(np.size(tab) for tab in (*vor_deg.values(), *dme_m.values()))
+    vor = np.full((n, len(noms)), np.nan)
+    dme = np.full((n, len(noms)), np.nan)
+    for k, nom in enumerate(noms):
+        if nom in vor_deg:
+            vor[:, k] = np.ravel(vor_deg[nom])
+        if nom in dme_m:
+            dme[:, k] = np.ravel(dme_m[nom])
+    dme[~(dme > 0)] = np.nan
+    vor = np.radians(vor)
+
+    # Balises dans le plan local centré sur leur barycentre, à partir de leurs
+    # positions ECEF, et passage du plan local au repère NED de chaque balise
+    lat_b = np.array([BALISES[nom].lat_rad for nom in noms])
+    lon_b = np.array([BALISES[nom].lon_rad for nom in noms])
+    ecef_b = np.stack([BALISES[nom].ecef for nom in noms])
+    lat0, lon0 = lat_b.mean(), lon_b.mean()
+    nord_b, est_b, _ = np.moveaxis(ecef_vers_ned(ecef_b, lat0, lon0), -1, 0)
+    r_b = matrice_ecef_ned(lat_b, lon_b)
+    geometrie = (
+        np.einsum("kij,kj->ki", r_b, geodesique_vers_ecef(lat0, lon0) - ecef_b),
+        r_b @ matrice_ecef_ned(lat0, lon0).T,
+        np.sqrt(np.prod(rayons_wgs84(lat0))),
+    )
+
+    # Poids des mesures (nuls pour les mesures absentes)
+    w_dme = np.where(np.isnan(dme), 0.0, 1.0 / sigma_dme_m**2)
+    w_vor = np.where(np.isnan(vor), 0.0, 1.0 / np.radians(sigma_vor_deg) ** 2)
+    dme0 = np.nan_to_num(dme)
+    vor0 = np.nan_to_num(vor)
+
+    # Point initial : moyenne des points d'une balise (relèvement et distance disponibles)
+    seul = np.where(np.isnan(dme) | np.isnan(vor), 0.0, 1.0)
+    nb_seul = seul.sum(axis=1)
+    x = np.stack(
+        [
+            (seul * (nord_b + dme0 * np.cos(vor0))).sum(axis=1),
+            (seul * (est_b + dme0 * np.sin(vor0))).sum(axis=1),
+        ],
+        axis=1,
+    ) / np.maximum(nb_seul, 1)[:, np.newaxis]
+    # Sans point isolé, départ au barycentre des balises entendues
+    entendues = (w_dme + w_vor) > 0
+    sans = nb_seul == 0
+    if np.any(sans):
+        nb_ent = np.maximum(entendues[sans].sum(axis=1), 1)
+        x[sans, 0] = (entendues[sans] * nord_b).sum(axis=1) / nb_ent
+        x[sans, 1] = (entendues[sans] * est_b).sum(axis=1) / nb_ent
+
+    # Seuls les points encore en mouvement sont itérés
+    actifs = np.arange(n)
+    for _ in range(n_iterations):
+        pas_n, pas_e = _pas_gauss_newton(
+            x[actifs], geometrie, dme0[actifs], vor0[actifs], w_dme[actifs], w_vor[actifs]
+        )
+        x[actifs, 0] -= pas_n
+        x[actifs, 1] -= pas_e
+        actifs = actifs[np.maximum(np.abs(pas_n), np.abs(pas_e)) >= tolerance_m]
+        if len(actifs) == 0:
+            break
+
+    # Précision et résidus au point final
+    dn, de, d_dn, d_de = _ecarts_balises(x, geometrie)
+    d, j_dme, j_vor = _jacobiennes(dn, de, d_dn, d_de)
+    residus_dme = d - dme
+    residus_vor = np.degrees((np.arctan2(de, dn) - vor + np.pi) % (2 * np.pi) - np.pi)
+    a00, a01, a11 = _normales(j_dme, j_vor, w_dme, w_vor)
+    det = a00 * a11 - a01 * a01
+    nb_mesures = (w_dme > 0).sum(axis=1) + (w_vor > 0).sum(axis=1)
+    valide = (nb_mesures >= 2) & (det > 1e-12 * a00 * a11) & np.isfinite(det)
+    sigma = np.where(valide, np.sqrt(np.abs((a00 + a11) / np.where(valide, det, 1.0))), np.nan)
+    x[~valide] = np.nan
+
+    lat, lon, _ = ecef_vers_geodesique(ned_vers_ecef(_plan_vers_ned(x, geometrie[2]), lat0, lon0))
+    return PointsVORDME(
+        Lat_deg=np.degrees(lat),
+        Lon_deg=np.degrees(lon),
+        nord_m=x[:, 0],
+        est_m=x[:, 1],
+        sigma_m=sigma,
+        hdop=sigma / sigma_dme_m,
+        residus_dme_m=residus_dme,
+        residus_vor_deg=residus_vor,
+        nb_mesures=nb_mesures,
+        balises=noms,
+    )
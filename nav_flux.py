@@ -0,0 +1,250 @@
+"""
+Description
+-----------
+
+Navigation en flux : les incréments inertiels arrivent par blocs (lecture
+d'un fichier par morceaux ou acquisition en direct) et la navigation est
+rendue bloc par bloc. Entre deux blocs, seuls l'état de l'intégrateur
+(EtatNav : t_b_g ou ses quaternions, vitesse géographique) et le dernier
+échantillon (entrées lues à t - 1 et sorties du pas précédent) sont
+conservés : la mémoire utilisée ne dépend que de la taille des blocs, pas de
+la durée de l'enregistrement.
+
+Le calcul de chaque bloc passe par noyau_nav.integrer_nav : les sorties sont
+identiques à celles de calcul_nav sur le même enregistrement complet, quel
+que soit le découpage en blocs.
+
+Classes Disponibles :
+
+   - class BlocInertiel
+   - class BlocNavigation
+   - class NavigationFlux
+
+Fonctions Disponibles :
+
+   - naviguer_flux : générateur des blocs de navigation d'un flux d'entrées
+   - decouper_entrees : découpage d'une structure NavInput en blocs
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from geodesie import RAD2DEG
+from Gerer_donnees import NavInput
+from noyau_nav import NUMBA_DISPONIBLE, EtatNav, integrer_nav
+
+# Champs des incréments lus par le noyau, dans l'ordre de integrer_nav
+_INCREMENTS = (
+    "inc_vit_x_ms",
+    "inc_vit_y_ms",
+    "inc_vit_z_ms",
+    "inc_angl_x_rad",
+    "inc_angl_y_rad",
+    "inc_angl_z_rad",
+)
+
+
+@dataclass
+class BlocInertiel:
+    """Bloc d'entrées inertielles, tous les tableaux sont de dimension (n,)"""
+
+    temps_s: np.ndarray = None
+    """Temps du système"""
+    inc_vit_x_ms: np.ndarray = None
+    """Incréments en vitesse sur l'axe X"""
+    inc_vit_y_ms: np.ndarray = None
+    """Incréments en vitesse sur l'axe Y"""
+    inc_vit_z_ms: np.ndarray = None
+    """Incréments en vitesse sur l'axe Z"""
+    inc_angl_x_rad: np.ndarray = None
+    """Incréments en angle sur l'axe X"""
+    inc_angl_y_rad: np.ndarray = None
+    """Incréments en angle sur l'axe Y"""
+    inc_angl_z_rad: np.ndarray = None
+    """Incréments en angle sur l'axe Z"""
+    Alt_calculee_m: np.ndarray = None
+    """Altitude [m], nulle si absente (la première valeur du flux est l'altitude initiale)"""
+
+
+@dataclass
+class BlocNavigation:
+    """Bloc de navigation calculée, tous les tableaux sont de dimension (n,)"""
+
+    temps_s: np.ndarray = None
+    """Temps du système"""
+    Lat_calculee_deg: np.ndarray = None
+    """Latitude calculée"""
+    Lon_calculee_deg: np.ndarray = None
+    """Longitude calculée"""
+    Cap_calcule_rad: np.ndarray = None
+    """Cap calculé"""
+    Roulis_calcule_rad: np.ndarray = None
+    """Roulis calculé"""
+    Tangage_calcule_rad: np.ndarray = None
+    """Tangage calculé"""
+    Vx_m: np.ndarray = None
+    """Vitesse sur l'axe X calculée [m/s]"""
+    Vy_m: np.ndarray = None
+    """Vitesse sur l'axe Y calculée [m/s]"""
+    Vz_m: np.ndarray = None
+    """Vitesse sur l'axe Z calculée [m/s]"""
+
+
+class NavigationFlux:
+    r"""Navigation incrémentale, alimentée bloc par bloc
+
+    Parameters
+    ----------
+    cap_initial_rad, lat_initiale_rad, lon_initiale_rad : float
+        conditions initiales [rad] (roulis et tangage initiaux nuls, comme calcul_nav)
+    alt_initiale_m : float
+        altitude initiale [m]
+    backend : str
+        'fusionne' ou 'numba' (noyau compilé si numba est installé)
+    attitude : str
+        propagation de l'attitude : 'dcm' ou 'quaternion'
+
+    """
+
+    def __init__(
+        self,
+        cap_initial_rad: float,
+        lat_initiale_rad: float,
+        lon_initiale_rad: float,
+        alt_initiale_m: float = 0.0,
+        backend: str = "fusionne",
+        attitude: str = "dcm",
+    ):
+        if backend not in ("fusionne", "numba"):
+            raise ValueError(f"backend inconnu : {backend!r}, choix disponibles : ('fusionne', 'numba')")
+        self.compile = backend == "numba" and NUMBA_DISPONIBLE
+        self.attitude = attitude
+        self.alt_initiale_m = alt_initiale_m
+        self.etat = EtatNav.initialiser(
+            cap_initial_rad, 0.0, 0.0, lat_initiale_rad, lon_initiale_rad
+        )
+        # Dernier échantillon : 6 incréments + altitude, puis les 8 sorties
+        # lat, lon, cap, rou, tan, vxm, vym, vzm [rad] et [m/s]
+        self._entrees_prec = None
+        self._sorties_prec = np.array(
+            [lat_initiale_rad, lon_initiale_rad, cap_initial_rad, 0.0, 0.0, 0.0, 0.0, 0.0]
+        )
+
+    @classmethod
+    def depuis_entrees(cls, data_in: NavInput, **options):
+        """Construit le navigateur à partir des conditions initiales d'une structure NavInput"""
+        return cls(
+            data_in.Cap_initial_rad,
+            data_in.Lat_initiale_rad,
+            data_in.Lon_initiale_rad,
+            data_in.Alt_initiale_m,
+            **options,
+        )
+
+    def traiter(self, bloc: BlocInertiel):
+        r"""Calcule la navigation des échantillons d'un bloc
+
+        Parameters
+        ----------
+        bloc : BlocInertiel
+            échantillons suivant ceux du bloc précédent
+
+        Returns
+        -------
+        sortie : BlocNavigation
+            navigation aux instants du bloc
+
+        """
+        n = len(bloc.temps_s)
+        alt = bloc.Alt_calculee_m if bloc.Alt_calculee_m is not None else np.zeros(n)
+        premier = self._entrees_prec is None
+        # Tableaux locaux : la ligne 0 reprend le dernier échantillon du bloc
+        # précédent (le pas t lit les entrées à t - 1) ; pour le premier bloc,
+        # la ligne 0 est l'instant initial.
+        decalage = 0 if premier else 1
+        entrees = np.empty((7, n + decalage))
+        for i, nom in enumerate(_INCREMENTS):
+            entrees[i, decalage:] = getattr(bloc, nom)
+        entrees[6, decalage:] = alt
+        sorties = np.zeros((8, n + decalage))
+        if premier:
+            entrees[6, 0] = self.alt_initiale_m
+        else:
+            entrees[:, 0] = self._entrees_prec
+        sorties[:, 0] = self._sorties_prec
+
+        if n + decalage > 1:
+            integrer_nav(
+                self.etat, *entrees, *sorties, 1, n + decalage,
+                progression=False, compile=self.compile, attitude=self.attitude,
+            )
+        self._entrees_prec = entrees[:, -1].copy()
+        self._sorties_prec = sorties[:, -1].copy()
+
+        lat, lon, cap, rou, tan, vxm, vym, vzm = sorties[:, decalage:]
+        return BlocNavigation(
+            temps_s=np.asarray(bloc.temps_s),
+            Lat_calculee_deg=lat * RAD2DEG,
+            Lon_calculee_deg=lon * RAD2DEG,
+            Cap_calcule_rad=cap,
+            Roulis_calcule_rad=rou,
+            Tangage_calcule_rad=tan,
+            Vx_m=vxm,
+            Vy_m=vym,
+            Vz_m=vzm,
+        )
+
+
+def naviguer_flux(blocs, navigateur: NavigationFlux):
+    r"""Générateur des blocs de navigation d'un flux de blocs inertiels
+
+    Parameters
+    ----------
+    blocs : iterable of BlocInertiel
+        blocs successifs (fichier lu par morceaux ou acquisition en direct)
+    navigateur : NavigationFlux
+        navigateur initialisé, dont l'état est conservé d'un bloc à l'autre
+
+    Yields
+    ------
+    sortie : BlocNavigation
+        navigation calculée de chaque bloc, dès sa réception
+
+    """
+    for bloc in blocs:
+        yield navigateur.traiter(bloc)
+
+
+def decouper_entrees(data_in: NavInput, taille_bloc: int = 65536):
+    r"""Découpe les entrées (1, N) d'une structure NavInput en blocs successifs
+
+    Les blocs sont des vues des tableaux d'origine : aucune copie n'est faite,
+    et des tableaux projetés en mémoire (np.load(..., mmap_mode='r')) ne sont
+    lus qu'au fil des blocs.
+
+    Parameters
+    ----------
+    data_in : NavInput
+        structure d'entrée (Alt_calculee_m facultative)
+    taille_bloc : int
+        nombre d'échantillons par bloc
+
+    Yields
+    ------
+    bloc : BlocInertiel
+        entrées des échantillons [i, i + taille_bloc)
+
+    """
+    n = np.shape(data_in.temps_s)[1]
+    for d in range(0, n, taille_bloc):
+        f = min(d + taille_bloc, n)
+        yield BlocInertiel(
+            temps_s=data_in.temps_s[0, d:f],
+            Alt_calculee_m=(
+                data_in.Alt_calculee_m[0, d:f] if data_in.Alt_calculee_m is not None else None
+            ),
+            **{nom: getattr(data_in, nom)[0, d:f] for nom in _INCREMENTS},
+        )
@@ -0,0 +1,240 @@
+"""
+Description
+-----------
+
+Navigation par lots : propage simultanément K navigations (conditions
+initiales, biais ou configurations différentes sur un même enregistrement)
+sous forme de tableaux empilés. L'état t_b_g est un tableau (K, 3, 3), la
+vitesse géographique un tableau (K, 3, 1), et chaque opération d'un pas est un
+seul appel vectorisé sur les K membres au lieu de K boucles interprétées.
+
+Les équations sont celles de la boucle de référence de Entretien_localisation.py
+(mode 'dcm') : chaque membre reproduit calcul_nav à l'arrondi près.
+
+Fonctions Disponibles :
+
+   - calcul_nav_lot : navigation de K structures NavInput en un seul passage
+   - propager_lot : propagation d'un état empilé sur un intervalle de pas
+
+--------------------------------
+"""
+
+from dataclasses import fields
+
+import numpy as np
+import tqdm
+
+from Entretien_localisation import creer_sortie
+from functions import compute_t_g_b, g_geo_vector, omega_inertial_vector
+from geodesie import DEG2RAD, RT
+from Gerer_donnees import NavOutput
+
+# Constantes utiles aux calculs (identiques à la boucle de référence)
+DT = 0.01  # pas de temps [s]
+
+# Champs d'entrée lus par la boucle, empilés au format (N, K)
+_ENTREES = (
+    "inc_vit_x_ms",
+    "inc_vit_y_ms",
+    "inc_vit_z_ms",
+    "inc_angl_x_rad",
+    "inc_angl_y_rad",
+    "inc_angl_z_rad",
+    "Alt_calculee_m",
+)
+
+
+def _t_g_t_lot(L: np.ndarray, G: np.ndarray):
+    """Version empilée de compute_t_g_t, de dimension (K, 3, 3)"""
+    sL, cL, sG, cG = np.sin(L), np.cos(L), np.sin(G), np.cos(G)
+    t = np.zeros(L.shape + (3, 3))
+    t[:, 0, 0] = -sL * cG
+    t[:, 0, 1] = -sL * sG
+    t[:, 0, 2] = cL
+    t[:, 1, 0] = sG
+    t[:, 1, 1] = -cG
+    t[:, 2, 0] = cL * cG
+    t[:, 2, 1] = cL * sG
+    t[:, 2, 2] = sL
+    return t
+
+
+def _omega_g_g_t_lot(v_gx, v_gy, z, lat):
+    """Version empilée de compute_omega_g_g_t, de dimension (K, 3, 1)"""
+    omega = np.zeros(np.shape(lat) + (3, 1))
+    omega[:, 1, 0] = v_gx / (RT + z)
+    omega[:, 2, 0] = -v_gy / ((RT + z) * np.cos(lat))
+    return omega
+
+
+def _antisymmetric_lot(u: np.ndarray):
+    """Version empilée de antisymmetric (même disposition des termes), (K, 3, 3)"""
+    u_x, u_y, u_z = u[:, 0, 0], u[:, 1, 0], u[:, 2, 0]
+    a = np.zeros(u.shape[:1] + (3, 3))
+    a[:, 0, 1] = -u_x
+    a[:, 0, 2] = u_y
+    a[:, 1, 0] = u_z
+    a[:, 1, 2] = -u_x
+    a[:, 2, 0] = -u_y
+    a[:, 2, 1] = u_x
+    return a
+
+
+def _empiler(donnees_in: list, nom: str):
+    """Empile un champ (1, N) des K membres au format (N, K)
+
+    Si tous les membres partagent le même tableau, il n'est pas recopié : la
+    vue (N, 1) est diffusée sur les K membres.
+    """
+    tableaux = [getattr(d, nom) for d in donnees_in]
+    if all(tab is tableaux[0] for tab in tableaux):
+        return tableaux[0][0][:, np.newaxis]
+    return np.stack([tab[0] for tab in tableaux], axis=1)
+
+
+def propager_lot(t_b_g, v_geo_vector, entrees, sorties, debut: int, fin: int, progression=False):
+    r"""Propage K navigations empilées sur les pas t de debut à fin - 1
+
+    Lit les valeurs à t - 1 et écrit les sorties à t, comme calcul_nav. L'état
+    est mis à jour en place, ce qui permet d'enchaîner des blocs de temps
+    successifs (la ligne 0 d'un bloc reprenant alors la dernière ligne du
+    bloc précédent).
+
+    Parameters
+    ----------
+    t_b_g : np.ndarray
+        matrices de passage géographique -> porteur, de dimension (K, 3, 3)
+    v_geo_vector : np.ndarray
+        vitesses géographiques, de dimension (K, 3, 1)
+    entrees : tuple of np.ndarray
+        ivx, ivy, ivz, iax, iay, iaz, alt, de dimension (N, K) ou (N, 1)
+    sorties : tuple of np.ndarray
+        lat, lon, cap, rou, tan, vxm, vym, vzm [rad] et [m/s], de dimension (N, K)
+    debut, fin : int
+        intervalle des pas à calculer (debut >= 1)
+    progression : bool
+        affichage d'une barre de progression
+
+    """
+    ivx, ivy, ivz, iax, iay, iaz, alt = entrees
+    lat, lon, cap, rou, tan, vxm, vym, vzm = sorties
+    k = t_b_g.shape[0]
+    for t in tqdm.tqdm(
+        range(debut, fin), desc=f"Processing inertial navigation (K={k})", disable=not progression
+    ):
+        # Vector of speed / angles increments, (K, 3, 1) ou diffusés (1, 3, 1)
+        Iv_b = np.stack((ivx[t - 1], ivy[t - 1], ivz[t - 1]), axis=-1)[..., np.newaxis]
+        Ia_b = np.stack((iax[t - 1], iay[t - 1], iaz[t - 1]), axis=-1)[..., np.newaxis]
+
+        # Accelerometers part
+        t_g_b = compute_t_g_b(cap[t - 1], rou[t - 1], tan[t - 1])
+        Iv_g = t_g_b @ Iv_b
+        t_g_t = _t_g_t_lot(lat[t - 1], lon[t - 1])
+        omega_g_t = _omega_g_g_t_lot(vxm[t - 1], vym[t - 1], alt[t - 1], lat[t - 1])
+        # Geographical speed integration
+        v_geo_vector[...] = (
+            v_geo_vector
+            + Iv_g
+            + (
+                g_geo_vector
+                - _antisymmetric_lot(omega_g_t + 2 * t_g_t @ omega_inertial_vector)
+                @ v_geo_vector
+            )
+            * DT
+        )
+        vxm[t] = v_geo_vector[:, 0, 0]
+        vym[t] = v_geo_vector[:, 1, 0]
+        vzm[t] = v_geo_vector[:, 2, 0]
+        # Computing omega_g_g_t = rho_g with NEW geo speeds, altitude and latitude
+        omega_g_g_t = _omega_g_g_t_lot(vxm[t], vym[t], alt[t], lat[t])
+        # Integration of t_g_t
+        t_g_t = t_g_t - _antisymmetric_lot(omega_g_g_t) @ t_g_t
+        lat[t] = np.arccos(t_g_t[:, 0, 2])
+        lon[t] = np.arcsin(t_g_t[:, 1, 0])
+
+        # Gyrometers part
+        omega_b_g_t = t_b_g @ omega_g_g_t
+        omega_b_t_i = t_b_g @ t_g_t @ omega_inertial_vector
+        omega_b_b_g = Ia_b - omega_b_g_t - omega_b_t_i
+        # Integration of t_b_g
+        t_b_g[...] = t_b_g - _antisymmetric_lot(omega_b_b_g) @ t_b_g * DT
+        tan[t] = np.arcsin(t_b_g[:, 0, 2])
+        cos_tan = np.cos(tan[t])
+        rou[t] = np.arcsin(-t_b_g[:, 1, 2] / cos_tan)
+        cap[t] = np.arccos(t_b_g[:, 0, 0] / cos_tan)
+
+
+def calcul_nav_lot(
+    donnees_in: list,
+    donnees_NI_dispo: bool = False,
+    empiler: bool = False,
+    progression: bool = True,
+):
+    r"""Calcule en un seul passage la navigation de K structures NavInput
+
+    Parameters
+    ----------
+    donnees_in : list of NavInput
+        K structures allouées (alloc_memoire) de même durée N ; les champs
+        identiques (même objet) entre membres ne sont pas dupliqués
+    donnees_NI_dispo : bool
+        présence de données non inertielles
+    empiler : bool
+        si True, renvoie une seule structure NavOutput dont chaque champ est
+        de dimension (K, N) au lieu d'une liste de K structures
+    progression : bool
+        affichage d'une barre de progression
+
+    Returns
+    -------
+    donnees_out : list of NavOutput or NavOutput
+        une structure par membre, ou une structure empilée
+
+    """
+    n = np.shape(donnees_in[0].temps_s)[1]
+    if any(np.shape(d.temps_s)[1] != n for d in donnees_in):
+        raise ValueError("tous les membres du lot doivent avoir la même durée")
+    k = len(donnees_in)
+
+    # Initialisation de la navigation de chaque membre
+    for d in donnees_in:
+        d.Alt_calculee_m[0, 0] = d.Alt_initiale_m
+    ivx, ivy, ivz, iax, iay, iaz, alt = (_empiler(donnees_in, nom) for nom in _ENTREES)
+    lat = np.stack([d.Lat_calculee_deg[0] * DEG2RAD for d in donnees_in], axis=1)
+    lon = np.stack([d.Lon_calculee_deg[0] * DEG2RAD for d in donnees_in], axis=1)
+    cap = np.zeros((n, k))
+    rou = np.zeros((n, k))
+    tan = np.zeros((n, k))
+    vxm = np.stack([d.Vx_m[0] for d in donnees_in], axis=1)
+    vym = np.stack([d.Vy_m[0] for d in donnees_in], axis=1)
+    vzm = np.stack([d.Vz_m[0] for d in donnees_in], axis=1)
+    cap[0] = [d.Cap_initial_rad for d in donnees_in]
+    lat[0] = [d.Lat_initiale_rad for d in donnees_in]
+    lon[0] = [d.Lon_initiale_rad for d in donnees_in]
+
+    t_b_g = np.transpose(compute_t_g_b(cap[0], rou[0], tan[0]), (0, 2, 1))
+    v_geo_vector = np.zeros((k, 3, 1))
+    propager_lot(
+        t_b_g, v_geo_vector, (ivx, ivy, ivz, iax, iay, iaz, alt),
+        (lat, lon, cap, rou, tan, vxm, vym, vzm), 1, n, progression,
+    )
+
+    # Recopie des résultats de chaque membre dans sa structure, comme calcul_nav
+    donnees_out = []
+    for i, d in enumerate(donnees_in):
+        d.Cap_calcule_rad[0] = cap[:, i]
+        d.Roulis_calcule_rad[0] = rou[:, i]
+        d.Tangage_calcule_rad[0] = tan[:, i]
+        d.Vx_m[0] = vxm[:, i]
+        d.Vy_m[0] = vym[:, i]
+        d.Vz_m[0] = vzm[:, i]
+        donnees_out.append(creer_sortie(d, lon[:, i][np.newaxis, :], lat[:, i][np.newaxis, :]))
+    if not empiler:
+        return donnees_out
+    return NavOutput(
+        **{
+            f.name: np.concatenate([getattr(o, f.name) for o in donnees_out], axis=0)
+            for f in fields(NavOutput)
+            if getattr(donnees_out[0], f.name) is not None
+        }
+    )
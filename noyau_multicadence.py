@@ -0,0 +1,262 @@
+"""
+Description
+-----------
+
+Navigation multi-cadence : les incréments à 100 Hz sont cumulés par époques de
+m échantillons (10 Hz pour m = 10), avec compensation du coning sur les
+incréments d'angle et de la rotation / du sculling sur les incréments de
+vitesse, puis les mises à jour de l'attitude, de la vitesse et de t_g_t ne
+sont faites qu'une fois par époque. Le cumul est vectorisé (numpy) et le
+noyau scalaire ne tourne qu'aux époques : le travail par échantillon est
+divisé d'autant.
+
+Sur une époque de m pas, les équations sont celles de noyau_nav.boucle_fusionnee
+avec les incréments cumulés et les termes d'un pas multipliés par m (gravité,
+Coriolis, taux de transport et rotation terrestre) : pour m = 1, le noyau
+reproduit la boucle de référence à la compensation près (nulle sur un pas
+pour le coning, du second ordre pour la vitesse). Les sorties entre deux
+époques sont interpolées linéairement.
+
+Compensations (forme récursive, alpha_k = somme des incréments d'angle de
+l'époque jusqu'au pas k) :
+
+   - coning : phi = alpha_m + 1/2 * somme(alpha_{k-1} x dtheta_k)
+   - rotation + sculling : dv = somme(dv_k + (alpha_{k-1} + dtheta_k / 2) x dv_k)
+
+Fonctions Disponibles :
+
+   - increments_epoques : cumul compensé des incréments par époque
+   - boucle_multicadence : noyau scalaire sur les époques
+   - integrer_multicadence : exécution par blocs sur des tableaux (N,)
+
+--------------------------------
+"""
+
+import math
+
+import numpy as np
+import tqdm
+
+from noyau_nav import DT, G, NUMBA_DISPONIBLE, OMEGA_T, RT, TAILLE_BLOC, EtatNav
+
+if NUMBA_DISPONIBLE:
+    import numba
+
+
+def increments_epoques(ivx, ivy, ivz, iax, iay, iaz, debuts):
+    r"""Cumule les incréments par époque avec compensation coning / sculling
+
+    Parameters
+    ----------
+    ivx, ivy, ivz, iax, iay, iaz : np.ndarray
+        incréments de vitesse [m/s] et d'angle [rad] des L échantillons, de dimension (L,)
+    debuts : np.ndarray
+        indice du premier échantillon de chaque époque (debuts[0] = 0), de dimension (E,)
+
+    Returns
+    -------
+    dvx, dvy, dvz, phx, phy, phz : np.ndarray
+        incréments de vitesse et vecteurs rotation compensés par époque, de dimension (E,)
+
+    """
+    dth = np.stack((iax, iay, iaz), axis=1)
+    dv = np.stack((ivx, ivy, ivz), axis=1)
+    nb = np.diff(np.append(debuts, len(dth)))
+    # alpha_{k-1} : rotation cumulée depuis le début de l'époque avant le pas k
+    cumul = np.cumsum(dth, axis=0) - dth
+    alpha_prec = cumul - np.repeat(cumul[debuts], nb, axis=0)
+    coning = np.add.reduceat(np.cross(alpha_prec, dth), debuts, axis=0)
+    phi = np.add.reduceat(dth, debuts, axis=0) + 0.5 * coning
+    dv_epoque = np.add.reduceat(dv + np.cross(alpha_prec + 0.5 * dth, dv), debuts, axis=0)
+    return (*dv_epoque.T, *phi.T)
+
+
+def boucle_multicadence(
+    b, v, dvx, dvy, dvz, phx, phy, phz, nb, alt, lat, lon, cap, rou, tan,
+    vxm, vym, vzm, debut, fin,
+):
+    r"""Noyau scalaire de la navigation aux époques, itère les époques t de debut à fin - 1
+
+    Mêmes conventions que noyau_nav.boucle_fusionnee, l'indice t désignant
+    ici une époque : les incréments de l'époque t - 1 -> t sont lus à t - 1.
+
+    Parameters
+    ----------
+    b, v : sequence
+        tampons (9,) de t_b_g et (3,) de la vitesse géographique
+    dvx, dvy, dvz, phx, phy, phz : sequence
+        incréments compensés de chaque époque (increments_epoques)
+    nb : sequence
+        nombre de pas de 100 Hz de chaque époque
+    alt, lat, lon, cap, rou, tan, vxm, vym, vzm : sequence
+        valeurs aux bornes des époques, comme boucle_fusionnee
+    debut, fin : int
+        intervalle des époques à calculer (debut >= 1)
+
+    """
+    b00, b01, b02 = b[0], b[1], b[2]
+    b10, b11, b12 = b[3], b[4], b[5]
+    b20, b21, b22 = b[6], b[7], b[8]
+    v0, v1, v2 = v[0], v[1], v[2]
+    deux_omega = 2.0 * OMEGA_T
+
+    for t in range(debut, fin):
+        m = nb[t - 1]
+        dtm = m * DT
+
+        # Accelerometers part : t_g_b (début d'époque) @ incrément compensé
+        sK = math.sin(cap[t - 1])
+        cK = math.cos(cap[t - 1])
+        sR = math.sin(rou[t - 1])
+        cR = math.cos(rou[t - 1])
+        sT = math.sin(tan[t - 1])
+        cT = math.cos(tan[t - 1])
+        x = dvx[t - 1]
+        y = dvy[t - 1]
+        z = dvz[t - 1]
+        sTsR = sT * sR
+        sTcR = sT * cR
+        ivg0 = cK * cT * x + (-sK * cR + cK * sTsR) * y + (sK * sR + cK * sTcR) * z
+        ivg1 = -sK * cT * x + (-cK * cR - sK * sTsR) * y + (cK * sR - sK * sTcR) * z
+        ivg2 = sT * x - cT * sR * y - cT * cR * z
+
+        sL = math.sin(lat[t - 1])
+        cL = math.cos(lat[t - 1])
+        sG = math.sin(lon[t - 1])
+        cG = math.cos(lon[t - 1])
+
+        # Geographical speed integration sur la durée de l'époque
+        rz = RT + alt[t - 1]
+        w0 = deux_omega * cL
+        w1 = vxm[t - 1] / rz
+        w2 = -vym[t - 1] / (rz * cL) + deux_omega * sL
+        a0 = -w0 * v1 + w1 * v2
+        a1 = w2 * v0 - w0 * v2
+        a2 = -w1 * v0 + w0 * v1
+        v0 = v0 + ivg0 + (0.0 - a0) * dtm
+        v1 = v1 + ivg1 + (0.0 - a1) * dtm
+        v2 = v2 + ivg2 + (G - a2) * dtm
+        vxm[t] = v0
+        vym[t] = v1
+        vzm[t] = v2
+
+        # Taux de transport cumulé sur les m pas (t_g_t intégrée sans dt,
+        # comme la référence)
+        rz = RT + alt[t]
+        rg1 = m * v0 / rz
+        rg2 = -m * v1 / (rz * math.cos(lat[t]))
+
+        q02 = cL - rg1 * sL
+        q10 = sG + rg2 * sL * cG
+        q12 = -rg2 * cL
+        q22 = sL + rg1 * cL
+        lat[t] = math.acos(q02) if -1.0 <= q02 <= 1.0 else math.nan
+        lon[t] = math.asin(q10) if -1.0 <= q10 <= 1.0 else math.nan
+
+        # Gyrometers part : rotation compensée moins m pas de transport et de rotation terrestre
+        e0 = m * OMEGA_T * q02
+        e1 = m * OMEGA_T * q12
+        e2 = m * OMEGA_T * q22
+        o0 = phx[t - 1] - (b01 * rg1 + b02 * rg2) - (b00 * e0 + b01 * e1 + b02 * e2)
+        o1 = phy[t - 1] - (b11 * rg1 + b12 * rg2) - (b10 * e0 + b11 * e1 + b12 * e2)
+        o2 = phz[t - 1] - (b21 * rg1 + b22 * rg2) - (b20 * e0 + b21 * e1 + b22 * e2)
+
+        n00 = b00 - (-o0 * b10 + o1 * b20) * DT
+        n01 = b01 - (-o0 * b11 + o1 * b21) * DT
+        n02 = b02 - (-o0 * b12 + o1 * b22) * DT
+        n10 = b10 - (o2 * b00 - o0 * b20) * DT
+        n11 = b11 - (o2 * b01 - o0 * b21) * DT
+        n12 = b12 - (o2 * b02 - o0 * b22) * DT
+        n20 = b20 - (-o1 * b00 + o0 * b10) * DT
+        n21 = b21 - (-o1 * b01 + o0 * b11) * DT
+        n22 = b22 - (-o1 * b02 + o0 * b12) * DT
+        b00, b01, b02 = n00, n01, n02
+        b10, b11, b12 = n10, n11, n12
+        b20, b21, b22 = n20, n21, n22
+
+        T = math.asin(b02) if -1.0 <= b02 <= 1.0 else math.nan
+        cT = math.cos(T)
+        r = -b12 / cT
+        k = b00 / cT
+        tan[t] = T
+        rou[t] = math.asin(r) if -1.0 <= r <= 1.0 else math.nan
+        cap[t] = math.acos(k) if -1.0 <= k <= 1.0 else math.nan
+
+    b[0], b[1], b[2] = b00, b01, b02
+    b[3], b[4], b[5] = b10, b11, b12
+    b[6], b[7], b[8] = b20, b21, b22
+    v[0], v[1], v[2] = v0, v1, v2
+
+
+if NUMBA_DISPONIBLE:
+    _NOYAU_COMPILE = numba.njit(cache=True)(boucle_multicadence)
+
+
+def integrer_multicadence(
+    etat: EtatNav, ivx, ivy, ivz, iax, iay, iaz, alt, lat, lon, cap, rou, tan,
+    vxm, vym, vzm, m: int, progression: bool = True, compile: bool = False,
+):
+    r"""Exécute la navigation multi-cadence sur les tableaux (N,) de la navigation
+
+    Les époques commencent tous les m échantillons depuis l'échantillon 0 (la
+    dernière peut être plus courte). Le calcul avance par blocs d'environ
+    TAILLE_BLOC échantillons : la mémoire temporaire reste bornée.
+
+    Parameters
+    ----------
+    etat : EtatNav
+        état de l'intégrateur (t_b_g, vitesse), mis à jour en place
+    ivx, ..., vzm : np.ndarray
+        mêmes tableaux que noyau_nav.integrer_nav, de dimension (N,) ; les
+        sorties sont écrites aux bornes des époques et interpolées entre elles
+    m : int
+        nombre d'échantillons par époque (10 pour une mise à jour à 10 Hz)
+    progression : bool
+        affichage d'une barre de progression
+    compile : bool
+        utilisation du noyau compilé par numba (NUMBA_DISPONIBLE requis)
+
+    """
+    if m < 1:
+        raise ValueError(f"le nombre d'échantillons par époque doit être >= 1, reçu {m}")
+    if compile and not NUMBA_DISPONIBLE:
+        raise ImportError("numba n'est pas installé, noyau compilé indisponible")
+    noyau = _NOYAU_COMPILE if compile else boucle_multicadence
+    n = len(lat)
+    bornes = np.append(np.arange(0, n - 1, m), n - 1)
+    b = etat.t_b_g.reshape(9)
+    v = etat.v_geo
+    if not compile:
+        b, v = b.tolist(), v.tolist()
+    sorties = (lat, lon, cap, rou, tan, vxm, vym, vzm)
+    epoques_par_bloc = max(1, TAILLE_BLOC // m)
+
+    barre = tqdm.tqdm(total=n - 1, desc=f"Processing inertial navigation (1/{m})", disable=not progression)
+    for e0 in range(0, len(bornes) - 1, epoques_par_bloc):
+        e1 = min(e0 + epoques_par_bloc, len(bornes) - 1)
+        s, f = bornes[e0], bornes[e1]
+        increments = increments_epoques(
+            ivx[s:f], ivy[s:f], ivz[s:f], iax[s:f], iay[s:f], iaz[s:f], bornes[e0:e1] - s
+        )
+        nb = np.diff(bornes[e0 : e1 + 1])
+        # Valeurs aux bornes des époques du bloc (la ligne 0 est déjà calculée)
+        idx = bornes[e0 : e1 + 1]
+        local_alt = alt[idx]
+        local_sorties = [tab[idx] for tab in sorties]
+        if compile:
+            noyau(b, v, *increments, nb.astype(np.float64), local_alt, *local_sorties, 1, e1 - e0 + 1)
+        else:
+            local_sorties = [tab.tolist() for tab in local_sorties]
+            noyau(
+                b, v, *(tab.tolist() for tab in increments), nb.tolist(), local_alt.tolist(),
+                *local_sorties, 1, e1 - e0 + 1,
+            )
+        # Interpolation linéaire des échantillons entre les bornes
+        echantillons = np.arange(s, f + 1)
+        for tab, valeurs in zip(sorties, local_sorties):
+            tab[s : f + 1] = np.interp(echantillons, idx, valeurs)
+        barre.update(f - s)
+    barre.close()
+    if not compile:
+        etat.t_b_g[...] = np.reshape(b, (3, 3))
+        etat.v_geo[...] = v
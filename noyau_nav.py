@@ -0,0 +1,517 @@
+"""
+Description
+-----------
+
+Noyau de calcul fusionné de la navigation inertielle. Chaque pas de la boucle à
+100 Hz de calcul_nav est ici écrit sous forme scalaire déroulée : aucune matrice
+3x3 n'est créée, les sinus/cosinus sont partagés entre les termes qui les
+utilisent et l'état de l'intégrateur (t_b_g, vitesse géographique) vit dans des
+tampons préalloués.
+
+Les équations sont strictement celles de la boucle de référence de
+Entretien_localisation.py (mêmes entrées, mêmes sorties, mêmes conventions).
+
+Si numba est installé, le même noyau est compilé à la première utilisation
+(cache disque activé : la compilation n'est payée qu'une fois par machine).
+Sans numba, le noyau s'exécute en Python pur.
+
+Le mode 'quaternion' remplace l'intégration au premier ordre des matrices
+t_b_g et t_g_t par une mise à jour exacte par vecteur rotation de quaternions
+renormalisés : les matrices restent orthonormées, les angles extraits restent
+dans le domaine de arcsin/arccos et les sin/cos de reconstruction de t_g_b et
+t_g_t à chaque pas disparaissent.
+
+Classes Disponibles :
+
+   - class EtatNav
+
+Fonctions Disponibles :
+
+   - boucle_fusionnee : noyau scalaire sur un intervalle [debut, fin),
+     horodaté étape par étape sur demande
+   - boucle_quaternion : variante propageant t_b_g et t_g_t en quaternions
+   - integrer_nav : exécution du noyau par blocs sur des tableaux (N,)
+
+Constantes Disponibles :
+
+   - NUMBA_DISPONIBLE : True si le noyau compilé peut être utilisé
+   - TOLERANCE_NOYAUX : écart maximal garanti [rad] entre noyaux et référence
+   - ETAPES : étapes d'un pas horodatées par boucle_fusionnee (profilage)
+
+--------------------------------
+"""
+
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import tqdm
+
+from geodesie import RT
+from functions import compute_t_g_b, compute_t_g_t, dcm_to_quaternion, quaternion_to_dcm
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_DISPONIBLE = numba is not None
+
+# Constantes utiles aux calculs (identiques à la boucle de référence)
+G = 9.81  # attraction terrestre [m/s^2]
+DT = 0.01  # pas de temps [s]
+OMEGA_T = 15 * np.pi / 180 / 3600  # rotation terrestre [rad/s]
+
+# Taille des blocs traités par integrer_nav entre deux mises à jour de la
+# barre de progression (et convertis en listes Python pour le noyau interprété)
+TAILLE_BLOC = 65536
+
+# Écart maximal constaté entre les noyaux fusionné/compilé et la boucle de
+# référence sur les angles [rad] : seuls l'ordre des opérations et la
+# bibliothèque mathématique diffèrent (pas de fastmath)
+TOLERANCE_NOYAUX = 1e-9
+
+# Étapes d'un pas de boucle_fusionnee horodatées quand cumuls est fourni, dans
+# l'ordre d'exécution (l'intégration de t_g_t, quelques multiplications, est
+# comptée avec l'extraction de la position qu'elle précède)
+ETAPES = (
+    "accelerometres",
+    "rotations_terre_transport",
+    "position",
+    "integration_t_b_g",
+    "extraction_attitude",
+)
+
+
+@dataclass
+class EtatNav:
+    """État de l'intégrateur, seul élément conservé d'un pas au suivant"""
+
+    t_b_g: np.ndarray = None
+    """Matrice de passage du repère géographique au repère porteur, de dimension (3, 3)"""
+    v_geo: np.ndarray = None
+    """Vitesse géographique intégrée [m/s], de dimension (3,)"""
+    q_b_g: np.ndarray = None
+    """Quaternion [w, x, y, z] de t_b_g (mode quaternion), de dimension (4,)"""
+    q_g_t: np.ndarray = None
+    """Quaternion [w, x, y, z] de t_g_t (mode quaternion), de dimension (4,)"""
+
+    @classmethod
+    def initialiser(
+        cls, cap: float, roulis: float, tangage: float, lat: float = 0.0, lon: float = 0.0
+    ):
+        """Construit l'état initial à partir des attitudes et de la position initiales [rad]"""
+        t_b_g = np.ascontiguousarray(compute_t_g_b(cap, roulis, tangage).T)
+        return cls(
+            t_b_g=t_b_g,
+            v_geo=np.zeros(3),
+            q_b_g=dcm_to_quaternion(t_b_g),
+            q_g_t=dcm_to_quaternion(compute_t_g_t(lat, lon)),
+        )
+
+
+def boucle_fusionnee(
+    b, v, ivx, ivy, ivz, iax, iay, iaz, alt, lat, lon, cap, rou, tan,
+    vxm, vym, vzm, debut, fin, cumuls=None,
+):
+    r"""Noyau scalaire de la navigation, itère les pas t de debut à fin - 1
+
+    Lit les valeurs à t - 1 et écrit les sorties à t, exactement comme la
+    boucle de référence. Fonctionne indifféremment sur des listes Python ou
+    sur des tableaux numpy 1D (et reste compilable par numba).
+
+    Si cumuls est fourni, chaque étape de ETAPES est horodatée à chaque pas
+    (profilage_nav.py) ; les calculs sont inchangés. Sans cumuls, les
+    horodatages se réduisent à un test par étape (supprimé par numba).
+
+    Parameters
+    ----------
+    b : sequence
+        tampon à plat (9,) de t_b_g, lu au début et réécrit à la fin
+    v : sequence
+        tampon (3,) de la vitesse géographique, lu au début et réécrit à la fin
+    ivx, ivy, ivz, iax, iay, iaz : sequence
+        incréments de vitesse [m/s] et d'angle [rad], de dimension (N,)
+    alt : sequence
+        altitude [m], de dimension (N,) (lecture seule)
+    lat, lon, cap, rou, tan, vxm, vym, vzm : sequence
+        sorties [rad] et [m/s], de dimension (N,), écrites pour t dans [debut, fin)
+    debut, fin : int
+        intervalle des pas à calculer (debut >= 1)
+    cumuls : list
+        durées cumulées [ns] de chaque étape de ETAPES, complétées en place ;
+        si None, aucun horodatage
+
+    """
+    b00, b01, b02 = b[0], b[1], b[2]
+    b10, b11, b12 = b[3], b[4], b[5]
+    b20, b21, b22 = b[6], b[7], b[8]
+    v0, v1, v2 = v[0], v[1], v[2]
+    deux_omega = 2.0 * OMEGA_T
+    if cumuls is not None:
+        horloge = time.perf_counter_ns
+
+    for t in range(debut, fin):
+        if cumuls is not None:
+            h0 = horloge()
+        # Accelerometers part : t_g_b @ Iv_b avec trigo partagée
+        sK = math.sin(cap[t - 1])
+        cK = math.cos(cap[t - 1])
+        sR = math.sin(rou[t - 1])
+        cR = math.cos(rou[t - 1])
+        sT = math.sin(tan[t - 1])
+        cT = math.cos(tan[t - 1])
+        x = ivx[t - 1]
+        y = ivy[t - 1]
+        z = ivz[t - 1]
+        sTsR = sT * sR
+        sTcR = sT * cR
+        ivg0 = cK * cT * x + (-sK * cR + cK * sTsR) * y + (sK * sR + cK * sTcR) * z
+        ivg1 = -sK * cT * x + (-cK * cR - sK * sTsR) * y + (cK * sR - sK * sTcR) * z
+        ivg2 = sT * x - cT * sR * y - cT * cR * z
+        if cumuls is not None:
+            h1 = horloge()
+
+        # t_g_t reconstruite à partir de la position précédente
+        sL = math.sin(lat[t - 1])
+        cL = math.cos(lat[t - 1])
+        sG = math.sin(lon[t - 1])
+        cG = math.cos(lon[t - 1])
+
+        # Geographical speed integration (omega_g_t + 2 t_g_t @ omega_i)
+        rz = RT + alt[t - 1]
+        w0 = deux_omega * cL
+        w1 = vxm[t - 1] / rz
+        w2 = -vym[t - 1] / (rz * cL) + deux_omega * sL
+        a0 = -w0 * v1 + w1 * v2
+        a1 = w2 * v0 - w0 * v2
+        a2 = -w1 * v0 + w0 * v1
+        v0 = v0 + ivg0 + (0.0 - a0) * DT
+        v1 = v1 + ivg1 + (0.0 - a1) * DT
+        v2 = v2 + ivg2 + (G - a2) * DT
+        vxm[t] = v0
+        vym[t] = v1
+        vzm[t] = v2
+
+        # omega_g_g_t avec les nouvelles vitesses ; altitude et latitude lues
+        # à t avant écriture, comme dans la boucle de référence
+        rz = RT + alt[t]
+        rg1 = v0 / rz
+        rg2 = -v1 / (rz * math.cos(lat[t]))
+        if cumuls is not None:
+            h2 = horloge()
+
+        # Integration of t_g_t : seuls les termes utiles sont calculés
+        q02 = cL - rg1 * sL
+        q10 = sG + rg2 * sL * cG
+        q12 = -rg2 * cL
+        q22 = sL + rg1 * cL
+        lat[t] = math.acos(q02) if -1.0 <= q02 <= 1.0 else math.nan
+        lon[t] = math.asin(q10) if -1.0 <= q10 <= 1.0 else math.nan
+        if cumuls is not None:
+            h3 = horloge()
+
+        # Gyrometers part : omega_b_b_g = Ia_b - t_b_g @ rho_g - t_b_g @ t_g_t @ omega_i
+        e0 = OMEGA_T * q02
+        e1 = OMEGA_T * q12
+        e2 = OMEGA_T * q22
+        o0 = iax[t - 1] - (b01 * rg1 + b02 * rg2) - (b00 * e0 + b01 * e1 + b02 * e2)
+        o1 = iay[t - 1] - (b11 * rg1 + b12 * rg2) - (b10 * e0 + b11 * e1 + b12 * e2)
+        o2 = iaz[t - 1] - (b21 * rg1 + b22 * rg2) - (b20 * e0 + b21 * e1 + b22 * e2)
+
+        # Integration of t_b_g : t_b_g - antisymmetric(o) @ t_b_g * dt
+        n00 = b00 - (-o0 * b10 + o1 * b20) * DT
+        n01 = b01 - (-o0 * b11 + o1 * b21) * DT
+        n02 = b02 - (-o0 * b12 + o1 * b22) * DT
+        n10 = b10 - (o2 * b00 - o0 * b20) * DT
+        n11 = b11 - (o2 * b01 - o0 * b21) * DT
+        n12 = b12 - (o2 * b02 - o0 * b22) * DT
+        n20 = b20 - (-o1 * b00 + o0 * b10) * DT
+        n21 = b21 - (-o1 * b01 + o0 * b11) * DT
+        n22 = b22 - (-o1 * b02 + o0 * b12) * DT
+        b00, b01, b02 = n00, n01, n02
+        b10, b11, b12 = n10, n11, n12
+        b20, b21, b22 = n20, n21, n22
+        if cumuls is not None:
+            h4 = horloge()
+
+        # extract_h_r_p
+        T = math.asin(b02) if -1.0 <= b02 <= 1.0 else math.nan
+        cT = math.cos(T)
+        r = -b12 / cT
+        k = b00 / cT
+        tan[t] = T
+        rou[t] = math.asin(r) if -1.0 <= r <= 1.0 else math.nan
+        cap[t] = math.acos(k) if -1.0 <= k <= 1.0 else math.nan
+        if cumuls is not None:
+            h5 = horloge()
+            cumuls[0] += h1 - h0
+            cumuls[1] += h2 - h1
+            cumuls[2] += h3 - h2
+            cumuls[3] += h4 - h3
+            cumuls[4] += h5 - h4
+
+    b[0], b[1], b[2] = b00, b01, b02
+    b[3], b[4], b[5] = b10, b11, b12
+    b[6], b[7], b[8] = b20, b21, b22
+    v[0], v[1], v[2] = v0, v1, v2
+
+
+def boucle_quaternion(
+    qb, qt, v, ivx, ivy, ivz, iax, iay, iaz, alt, lat, lon, cap, rou, tan,
+    vxm, vym, vzm, debut, fin,
+):
+    r"""Noyau scalaire de la navigation en mode quaternion
+
+    Mêmes entrées, mêmes sorties et mêmes vitesses de rotation que
+    boucle_fusionnee, mais t_b_g et t_g_t sont portées par des quaternions
+    unitaires mis à jour par q <- dq(-phi) * q, où phi est l'incrément de
+    rotation du pas (identique à celui appliqué par la boucle DCM, y compris
+    l'intégration de t_g_t sans dt de la référence). t_b_g est reconstruite
+    une seule fois par pas, après la mise à jour de qb, et sert à l'extraction
+    des angles puis au pas suivant ; de t_g_t, seuls les termes utiles sont
+    calculés.
+
+    Parameters
+    ----------
+    qb, qt : sequence
+        quaternions (4,) de t_b_g et t_g_t, lus au début et réécrits à la fin
+    v : sequence
+        tampon (3,) de la vitesse géographique, lu au début et réécrit à la fin
+    ivx, ..., vzm, debut, fin :
+        voir boucle_fusionnee
+
+    """
+    bw, bx, by, bz = qb[0], qb[1], qb[2], qb[3]
+    tw, tx, ty, tz = qt[0], qt[1], qt[2], qt[3]
+    v0, v1, v2 = v[0], v[1], v[2]
+    deux_omega = 2.0 * OMEGA_T
+
+    # t_b_g = R(qb) et troisième colonne de t_g_t = R(qt) : (cos L, ., sin L),
+    # recalculées en fin de pas et reportées au pas suivant
+    x2 = bx + bx
+    y2 = by + by
+    z2 = bz + bz
+    xx, yy, zz = bx * x2, by * y2, bz * z2
+    xy, xz, yz = bx * y2, bx * z2, by * z2
+    wx, wy, wz = bw * x2, bw * y2, bw * z2
+    b00, b01, b02 = 1.0 - (yy + zz), xy - wz, xz + wy
+    b10, b11, b12 = xy + wz, 1.0 - (xx + zz), yz - wx
+    b20, b21, b22 = xz - wy, yz + wx, 1.0 - (xx + yy)
+    p02 = 2.0 * (tx * tz + tw * ty)
+    p12 = 2.0 * (ty * tz - tw * tx)
+    p22 = 1.0 - 2.0 * (tx * tx + ty * ty)
+
+    for t in range(debut, fin):
+        # Accelerometers part : t_g_b @ Iv_b, t_g_b étant la transposée de t_b_g
+        x = ivx[t - 1]
+        y = ivy[t - 1]
+        z = ivz[t - 1]
+        ivg0 = b00 * x + b10 * y + b20 * z
+        ivg1 = b01 * x + b11 * y + b21 * z
+        ivg2 = b02 * x + b12 * y + b22 * z
+
+        # Geographical speed integration (omega_g_t + 2 t_g_t @ omega_i)
+        rz = RT + alt[t - 1]
+        w0 = deux_omega * p02
+        w1 = vxm[t - 1] / rz + deux_omega * p12
+        w2 = -vym[t - 1] / (rz * p02) + deux_omega * p22
+        a0 = -w0 * v1 + w1 * v2
+        a1 = w2 * v0 - w0 * v2
+        a2 = -w1 * v0 + w0 * v1
+        v0 = v0 + ivg0 + (0.0 - a0) * DT
+        v1 = v1 + ivg1 + (0.0 - a1) * DT
+        v2 = v2 + ivg2 + (G - a2) * DT
+        vxm[t] = v0
+        vym[t] = v1
+        vzm[t] = v2
+
+        # omega_g_g_t, altitude et latitude lues à t comme dans la référence
+        rz = RT + alt[t]
+        rg1 = v0 / rz
+        rg2 = -v1 / (rz * math.cos(lat[t]))
+
+        # qt <- dq(-rho) * qt, rho = (0, rg1, rg2) ; s porte le signe de -rho
+        th2 = rg1 * rg1 + rg2 * rg2
+        if th2 < 1e-8:
+            c = 1.0 - th2 * 0.125
+            s = th2 / 48.0 - 0.5
+        else:
+            th = math.sqrt(th2)
+            c = math.cos(0.5 * th)
+            s = -math.sin(0.5 * th) / th
+        dy = s * rg1
+        dz = s * rg2
+        nw = c * tw - dy * ty - dz * tz
+        nx = c * tx + dy * tz - dz * ty
+        ny = c * ty + dy * tw + dz * tx
+        nz = c * tz + dz * tw - dy * tx
+        # Renormalisation au premier ordre (|q| reste à 1 près de l'arrondi)
+        k = 1.5 - 0.5 * (nw * nw + nx * nx + ny * ny + nz * nz)
+        tw = nw * k
+        tx = nx * k
+        ty = ny * k
+        tz = nz * k
+
+        p02 = 2.0 * (tx * tz + tw * ty)
+        p10 = 2.0 * (tx * ty + tw * tz)
+        p12 = 2.0 * (ty * tz - tw * tx)
+        p22 = 1.0 - 2.0 * (tx * tx + ty * ty)
+        # Bornage en ligne (sans appel à min/max) avant arccos/arcsin
+        lat[t] = math.acos(p02 if -1.0 <= p02 <= 1.0 else (1.0 if p02 > 1.0 else -1.0))
+        lon[t] = math.asin(p10 if -1.0 <= p10 <= 1.0 else (1.0 if p10 > 1.0 else -1.0))
+
+        # Gyrometers part : omega_b_b_g = Ia_b - t_b_g @ (rho_g + t_g_t @ omega_i),
+        # un seul produit par t_b_g
+        u0 = OMEGA_T * p02
+        u1 = rg1 + OMEGA_T * p12
+        u2 = rg2 + OMEGA_T * p22
+
+        # qb <- dq(-o dt) * qb
+        p0 = (iax[t - 1] - (b00 * u0 + b01 * u1 + b02 * u2)) * DT
+        p1 = (iay[t - 1] - (b10 * u0 + b11 * u1 + b12 * u2)) * DT
+        p2 = (iaz[t - 1] - (b20 * u0 + b21 * u1 + b22 * u2)) * DT
+        th2 = p0 * p0 + p1 * p1 + p2 * p2
+        if th2 < 1e-8:
+            c = 1.0 - th2 * 0.125
+            s = th2 / 48.0 - 0.5
+        else:
+            th = math.sqrt(th2)
+            c = math.cos(0.5 * th)
+            s = -math.sin(0.5 * th) / th
+        dx = s * p0
+        dy = s * p1
+        dz = s * p2
+        nw = c * bw - dx * bx - dy * by - dz * bz
+        nx = c * bx + dx * bw + dy * bz - dz * by
+        ny = c * by + dy * bw + dz * bx - dx * bz
+        nz = c * bz + dz * bw + dx * by - dy * bx
+        k = 1.5 - 0.5 * (nw * nw + nx * nx + ny * ny + nz * nz)
+        bw = nw * k
+        bx = nx * k
+        by = ny * k
+        bz = nz * k
+
+        # t_b_g = R(qb), utilisée par l'extraction puis par le pas suivant
+        x2 = bx + bx
+        y2 = by + by
+        z2 = bz + bz
+        xx, yy, zz = bx * x2, by * y2, bz * z2
+        xy, xz, yz = bx * y2, bx * z2, by * z2
+        wx, wy, wz = bw * x2, bw * y2, bw * z2
+        b00, b01, b02 = 1.0 - (yy + zz), xy - wz, xz + wy
+        b10, b11, b12 = xy + wz, 1.0 - (xx + zz), yz - wx
+        b20, b21, b22 = xz - wy, yz + wx, 1.0 - (xx + yy)
+
+        # extract_h_r_p
+        T = math.asin(b02 if -1.0 <= b02 <= 1.0 else (1.0 if b02 > 1.0 else -1.0))
+        cT = math.cos(T)
+        r = -b12 / cT
+        k = b00 / cT
+        tan[t] = T
+        rou[t] = math.asin(r if -1.0 <= r <= 1.0 else (1.0 if r > 1.0 else -1.0))
+        cap[t] = math.acos(k if -1.0 <= k <= 1.0 else (1.0 if k > 1.0 else -1.0))
+
+    qb[0], qb[1], qb[2], qb[3] = bw, bx, by, bz
+    qt[0], qt[1], qt[2], qt[3] = tw, tx, ty, tz
+    v[0], v[1], v[2] = v0, v1, v2
+
+
+# Noyaux disponibles par mode de propagation de l'attitude
+NOYAUX = {"dcm": boucle_fusionnee, "quaternion": boucle_quaternion}
+
+if NUMBA_DISPONIBLE:
+    _NOYAUX_COMPILES = {
+        mode: numba.njit(cache=True)(noyau) for mode, noyau in NOYAUX.items()
+    }
+else:
+    _NOYAUX_COMPILES = {}
+
+
+def _tampons_etat(etat: EtatNav, attitude: str):
+    """Renvoie les tampons d'état numpy (vues) attendus par le noyau du mode"""
+    if attitude == "quaternion":
+        return [etat.q_b_g, etat.q_g_t, etat.v_geo]
+    # Tampon à plat partageant la mémoire de etat.t_b_g
+    return [etat.t_b_g.reshape(9), etat.v_geo]
+
+
+def _executer_bloc(noyau, arguments, debut: int, fin: int):
+    """Exécution directe du noyau sur les pas [debut, fin) d'un bloc"""
+    noyau(*arguments, debut, fin)
+
+
+def integrer_nav(
+    etat: EtatNav, ivx, ivy, ivz, iax, iay, iaz, alt, lat, lon, cap, rou, tan,
+    vxm, vym, vzm, debut: int, fin: int, progression: bool = True,
+    compile: bool = False, attitude: str = "dcm", bloc=None,
+):
+    r"""Exécute le noyau fusionné sur les tableaux (N,) de la navigation
+
+    En mode interprété, les tableaux sont convertis en listes Python par blocs
+    de TAILLE_BLOC pas (l'arithmétique sur des float natifs est bien plus
+    rapide que sur des scalaires numpy), puis les sorties sont recopiées dans
+    les tableaux. La mémoire temporaire reste bornée quelle que soit la durée
+    de l'essai. En mode compilé, le noyau travaille directement sur les tableaux.
+
+    Parameters
+    ----------
+    etat : EtatNav
+        état de l'intégrateur, mis à jour en place
+    ivx, ..., vzm : np.ndarray
+        mêmes tableaux que boucle_fusionnee, de dimension (N,)
+    debut, fin : int
+        intervalle des pas à calculer (debut >= 1)
+    progression : bool
+        affichage d'une barre de progression mise à jour à chaque bloc
+    compile : bool
+        utilisation du noyau compilé par numba (NUMBA_DISPONIBLE requis)
+    attitude : str
+        propagation de t_b_g et t_g_t : 'dcm' (premier ordre, comme la
+        référence) ou 'quaternion'
+    bloc : callable
+        exécution d'un bloc à la place de l'appel direct du noyau,
+        bloc(noyau, arguments, debut, fin) où arguments sont les tampons,
+        entrées et sorties du bloc (ex: profilage_nav.ProfilNav.executer_bloc) ;
+        si None, le noyau est appelé directement
+
+    """
+    if attitude not in NOYAUX:
+        raise ValueError(f"mode d'attitude inconnu : {attitude!r}, choix disponibles : {tuple(NOYAUX)}")
+    if compile and not NUMBA_DISPONIBLE:
+        raise ImportError("numba n'est pas installé, noyau compilé indisponible")
+    executer = bloc or _executer_bloc
+    tampons = _tampons_etat(etat, attitude)
+    entrees = (ivx, ivy, ivz, iax, iay, iaz, alt)
+    sorties = (lat, lon, cap, rou, tan, vxm, vym, vzm)
+    if compile:
+        noyau = _NOYAUX_COMPILES[attitude]
+        entrees = [np.ascontiguousarray(tab, dtype=np.float64) for tab in entrees]
+    else:
+        noyau = NOYAUX[attitude]
+        tampons_numpy, tampons = tampons, [tab.tolist() for tab in tampons]
+    barre = tqdm.tqdm(
+        total=fin - debut,
+        desc="Processing inertial navigation" + (" (numba)" if compile else ""),
+        disable=not progression,
+    )
+    for d in range(debut, fin, TAILLE_BLOC):
+        f = min(d + TAILLE_BLOC, fin)
+        if compile:
+            executer(noyau, (*tampons, *entrees, *sorties), d, f)
+        else:
+            # Le bloc local commence au pas d - 1 (valeurs lues à t - 1)
+            local = [tab[d - 1 : f].tolist() for tab in entrees]
+            local_sorties = [tab[d - 1 : f].tolist() for tab in sorties]
+            executer(noyau, (*tampons, *local, *local_sorties), 1, f - d + 1)
+            for tab, valeurs in zip(sorties, local_sorties):
+                tab[d:f] = valeurs[1:]
+        barre.update(f - d)
+    barre.close()
+    if not compile:
+        for tab, valeurs in zip(tampons_numpy, tampons):
+            tab[...] = valeurs
+    if attitude == "quaternion":
+        # t_b_g reste cohérente avec le quaternion propagé
+        etat.t_b_g[...] = quaternion_to_dcm(etat.q_b_g)
@@ -0,0 +1,179 @@
+"""
+Description
+-----------
+
+Prétraitement des relevés odomètre (Dist_Odo_m, lu dans NavInput.odo) avant
+la navigation : incréments de distance, remises à zéro du compteur et trous
+de relevés, rééchantillonnage sur temps_s et vitesse le long de la trajectoire
+prête pour l'hybridation 'odo'.
+
+Étapes, toutes vectorisées :
+
+   - les relevés non finis et les horodatages non croissants sont écartés ;
+   - une chute du compteur de plus de seuil_remise_m est une remise à zéro :
+     l'incrément est alors le relevé lui-même (distance depuis la remise) et
+     aucune vitesse n'est fournie entre les deux relevés ;
+   - deux relevés séparés de plus de ecart_max_s encadrent un trou : la
+     distance parcourue pendant le trou est conservée, mais aucune vitesse
+     n'est fournie dans le trou ;
+   - la distance cumulée corrigée est interpolée sur temps_s en un seul appel
+     à np.interp, et la vitesse est la pente de cette distance sur une fenêtre
+     glissante de fenetre échantillons.
+
+Le prétraitement est fait une seule fois par jeu de données : calcul_nav
+appelle odometre_donnees avant la boucle et passe le résultat au filtre
+d'hybridation et à la construction des sorties.
+
+Classes Disponibles :
+
+   - class ParametresOdometre
+   - class OdometrePretraite
+
+Fonctions Disponibles :
+
+   - pretraiter_odometre : prétraitement de relevés odomètre horodatés
+   - odometre_donnees : prétraitement de l'odomètre d'un NavInput
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from Gerer_donnees import NavInput, est_paresseux
+
+
+@dataclass
+class ParametresOdometre:
+    """Réglages du prétraitement odomètre"""
+
+    seuil_remise_m: float = 1.0
+    """Chute du compteur au-delà de laquelle elle est traitée comme une remise à zéro [m]"""
+    ecart_max_s: float = 0.5
+    """Écart entre deux relevés au-delà duquel ils encadrent un trou [s]"""
+    fenetre: int = 10
+    """Fenêtre glissante du calcul de la vitesse [échantillons de temps_s]"""
+
+
+@dataclass
+class OdometrePretraite:
+    """Odomètre rééchantillonné sur temps_s, tableaux de dimension (N,)"""
+
+    distance_m: np.ndarray = None
+    """Distance parcourue cumulée, corrigée des remises à zéro [m]"""
+    increments_m: np.ndarray = None
+    """Distance parcourue depuis l'échantillon précédent [m]"""
+    vitesse_ms: np.ndarray = None
+    """Vitesse le long de la trajectoire sur la fenêtre qui finit à l'échantillon [m/s]"""
+    valide: np.ndarray = None
+    """Vitesse utilisable (fenêtre complète, couverte par les relevés, hors trou et remise)"""
+    nb_remises: int = 0
+    """Nombre de remises à zéro du compteur détectées"""
+    nb_trous: int = 0
+    """Nombre de trous de relevés détectés"""
+
+
+def pretraiter_odometre(odo, temps_odo, temps_s, params: ParametresOdometre = None):
+    r"""Prétraite des relevés odomètre et les rééchantillonne sur temps_s
+
+    Parameters
+    ----------
+    odo : np.ndarray
+        relevés du compteur de distance [m] (M,) ou (1, M)
+    temps_odo : np.ndarray
+        instants des relevés [s], dans l'échelle de temps_s (M,) ou (1, M)
+    temps_s : np.ndarray
+        instants de la navigation [s] (N,) ou (1, N), croissants
+    params : ParametresOdometre
+        réglages (valeurs par défaut si None)
+
+    Returns
+    -------
+    odometre : OdometrePretraite
+        distance, incréments et vitesse sur temps_s
+
+    """
+    params = params or ParametresOdometre()
+    odo = np.ravel(odo).astype(float)
+    temps_odo = np.ravel(temps_odo).astype(float)
+    temps_s = np.ravel(temps_s).astype(float)
+    n = len(temps_s)
+
+    # Relevés exploitables : finis et strictement croissants dans le temps
+    garde = np.isfinite(odo) & np.isfinite(temps_odo)
+    odo, temps_odo = odo[garde], temps_odo[garde]
+    garde = np.concatenate(([True], np.diff(temps_odo) > 0))
+    odo, temps_odo = odo[garde], temps_odo[garde]
+    if len(odo) < 2:
+        nul = np.zeros(n)
+        return OdometrePretraite(nul, nul.copy(), nul.copy(), np.zeros(n, dtype=bool))
+
+    # Incréments corrigés des remises à zéro, distance cumulée
+    increments = np.diff(odo)
+    remises = increments < -params.seuil_remise_m
+    increments[remises] = np.maximum(odo[1:][remises], 0.0)
+    distance = np.concatenate(([0.0], np.cumsum(increments)))
+    trous = np.diff(temps_odo) > params.ecart_max_s
+
+    # Rééchantillonnage sur temps_s et échantillons tombant dans un trou ou
+    # dans l'intervalle d'une remise à zéro (incrément incertain)
+    distance_s = np.interp(temps_s, temps_odo, distance)
+    couvert = (temps_s >= temps_odo[0]) & (temps_s <= temps_odo[-1])
+    intervalle = np.clip(np.searchsorted(temps_odo, temps_s, side="right") - 1, 0, len(trous) - 1)
+    inutilisable = ~couvert | (trous | remises)[intervalle]
+
+    # Vitesse sur une fenêtre glissante, rejetée si un échantillon de la
+    # fenêtre est inutilisable
+    w = params.fenetre
+    vitesse = np.zeros(n)
+    valide = np.zeros(n, dtype=bool)
+    if n > w:
+        vitesse[w:] = (distance_s[w:] - distance_s[:-w]) / (temps_s[w:] - temps_s[:-w])
+        compte = np.concatenate(([0], np.cumsum(inutilisable)))
+        valide[w:] = (compte[w + 1 :] - compte[1 : n - w + 1]) == 0
+        valide[w:] &= ~inutilisable[: n - w]
+
+    return OdometrePretraite(
+        distance_m=distance_s,
+        increments_m=np.diff(distance_s, prepend=distance_s[0]),
+        vitesse_ms=vitesse,
+        valide=valide,
+        nb_remises=int(remises.sum()),
+        nb_trous=int(trous.sum()),
+    )
+
+
+def odometre_donnees(data_in: NavInput, params: ParametresOdometre = None):
+    r"""Odomètre prétraité d'une structure d'entrée
+
+    Les relevés de même taille que temps_s sont pris sur temps_s ; sinon leur
+    horodatage est celui du fichier non inertiel de l'essai, lu dans
+    temps_gnss (variable temps_s du fichier, voir corres_champs_NI).
+
+    Parameters
+    ----------
+    data_in : NavInput
+        structure d'entrée dont le champ odo est renseigné
+    params : ParametresOdometre
+        réglages (valeurs par défaut si None)
+
+    Returns
+    -------
+    odometre : OdometrePretraite or None
+        odomètre prétraité, None si le canal odo n'est pas renseigné
+
+    """
+    params = params or ParametresOdometre()
+    odo = data_in.odo
+    if odo is None or est_paresseux(odo) or np.size(odo) < 2:
+        return None
+    temps_s = np.ravel(data_in.temps_s)
+    m = np.size(odo)
+    temps_odo = temps_s if m == len(temps_s) else np.ravel(data_in.temps_gnss)
+    if np.size(temps_odo) != m:
+        raise ValueError(
+            f"horodatage des relevés odomètre introuvable : {m} relevés, "
+            f"{np.size(temps_odo)} instants dans temps_gnss"
+        )
+    return pretraiter_odometre(odo, temps_odo, temps_s, params)
@@ -0,0 +1,139 @@
+"""
+Description
+-----------
+
+Ordonnancement des mesures non inertielles (GNSS, odomètre, VOR/DME, ...)
+arrivant à des cadences différentes et avec des trous. Avant la boucle de
+navigation, les horodatages de toutes les sources sont rapportés aux
+échantillons de temps_s par np.searchsorted et fusionnés en un seul index
+d'événements trié : la boucle saute directement d'un événement au suivant au
+lieu de tester chaque capteur à chaque pas.
+
+Chaque source porte un masque de validité (ex: val_gnss, nsat_gnss) et une
+latence : une mesure horodatée t_m décrit l'instant t_m - latence, rattaché
+au premier échantillon qui le suit. L'écart restant entre l'instant de la
+mesure et cet échantillon (inférieur à un pas) est conservé pour permettre une
+interpolation lors de la mise à jour.
+
+Classes Disponibles :
+
+   - class SourceMesure
+   - class IndexEvenements
+
+Fonctions Disponibles :
+
+   - construire_index : fusion des sources en un index d'événements
+
+--------------------------------
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class SourceMesure:
+    """Horodatages d'une source de mesures, de dimension (M,)"""
+
+    nom: str = ""
+    """Nom de la source (ex: 'gnss', 'odo', 'dme_bvs')"""
+    temps_s: np.ndarray = None
+    """Instants de mesure, dans l'échelle de temps_s de la navigation"""
+    valide: np.ndarray = None
+    """Masque de validité des mesures (toutes valides si None)"""
+    latence_s: float = 0.0
+    """Retard de la mesure : elle décrit l'instant temps_s - latence_s"""
+
+
+@dataclass
+class IndexEvenements:
+    """Événements de mesure triés par échantillon, tous les tableaux sont de dimension (E,)"""
+
+    sources: tuple = ()
+    """Noms des sources, dans l'ordre des codes de source"""
+    pas: np.ndarray = None
+    """Échantillon de navigation auquel chaque mesure est traitée"""
+    source: np.ndarray = None
+    """Code de la source de chaque événement (indice dans sources)"""
+    rang: np.ndarray = None
+    """Indice de la mesure dans sa source"""
+    avance_s: np.ndarray = None
+    """Temps entre l'instant décrit par la mesure et son échantillon (dans [0, dt))"""
+
+    def __len__(self):
+        return len(self.pas)
+
+    def groupes(self):
+        r"""Parcourt les événements regroupés par échantillon
+
+        Yields
+        ------
+        pas : int
+            échantillon de navigation
+        evenements : slice
+            tranche des événements de cet échantillon dans les tableaux de l'index
+
+        """
+        if len(self.pas) == 0:
+            return
+        coupures = np.flatnonzero(np.diff(self.pas)) + 1
+        debuts = np.concatenate(([0], coupures))
+        fins = np.concatenate((coupures, [len(self.pas)]))
+        for d, f in zip(debuts.tolist(), fins.tolist()):
+            yield int(self.pas[d]), slice(d, f)
+
+
+def construire_index(sources, temps_s: np.ndarray, debut: int = 1):
+    r"""Fusionne les horodatages des sources en un index d'événements trié
+
+    Parameters
+    ----------
+    sources : iterable of SourceMesure
+        sources de mesures ; l'ordre donne la priorité des mesures d'un même échantillon
+    temps_s : np.ndarray
+        instants de la navigation (N,), croissants
+    debut : int
+        premier échantillon pouvant porter un événement (les mesures
+        antérieures sont écartées)
+
+    Returns
+    -------
+    index : IndexEvenements
+        événements triés par échantillon puis par source, puis par instant
+
+    """
+    temps_s = np.ravel(temps_s)
+    n = len(temps_s)
+    sources = list(sources)
+    pas, code, rang, avance = [], [], [], []
+    for k, src in enumerate(sources):
+        instants = np.ravel(src.temps_s).astype(float) - src.latence_s
+        garde = np.isfinite(instants)
+        if src.valide is not None:
+            garde &= np.ravel(src.valide).astype(bool)
+        (indices,) = np.nonzero(garde)
+        p = np.searchsorted(temps_s, instants[indices], side="left")
+        dans = (p >= debut) & (p < n)
+        p, indices = p[dans], indices[dans]
+        pas.append(p)
+        code.append(np.full(len(p), k, dtype=np.int32))
+        rang.append(indices)
+        avance.append(temps_s[p] - instants[indices])
+
+    if not sources:
+        vide = np.zeros(0, dtype=np.int64)
+        return IndexEvenements((), vide, vide.astype(np.int32), vide, np.zeros(0))
+    pas = np.concatenate(pas)
+    code = np.concatenate(code)
+    rang = np.concatenate(rang)
+    avance = np.concatenate(avance)
+    # Tri par échantillon, puis source, puis ordre des mesures dans la source
+    ordre = np.lexsort((rang, code, pas))
+    return IndexEvenements(
+        sources=tuple(src.nom for src in sources),
+        pas=pas[ordre],
+        source=code[ordre],
+        rang=rang[ordre],
+        avance_s=avance[ordre],
+    )
@@ -0,0 +1,209 @@
+"""
+Description
+-----------
+
+Profilage optionnel de la boucle de navigation de calcul_nav : où passe le
+temps d'un pas, étape par étape, et autour du noyau (conversions des blocs,
+barre de progression, création de la sortie).
+
+Deux mécanismes à faible coût :
+
+   - des compteurs cumulés (durée totale, nombre d'appels) sur les opérations
+     faites une fois par bloc ou par appel : ProfilNav.executer_bloc est passé
+     à noyau_nav.integrer_nav (argument bloc) et mesure chaque appel du noyau,
+     la boucle par blocs restant celle de integrer_nav ;
+   - un échantillonnage des étapes du pas : un pas sur periode est exécuté par
+     noyau_nav.boucle_fusionnee avec ses compteurs d'étapes (argument cumuls),
+     les autres sans. Les calculs sont ceux du noyau lui-même : les sorties
+     sont identiques au bit près avec ou sans profil. Le coût d'un
+     horodatage, mesuré à la création du profil, est retranché de chaque
+     étape.
+
+Sans profil (profil=None, par défaut), calcul_nav et integrer_nav exécutent
+exactement le code habituel.
+
+Le détail par étape n'est disponible que pour le noyau interprété en mode
+'dcm' (backend 'fusionne') ; le noyau compilé ne peut pas être horodaté de
+l'intérieur et les autres boucles (mode 'quaternion', hybridation,
+multi-cadence, reprise, référence) ne sont mesurées que globalement. Le
+résumé liste ces exécutions dans etapes_non_echantillonnees.
+
+Classes Disponibles :
+
+   - class ProfilNav
+   - class ResumeProfil
+
+--------------------------------
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from noyau_nav import ETAPES, boucle_fusionnee, boucle_quaternion
+
+# Un pas profilé sur PERIODE_ECHANTILLONNAGE par défaut
+PERIODE_ECHANTILLONNAGE = 100
+
+
+def _cout_horodatage_ns(n: int = 10000):
+    """Durée médiane [ns] d'un appel à time.perf_counter_ns"""
+    horloge = time.perf_counter_ns
+    ecarts = np.empty(n)
+    for i in range(n):
+        t0 = horloge()
+        ecarts[i] = horloge() - t0
+    return float(np.median(ecarts))
+
+
+@dataclass
+class ResumeProfil:
+    """Résumé d'un profil de calcul_nav"""
+
+    pas: int = 0
+    """Nombre de pas calculés"""
+    pas_echantillonnes: int = 0
+    """Nombre de pas horodatés étape par étape"""
+    duree_totale_s: float = 0.0
+    """Durée totale de calcul_nav [s]"""
+    compteurs_s: dict = field(default_factory=dict)
+    """Durée cumulée [s] par opération comptée (noyau, integration, creer_sortie, calcul_nav)"""
+    appels: dict = field(default_factory=dict)
+    """Nombre d'appels par opération comptée"""
+    etapes_ns_par_pas: dict = field(default_factory=dict)
+    """Durée moyenne [ns] d'un pas par étape de ETAPES (vide sans échantillonnage)"""
+    etapes_s: dict = field(default_factory=dict)
+    """Durée estimée [s] de chaque étape sur les pas du noyau échantillonné"""
+    parts_etapes: dict = field(default_factory=dict)
+    """Part de chaque étape dans le temps d'un pas"""
+    etapes_non_echantillonnees: list = field(default_factory=list)
+    """Exécutions mesurées sans détail par étape (noyau compilé, mode 'quaternion', hybridation...)"""
+
+    def ecrire_json(self, chemin):
+        """Écrit le résumé dans un fichier JSON et renvoie son chemin"""
+        chemin = Path(chemin)
+        chemin.write_text(json.dumps(asdict(self), indent=2))
+        return chemin
+
+    def __str__(self):
+        lignes = [f"{self.pas} pas en {self.duree_totale_s:.3f} s"]
+        for nom, duree in self.compteurs_s.items():
+            lignes.append(f"  {nom:<28}{duree:10.3f} s  ({self.appels[nom]} appels)")
+        for nom in self.etapes_ns_par_pas:
+            lignes.append(
+                f"  {nom:<28}{self.etapes_ns_par_pas[nom]:10.0f} ns/pas"
+                f"  {100 * self.parts_etapes[nom]:5.1f} %  ~{self.etapes_s[nom]:.3f} s"
+            )
+        if self.etapes_non_echantillonnees:
+            lignes.append("  étapes non échantillonnées : " + ", ".join(self.etapes_non_echantillonnees))
+        return "\n".join(lignes)
+
+
+class ProfilNav:
+    r"""Profil d'une exécution de calcul_nav, rempli par calcul_nav(..., profil=...)
+
+    Parameters
+    ----------
+    periode : int
+        un pas sur periode est horodaté étape par étape (1 : tous les pas)
+
+    """
+
+    def __init__(self, periode: int = PERIODE_ECHANTILLONNAGE):
+        if periode < 1:
+            raise ValueError(f"période d'échantillonnage invalide : {periode}")
+        self.periode = periode
+        self.cout_horodatage_ns = _cout_horodatage_ns()
+        self.pas = 0
+        self.pas_echantillonnes = 0
+        # Durée cumulée [ns] des étapes des pas profilés, dans l'ordre de ETAPES
+        self.cumuls_etapes = [0] * len(ETAPES)
+        self._compteurs = {}
+        # Pas calculés par le noyau échantillonné, exécutions sans détail par étape
+        self._pas_detailles = 0
+        self._sans_etapes = []
+
+    def ajouter(self, nom: str, duree_ns: int, appels: int = 1):
+        """Cumule la durée [ns] d'une opération comptée"""
+        compteur = self._compteurs.setdefault(nom, [0, 0])
+        compteur[0] += duree_ns
+        compteur[1] += appels
+
+    def compter_pas(self, pas: int, raison: str):
+        """Compte des pas calculés sans executer_bloc, donc sans détail par étape"""
+        self.pas += pas
+        self._signaler_sans_etapes(raison)
+
+    def _signaler_sans_etapes(self, raison: str):
+        """Note une exécution mesurée sans détail par étape (une fois par raison)"""
+        if raison not in self._sans_etapes:
+            self._sans_etapes.append(raison)
+
+    def executer_bloc(self, noyau, arguments, debut: int, fin: int):
+        r"""Exécute un bloc du noyau en le mesurant (argument bloc de noyau_nav.integrer_nav)
+
+        Le noyau interprété en mode 'dcm' (boucle_fusionnee) est de plus
+        échantillonné : un pas sur periode est exécuté avec les compteurs
+        d'étapes du noyau. Les autres noyaux sont mesurés globalement et
+        signalés dans ResumeProfil.etapes_non_echantillonnees.
+
+        Parameters
+        ----------
+        noyau : callable
+            noyau choisi par integrer_nav
+        arguments : tuple
+            tampons d'état, entrées et sorties du bloc
+        debut, fin : int
+            intervalle des pas à calculer
+
+        """
+        h0 = time.perf_counter_ns()
+        if noyau is boucle_fusionnee:
+            periode = self.periode
+            for d in range(debut, fin, periode):
+                f = min(d + periode, fin)
+                # Les pas d à f - 2 sans horodatage, le dernier pas horodaté
+                if f - 1 > d:
+                    noyau(*arguments, d, f - 1)
+                noyau(*arguments, f - 1, f, self.cumuls_etapes)
+                self.pas_echantillonnes += 1
+            self._pas_detailles += fin - debut
+        else:
+            noyau(*arguments, debut, fin)
+            self._signaler_sans_etapes(
+                "attitude 'quaternion'" if noyau is boucle_quaternion else "noyau compilé (numba)"
+            )
+        self.ajouter("noyau", time.perf_counter_ns() - h0)
+        self.pas += fin - debut
+
+    def resume(self):
+        r"""Résumé des compteurs et des étapes échantillonnées
+
+        Returns
+        -------
+        resume : ResumeProfil
+            durées cumulées, durées par pas et parts de chaque étape
+
+        """
+        resume = ResumeProfil(
+            pas=self.pas,
+            pas_echantillonnes=self.pas_echantillonnes,
+            duree_totale_s=self._compteurs.get("calcul_nav", [0, 0])[0] * 1e-9,
+            compteurs_s={nom: c[0] * 1e-9 for nom, c in self._compteurs.items()},
+            appels={nom: c[1] for nom, c in self._compteurs.items()},
+            etapes_non_echantillonnees=list(self._sans_etapes),
+        )
+        if self.pas_echantillonnes:
+            # Un horodatage par étape est compté dans chaque durée mesurée
+            par_pas = [
+                max(cumul / self.pas_echantillonnes - self.cout_horodatage_ns, 0.0)
+                for cumul in self.cumuls_etapes
+            ]
+            total = sum(par_pas) or 1.0
+            resume.etapes_ns_par_pas = dict(zip(ETAPES, par_pas))
+            resume.etapes_s = {nom: ns * self._pas_detailles * 1e-9 for nom, ns in zip(ETAPES, par_pas)}
+            resume.parts_etapes = {nom: ns / total for nom, ns in zip(ETAPES, par_pas)}
+        return resume
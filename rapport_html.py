@@ -0,0 +1,142 @@
+"""
+Description
+-----------
+
+Rapport html unique rassemblant toutes les figures plotly d'un essai, lisible
+hors ligne.
+
+   - plotly.js est intégré une seule fois dans le fichier (au lieu d'une
+     copie d'environ 3,5 Mo par figure) ;
+   - chaque figure est rangée sous forme JSON dans le fichier et n'est
+     dessinée (Plotly.newPlot) que lorsque sa section arrive à l'écran
+     (IntersectionObserver) : l'ouverture du rapport ne dessine que les
+     premières figures ;
+   - les images de fond (cartes intégrées en base64, voir cartes.py) communes
+     à plusieurs figures ne sont écrites qu'une fois.
+
+Fonctions Disponibles :
+
+   - construire_rapport : écriture du rapport html d'une liste de figures
+
+--------------------------------
+"""
+
+import html
+import json
+from pathlib import Path
+
+import plotly.io as pio
+import plotly.offline
+
+# Marge [px] avant l'entrée à l'écran d'une figure à partir de laquelle elle est dessinée
+MARGE_RENDU_PX = 400
+
+_MODELE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>{titre}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0 2em; }}
+nav ul {{ columns: 2; }}
+section {{ margin: 2em 0; }}
+.figure {{ min-height: {hauteur}px; }}
+</style>
+<script type="text/javascript">{plotlyjs}</script>
+</head>
+<body>
+<h1>{titre}</h1>
+<nav><ul>
+{sommaire}
+</ul></nav>
+{sections}
+<script type="application/json" id="images">{images}</script>
+<script type="text/javascript">
+(function () {{
+  const images = JSON.parse(document.getElementById("images").textContent);
+  function dessiner(div) {{
+    const fig = JSON.parse(document.getElementById(div.dataset.figure).textContent);
+    for (const image of (fig.layout.images || [])) {{
+      if (image.source in images) image.source = images[image.source];
+    }}
+    Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true}});
+  }}
+  const divs = document.querySelectorAll("div.figure");
+  if (!("IntersectionObserver" in window)) {{
+    divs.forEach(dessiner);
+    return;
+  }}
+  const observateur = new IntersectionObserver(function (entrees) {{
+    for (const entree of entrees) {{
+      if (entree.isIntersecting) {{
+        observateur.unobserve(entree.target);
+        dessiner(entree.target);
+      }}
+    }}
+  }}, {{rootMargin: "{marge}px 0px"}});
+  divs.forEach(function (div) {{ observateur.observe(div); }});
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def _json_script(objet):
+    """JSON sans séquence '</' (contenu sûr d'une balise script)"""
+    return json.dumps(objet, separators=(",", ":")).replace("</", "<\\/")
+
+
+def construire_rapport(figures, chemin, titre: str = "Navigation calculée"):
+    r"""Écrit un rapport html unique et hors ligne rassemblant des figures plotly
+
+    Parameters
+    ----------
+    figures : iterable of (str, go.Figure)
+        titre de section et figure, dans l'ordre du rapport (les figures None
+        sont ignorées)
+    chemin : str or Path
+        fichier html à écrire
+    titre : str
+        titre du rapport
+
+    Returns
+    -------
+    chemin : Path
+        fichier html écrit
+
+    """
+    chemin = Path(chemin)
+    images = {}
+    sommaire = []
+    sections = []
+    hauteur_min = 450
+    for k, (nom, fig) in enumerate((nom, fig) for nom, fig in figures if fig is not None):
+        contenu = json.loads(pio.to_json(fig, validate=False))
+        # Images de fond identiques mises en commun : la figure n'en garde qu'une clé
+        for image in contenu.get("layout", {}).get("images", []):
+            source = image.get("source")
+            if isinstance(source, str) and source.startswith("data:"):
+                cle = images.setdefault(source, f"image{len(images)}")
+                image["source"] = cle
+        hauteur = contenu.get("layout", {}).get("height") or hauteur_min
+        ancre = f"section{k}"
+        sommaire.append(f'<li><a href="#{ancre}">{html.escape(nom)}</a></li>')
+        sections.append(
+            f'<section id="{ancre}"><h2>{html.escape(nom)}</h2>'
+            f'<div class="figure" data-figure="fig{k}" style="min-height:{hauteur}px"></div>'
+            f'<script type="application/json" id="fig{k}">{_json_script(contenu)}</script></section>'
+        )
+    chemin.write_text(
+        _MODELE.format(
+            titre=html.escape(titre),
+            hauteur=hauteur_min,
+            plotlyjs=plotly.offline.get_plotlyjs(),
+            sommaire="\n".join(sommaire),
+            sections="\n".join(sections),
+            images=_json_script({cle: source for source, cle in images.items()}),
+            marge=MARGE_RENDU_PX,
+        ),
+        encoding="utf-8",
+    )
+    return chemin
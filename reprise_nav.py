@@ -0,0 +1,184 @@
+"""
+Description
+-----------
+
+Points de reprise des longs calculs de navigation. Le calcul est découpé en
+segments de taille fixe ; à la fin de chaque segment, seuls les nouveaux
+échantillons de sortie sont ajoutés à la fin d'un fichier binaire, puis
+l'état de l'intégrateur (EtatNav) et le nombre d'échantillons valides sont
+réécrits dans un petit fichier remplacé de façon atomique. Une écriture ne
+coûte donc que la taille d'un segment, quelle que soit l'avancée du calcul.
+
+Après une interruption, le calcul reprend au dernier point enregistré : les
+sorties déjà calculées sont relues et l'intégration repart de l'état
+sauvegardé, avec un résultat identique à un calcul d'une traite.
+
+Classes Disponibles :
+
+   - class PointReprise
+
+Fonctions Disponibles :
+
+   - integrer_avec_reprise : integrer_nav par segments avec points de reprise
+
+--------------------------------
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import tqdm
+
+from noyau_nav import EtatNav, integrer_nav
+
+# Intervalle par défaut entre deux points de reprise : 10 minutes à 100 Hz
+INTERVALLE_REPRISE = 60000
+
+# Sorties sauvegardées, dans l'ordre des colonnes du fichier binaire
+_SORTIES = ("lat", "lon", "cap", "rou", "tan", "vxm", "vym", "vzm")
+
+
+class PointReprise:
+    r"""Dossier de reprise d'un calcul de navigation
+
+    Contient 'sorties.bin', échantillons (n, 8) float64 ajoutés au fil du
+    calcul, et 'etat.json', état de l'intégrateur au dernier point enregistré.
+
+    Parameters
+    ----------
+    rep : str or Path
+        dossier de reprise (créé si besoin)
+    n : int
+        nombre total d'échantillons du calcul
+    attitude : str
+        mode d'attitude du calcul ('dcm' ou 'quaternion')
+
+    """
+
+    def __init__(self, rep, n: int, attitude: str = "dcm"):
+        self.rep = Path(rep)
+        self.n = n
+        self.attitude = attitude
+        self.rep.mkdir(parents=True, exist_ok=True)
+        self.chemin_sorties = self.rep / "sorties.bin"
+        self.chemin_etat = self.rep / "etat.json"
+
+    def charger(self, sorties):
+        r"""Relit le dernier point de reprise et recopie les sorties déjà calculées
+
+        Parameters
+        ----------
+        sorties : tuple of np.ndarray
+            lat, lon, cap, rou, tan, vxm, vym, vzm de dimension (N,), remplis
+            sur les échantillons déjà calculés
+
+        Returns
+        -------
+        reprise : tuple (EtatNav, int) or None
+            état de l'intégrateur et premier pas restant à calculer, None s'il
+            n'existe pas de point de reprise
+
+        """
+        if not self.chemin_etat.exists():
+            return None
+        contenu = json.loads(self.chemin_etat.read_text())
+        if contenu["n"] != self.n or contenu["attitude"] != self.attitude:
+            raise ValueError(
+                f"le point de reprise de {self.rep} ne correspond pas à ce calcul "
+                f"(N={contenu['n']}, attitude={contenu['attitude']!r})"
+            )
+        fin = contenu["fin"]
+        # Les échantillons ajoutés après le dernier état enregistré sont ignorés
+        deja = np.memmap(self.chemin_sorties, dtype=np.float64, mode="r", shape=(fin, len(_SORTIES)))
+        for j, tab in enumerate(sorties):
+            tab[:fin] = deja[:, j]
+        del deja
+        etat = EtatNav(**{nom: np.array(valeur) for nom, valeur in contenu["etat"].items()})
+        return etat, fin
+
+    def enregistrer(self, etat: EtatNav, sorties, debut: int, fin: int):
+        r"""Ajoute les échantillons [debut, fin) et enregistre l'état atteint à fin
+
+        Parameters
+        ----------
+        etat : EtatNav
+            état de l'intégrateur après le calcul du pas fin - 1
+        sorties : tuple of np.ndarray
+            sorties de dimension (N,)
+        debut, fin : int
+            échantillons ajoutés depuis le point précédent
+        """
+        nouveaux = np.stack([tab[debut:fin] for tab in sorties], axis=1)
+        with open(self.chemin_sorties, "r+b" if debut > 0 else "wb") as f:
+            # Écrase un éventuel reliquat écrit après le dernier état valide
+            f.seek(debut * nouveaux.itemsize * len(_SORTIES))
+            f.write(np.ascontiguousarray(nouveaux).tobytes())
+            f.truncate()
+        contenu = {
+            "n": self.n,
+            "attitude": self.attitude,
+            "fin": fin,
+            "etat": {
+                "t_b_g": etat.t_b_g.tolist(),
+                "v_geo": etat.v_geo.tolist(),
+                "q_b_g": etat.q_b_g.tolist(),
+                "q_g_t": etat.q_g_t.tolist(),
+            },
+        }
+        tmp = self.chemin_etat.with_suffix(".tmp")
+        tmp.write_text(json.dumps(contenu))
+        os.replace(tmp, self.chemin_etat)
+
+
+def integrer_avec_reprise(
+    point: PointReprise, etat: EtatNav, entrees, sorties, n: int,
+    intervalle: int = INTERVALLE_REPRISE, reprendre: bool = False,
+    progression: bool = True, **options,
+):
+    r"""Exécute integrer_nav sur [1, n) par segments, avec un point de reprise par segment
+
+    Parameters
+    ----------
+    point : PointReprise
+        dossier de reprise du calcul
+    etat : EtatNav
+        état initial de l'intégrateur, mis à jour en place
+    entrees : tuple of np.ndarray
+        ivx, ivy, ivz, iax, iay, iaz, alt de dimension (N,)
+    sorties : tuple of np.ndarray
+        lat, lon, cap, rou, tan, vxm, vym, vzm de dimension (N,)
+    n : int
+        nombre d'échantillons
+    intervalle : int
+        nombre de pas entre deux points de reprise
+    reprendre : bool
+        reprise au dernier point enregistré s'il existe (sinon calcul depuis le pas 1)
+    progression : bool
+        affichage d'une barre de progression
+    **options :
+        options de integrer_nav (compile, attitude)
+
+    """
+    debut = 1
+    enregistre = 0
+    reprise = point.charger(sorties) if reprendre else None
+    if reprise is not None:
+        etat_repris, debut = reprise
+        etat.t_b_g[...] = etat_repris.t_b_g
+        etat.v_geo[...] = etat_repris.v_geo
+        etat.q_b_g[...] = etat_repris.q_b_g
+        etat.q_g_t[...] = etat_repris.q_g_t
+        enregistre = debut
+
+    barre = tqdm.tqdm(
+        total=n - 1, initial=debut - 1, desc="Processing inertial navigation", disable=not progression
+    )
+    for d in range(debut, n, intervalle):
+        f = min(d + intervalle, n)
+        integrer_nav(etat, *entrees, *sorties, d, f, progression=False, **options)
+        point.enregistrer(etat, sorties, enregistre, f)
+        enregistre = f
+        barre.update(f - d)
+    barre.close()
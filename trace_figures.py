@@ -16,6 +16,10 @@ Fonctions Disponibles :
    - Tracé des attitudes et cap
    - Calculs des erreurs d'attitudes et cap
    - Tracé des erreurs de d'attitudes et cap
+
+Toutes les courbes passent par trace_serie : elles sont décimées à
+BUDGET_POINTS points, ou au budget passé à la fonction trace_* (decimation.py), et tracées en WebGL quand la série
+d'origine dépasse SEUIL_WEBGL points.
    
 
 Auteurs : Cédric LAURENT, Loïc DAVAIN
@@ -26,13 +30,51 @@ Créé le 10 juillet 2024
 #Import des librairies nécessaires au tracé des figures
 import plotly.graph_objects as go
 import numpy as np
-import base64
 import webbrowser
+from pathlib import Path
 from plotly.subplots import make_subplots
+from cartes import LARGEUR_CARTE_PX, source_carte
+from geodesie import CARTES, DEG2RAD, RAD2DEG, ecarts_plan_local
+from decimation import decimer
+from multilateration_vordme import multilateration_vordme
+
+# Nombre maximal de points tracés par courbe (None : aucune décimation)
+BUDGET_POINTS = 4000
+# Méthode de décimation des séries temporelles : 'minmax' ou 'lttb'
+METHODE_DECIMATION = "minmax"
+# Nombre de points de la série d'origine (avant décimation) au-delà duquel la
+# courbe est tracée en WebGL (Scattergl)
+SEUIL_WEBGL = 10000
+
+
+def trace_serie(x, y, trajectoire=False, budget=None, **kwargs):
+    r"""Courbe plotly décimée au budget de points (decimation.py)
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        abscisses et ordonnées à tracer (dim (N,) ou (1,N))
+    trajectoire : bool
+        courbe (longitude, latitude) plutôt que série temporelle
+    budget : int
+        nombre maximal de points de la courbe (BUDGET_POINTS si None)
+    **kwargs :
+        autres arguments de go.Scatter (mode, name, line, ...)
+
+    Returns
+    -------
+    trace : go.Scatter or go.Scattergl
+        courbe à ajouter à une figure, en WebGL si la série d'origine a plus
+        de SEUIL_WEBGL points
+
+    """
+    classe = go.Scattergl if min(np.size(x), np.size(y)) > SEUIL_WEBGL else go.Scatter
+    x, y = decimer(x, y, budget or BUDGET_POINTS, METHODE_DECIMATION, trajectoire)
+    return classe(x=x, y=y, **kwargs)
 
 #%% POSITION
 
-def trace_figure_nav_pontoise(x,y,x_ref,y_ref):
+def trace_figure_nav_pontoise(x,y,x_ref,y_ref,largeur_px=LARGEUR_CARTE_PX,rep_sortie=".",afficher=True, budget=None):
 
     r"""Ce script trace dans une fenêtre html le tracé calculé et la référence sur le 
         trajet de Pontoise
@@ -47,30 +89,39 @@ def trace_figure_nav_pontoise(x,y,x_ref,y_ref):
         vecteur de la longitude de la nav de référence [deg] (dim (1,N))
     y_ref : np.ndarray
         vecteur de la latitude de la nav de référence [deg] (dim (1,N))
+    largeur_px : int
+        largeur de l'image de fond de carte [pixels]
+    rep_sortie : str or Path
+        dossier du fichier html et de l'image de fond partagée ; si None,
+        l'image est intégrée à la figure (ex: pour rapport_html.py)
+    afficher : bool
+        écriture du fichier html et ouverture dans le navigateur
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
 
     Returns
     -------
-    Trace_nav_2D_pontoise.html : figure html
-        Tracé de la navigation
+    fig : figure
+        Tracé de la navigation, écrit dans Trace_nav_2D_pontoise.html si afficher
 
     """
-    #Ouverture du png de la carte en mode lecture
-    with open(r"01-Cartes\map_ilems.PNG", "rb") as png:
-        #Encodage en base 64 de la carte au fur et à mesure de sa lecture
-        b64 = base64.b64encode(png.read())
+    #Emprise géographique de la carte
+    carte = CARTES["Pontoise"]
+    #Image réduite de la carte, écrite une seule fois à côté des fichiers html (cartes.py)
+    source = source_carte("Pontoise", largeur_px, rep_sortie)
 
     # Chargement de l'image
     img = go.layout.Image(
-        source=f"data:image/png;base64,{b64.decode()}",
+        source=source,
         xref="x",
         yref="y",
         #Coordonnées du coin supérieur gauche de la carte
-        x=1.728479,
-        y=49.224106555952380,
+        x=carte.lon_min_deg,
+        y=carte.lat_max_deg,
         #Différence entre Gmax et Gmin de la carte
-        sizex=0.5771341310408928,
+        sizex=carte.largeur_deg,
         #Différence en Latmax et Latmin de la carte
-        sizey=0.2442005559523821,
+        sizey=carte.hauteur_deg,
         sizing="stretch",
         opacity=1,
         layer="below"
@@ -92,13 +143,13 @@ def trace_figure_nav_pontoise(x,y,x_ref,y_ref):
     fig.add_layout_image(img)
 
     # Ajout du tracé de la nav de référence
-    fig.add_trace(go.Scatter(x=xref, y=yref, mode='lines', name='Référence'))
+    fig.add_trace(trace_serie(budget=budget, x=xref, y=yref, mode='lines', name='Référence', trajectoire=True))
     # Ajout du tracé de la nav calculée
-    fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='INS'))
+    fig.add_trace(trace_serie(budget=budget, x=x, y=y, mode='lines', name='INS', trajectoire=True))
     # fig.add_trace(go.Scatter(x=x_gnss, y=y_gnss, mode='lines', name='GPS'))
     # Configuration des axes de la figure pour correspondre à ceux de l'image
-    fig.update_xaxes(range=[1.728479, 2.305613131040893])
-    fig.update_yaxes(range=[48.979906, 49.224106555952380])
+    fig.update_xaxes(range=[carte.lon_min_deg, carte.lon_max_deg])
+    fig.update_yaxes(range=[carte.lat_min_deg, carte.lat_max_deg])
 
     # Mise à jour de la disposition pour inclure la légende
     fig.update_layout(
@@ -117,12 +168,15 @@ def trace_figure_nav_pontoise(x,y,x_ref,y_ref):
         showlegend=True,
     )
 
-    # Enregistrement de la figure en HTML
-    fig.write_html("Trace_nav_2D_pontoise.html")
-    # Ouvrir la figure dans le navigateur
-    webbrowser.open("Trace_nav_2D_pontoise.html")
+    if afficher:
+        # Enregistrement de la figure en HTML
+        chemin_html = Path(rep_sortie) / "Trace_nav_2D_pontoise.html"
+        fig.write_html(chemin_html)
+        # Ouvrir la figure dans le navigateur
+        webbrowser.open(chemin_html.resolve().as_uri())
+    return fig
 
-def trace_figure_nav_fecamp(x,y,x_ref,y_ref):
+def trace_figure_nav_fecamp(x,y,x_ref,y_ref,largeur_px=LARGEUR_CARTE_PX,rep_sortie=".",afficher=True, budget=None):
 
     r"""Ce script trace dans une fenêtre html le tracé calculé et la référence sur le
         trajet de Fecamp
@@ -137,31 +191,40 @@ def trace_figure_nav_fecamp(x,y,x_ref,y_ref):
         vecteur de la longitude de la nav de référence [deg] (dim (1,N))
     y_ref : np.ndarray
         vecteur de la latitude de la nav de référence [deg] (dim (1,N))
+    largeur_px : int
+        largeur de l'image de fond de carte [pixels]
+    rep_sortie : str or Path
+        dossier du fichier html et de l'image de fond partagée ; si None,
+        l'image est intégrée à la figure (ex: pour rapport_html.py)
+    afficher : bool
+        écriture du fichier html et ouverture dans le navigateur
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
 
     Returns
     -------
-    Trace_nav_2D_fecamp.html : figure html
-        Tracé de la navigation
+    fig : figure
+        Tracé de la navigation, écrit dans Trace_nav_2D_fecamp.html si afficher
 
     """
 
-    #Ouverture du png de la carte en mode lecture
-    with open(r"01-Cartes\map_fecamp.PNG", "rb") as png:
-        #Encodage en base 64 de la carte au fur et à mesure de sa lecture
-        b64 = base64.b64encode(png.read())
+    #Emprise géographique de la carte
+    carte = CARTES["Fecamp"]
+    #Image réduite de la carte, écrite une seule fois à côté des fichiers html (cartes.py)
+    source = source_carte("Fecamp", largeur_px, rep_sortie)
 
     # Chargement de l'image
     img = go.layout.Image(
-        source=f"data:image/png;base64,{b64.decode()}",
+        source=source,
         xref="x",
         yref="y",
         #Coordonnées du coin supérieur gauche de la carte
-        x=0.317211,
-        y=49.787612490196075,
+        x=carte.lon_min_deg,
+        y=carte.lat_max_deg,
         #Différence entre Gmax et Gmin de la carte
-        sizex=1.9932976035555563,
+        sizex=carte.largeur_deg,
         #Différence en Latmax et Latmin de la carte
-        sizey=0.819765490196076,
+        sizey=carte.hauteur_deg,
         sizing="stretch",
         opacity=1,
         layer="below"
@@ -180,12 +243,12 @@ def trace_figure_nav_fecamp(x,y,x_ref,y_ref):
     fig.add_layout_image(img)
 
     # Ajout du tracé de la nav de référence
-    fig.add_trace(go.Scatter(x=xref, y=yref, mode='lines', name='Référence'))
+    fig.add_trace(trace_serie(budget=budget, x=xref, y=yref, mode='lines', name='Référence', trajectoire=True))
     # Ajout du tracé de la nav calculée
-    fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='INS'))
+    fig.add_trace(trace_serie(budget=budget, x=x, y=y, mode='lines', name='INS', trajectoire=True))
     # Configuration des axes de la figure pour correspondre à ceux de l'image
-    fig.update_xaxes(range=[0.317211, 2.310508603555556])
-    fig.update_yaxes(range=[48.967847, 49.787612490196075])
+    fig.update_xaxes(range=[carte.lon_min_deg, carte.lon_max_deg])
+    fig.update_yaxes(range=[carte.lat_min_deg, carte.lat_max_deg])
 
     # Mise à jour de la disposition pour inclure la légende
     fig.update_layout(
@@ -204,10 +267,13 @@ def trace_figure_nav_fecamp(x,y,x_ref,y_ref):
         showlegend=True,
     )
 
-    # Enregistrement de la figure en HTML
-    fig.write_html("Trace_nav_2D_fecamp.html")
-    # Ouvrir la figure dans le navigateur
-    webbrowser.open("Trace_nav_2D_fecamp.html")
+    if afficher:
+        # Enregistrement de la figure en HTML
+        chemin_html = Path(rep_sortie) / "Trace_nav_2D_fecamp.html"
+        fig.write_html(chemin_html)
+        # Ouvrir la figure dans le navigateur
+        webbrowser.open(chemin_html.resolve().as_uri())
+    return fig
 
 
 def calcul_erreurs_position(ref_x, ref_y, ref_z, cal_x, cal_y, cal_z):
@@ -240,18 +306,18 @@ def calcul_erreurs_position(ref_x, ref_y, ref_z, cal_x, cal_y, cal_z):
 
     """
 
-    #Constante rayon terrestre
-    Rt = 6378000.0
+    #Écarts nord / est de la nav calculée à la référence (plan local à la latitude de référence)
+    nord, est = ecarts_plan_local(cal_y*DEG2RAD, cal_x*DEG2RAD, ref_y*DEG2RAD, ref_x*DEG2RAD)
     #Calcul de l'erreur de position en longitude
-    err_x = (ref_x - cal_x)*(np.pi/180)*Rt*np.cos(np.radians(ref_y))
+    err_x = -est
     #Calcul de l'erreur de position en latitude
-    err_y = (ref_y - cal_y)*(np.pi/180)*Rt
+    err_y = -nord
     #Calcul de l'erreur de position en altitude
     err_z = ref_z - cal_z
     #Renvoie des 3 erreurs calculées
     return err_x, err_y, err_z
 
-def trace_erreurs_position(t, err_x, err_y, err_z):
+def trace_erreurs_position(t, err_x, err_y, err_z, budget=None):
     r"""Ce script trace les erreurs de position sur chaque axe de la navigation avec Plotly.
 
     Parameters
@@ -264,7 +330,9 @@ def trace_erreurs_position(t, err_x, err_y, err_z):
         vecteur de l'erreur de position selon l'axe y [m] (dim (1,N))
     err_z : np.ndarray
         vecteur de l'erreur de position selon l'axe z [m] (dim (1,N))
-        
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
+
     Returns
     -------
     Erreurs de position : figure 
@@ -277,17 +345,17 @@ def trace_erreurs_position(t, err_x, err_y, err_z):
                                        "Ect Err Position Z [m]"))
 
     # Ajout de la première courbe (Erreur position X)
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_x[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_x[0, :],
                             mode='lines', name='Ect Err Position X [m]',
                             line=dict(color='black')), row=1, col=1)
 
     # Ajout de la deuxième courbe (Erreur position Y)
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_y[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_y[0, :],
                             mode='lines', name='Ect Err Position Y [m]',
                             line=dict(color='blue')), row=2, col=1)
 
     # Ajout de la troisième courbe (Erreur position Z)
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_z[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_z[0, :],
                             mode='lines', name='Ect Err Position Z [m]',
                             line=dict(color='red')), row=3, col=1)
 
@@ -304,7 +372,7 @@ def trace_erreurs_position(t, err_x, err_y, err_z):
     return fig
     
 #%% VITESSES
-def trace_figure_vitesses(t, vn, vw, vz):
+def trace_figure_vitesses(t, vn, vw, vz, budget=None):
     r"""Ce script trace les vitesses géographiques nord, ouest et z de la navigation calculée avec Plotly.
 
     Parameters
@@ -317,7 +385,9 @@ def trace_figure_vitesses(t, vn, vw, vz):
         vecteur de la vitesse géographique ouest [m/s] (dim (1,N))
     vz : np.ndarray
         vecteur de la vitesse géographique z [m/s] (dim (1,N))
-        
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
+
     Returns
     -------
     Vitesses Géographiques : figure 
@@ -331,17 +401,17 @@ def trace_figure_vitesses(t, vn, vw, vz):
                                         "Vit Z Up [m/s]"))
 
     # Ajout de la courbe de la vitesse nord
-    fig.add_trace(go.Scatter(x=t[0, :], y=vn[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vn[0, :],
                              mode='lines', name='Vit Nord [m/s]',
                              line=dict(color='blue')), row=1, col=1)
 
     # Ajout de la courbe de la vitesse ouest
-    fig.add_trace(go.Scatter(x=t[0, :], y=vw[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vw[0, :],
                              mode='lines', name='Vit Ouest [m/s]',
                              line=dict(color='green')), row=2, col=1)
 
     # Ajout de la courbe de la vitesse z
-    fig.add_trace(go.Scatter(x=t[0, :], y=vz[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vz[0, :],
                              mode='lines', name='Vit Z Up [m/s]',
                              line=dict(color='red')), row=3, col=1)
 
@@ -397,7 +467,7 @@ def calcul_erreurs_vitesse(ref_x, ref_y, ref_z, cal_x, cal_y, cal_z):
     return err_x, err_y, err_z
 
 
-def trace_erreurs_vitesse(t, err_x, err_y, err_z):
+def trace_erreurs_vitesse(t, err_x, err_y, err_z, budget=None):
     r"""Ce script trace les erreurs de vitesse sur chaque axe de la navigation avec Plotly.
 
     Parameters
@@ -410,7 +480,9 @@ def trace_erreurs_vitesse(t, err_x, err_y, err_z):
         vecteur de l'erreur de vitesse selon l'axe y [m/s] (dim (1,N))
     err_z : np.ndarray
         vecteur de l'erreur de vitesse selon l'axe z [m/s] (dim (1,N))
-        
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
+
     Returns
     -------
     Erreurs de vitesse : figure 
@@ -424,17 +496,17 @@ def trace_erreurs_vitesse(t, err_x, err_y, err_z):
                                         "Ect Err Vitesse Z [m/s]"))
 
     # Ajout de la courbe d'erreur selon l'axe x
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_x[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_x[0, :],
                              mode='lines', name='Ect Err Vitesse X [m/s]',
                              line=dict(color='black')), row=1, col=1)
 
     # Ajout de la courbe d'erreur selon l'axe y
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_y[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_y[0, :],
                              mode='lines', name='Ect Err Vitesse Y [m/s]',
                              line=dict(color='blue')), row=2, col=1)
 
     # Ajout de la courbe d'erreur selon l'axe z
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_z[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_z[0, :],
                              mode='lines', name='Ect Err Vitesse Z [m/s]',
                              line=dict(color='red')), row=3, col=1)
 
@@ -451,7 +523,7 @@ def trace_erreurs_vitesse(t, err_x, err_y, err_z):
 
 #%% ATTITUDES
 
-def trace_figure_attitudes(t, cap, rou, tan):
+def trace_figure_attitudes(t, cap, rou, tan, budget=None):
     r"""Ce script trace les attitudes et le cap du porteur de la navigation calculée avec Plotly.
 
     Parameters
@@ -464,7 +536,9 @@ def trace_figure_attitudes(t, cap, rou, tan):
         vecteur du roulis [rad] (dim (1,N))
     tan : np.ndarray
         vecteur du tangage [rad] (dim (1,N))
-        
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
+
     Returns
     -------
     Attitudes du Porteur : figure 
@@ -472,9 +546,9 @@ def trace_figure_attitudes(t, cap, rou, tan):
     """
 
     # Conversion des angles en degrés
-    cap_deg = cap * 180 / np.pi
-    rou_deg = rou * 180 / np.pi
-    tan_deg = tan * 180 / np.pi
+    cap_deg = cap * RAD2DEG
+    rou_deg = rou * RAD2DEG
+    tan_deg = tan * RAD2DEG
 
     # Création de la figure avec sous-graphiques (3 lignes, 1 colonne)
     fig = make_subplots(rows=3, cols=1, shared_xaxes=True,
@@ -483,17 +557,17 @@ def trace_figure_attitudes(t, cap, rou, tan):
                                         "Tangage [deg]"))
 
     # Ajout de la courbe du cap en degrés
-    fig.add_trace(go.Scatter(x=t[0, :], y=cap_deg[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=cap_deg[0, :],
                              mode='lines', name='Cap [deg]',
                              line=dict(color='blue')), row=1, col=1)
 
     # Ajout de la courbe du roulis en degrés
-    fig.add_trace(go.Scatter(x=t[0, :], y=rou_deg[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=rou_deg[0, :],
                              mode='lines', name='Roulis [deg]',
                              line=dict(color='green')), row=2, col=1)
 
     # Ajout de la courbe du tangage en degrés
-    fig.add_trace(go.Scatter(x=t[0, :], y=tan_deg[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=tan_deg[0, :],
                              mode='lines', name='Tangage [deg]',
                              line=dict(color='red')), row=3, col=1)
 
@@ -542,11 +616,11 @@ def calcul_erreurs_attitude(ref_x, ref_y, ref_z, cal_x, cal_y, cal_z):
     """
 
     #Conversion du cap parfait en radians
-    ref_x = ref_x *(np.pi/180)
+    ref_x = ref_x *DEG2RAD
     #Conversion du roulis parfait en radians
-    ref_y = ref_y *(np.pi/180)
+    ref_y = ref_y *DEG2RAD
     #Conversion du tangage parfait en radians
-    ref_z = ref_z *(np.pi/180)
+    ref_z = ref_z *DEG2RAD
 
     #Calcul de l'erreur de cap en mrad
     err_x = (np.unwrap(ref_x) - cal_x)*1000
@@ -559,7 +633,7 @@ def calcul_erreurs_attitude(ref_x, ref_y, ref_z, cal_x, cal_y, cal_z):
     return err_x, err_y, err_z
 
 
-def trace_erreurs_attitude(t, err_x, err_y, err_z):
+def trace_erreurs_attitude(t, err_x, err_y, err_z, budget=None):
     r"""Ce script trace les erreurs d'attitude sur chaque axe de la navigation calculée avec Plotly.
 
     Parameters
@@ -572,7 +646,9 @@ def trace_erreurs_attitude(t, err_x, err_y, err_z):
         vecteur de l'erreur de roulis [mrad] (dim (1,N))
     err_z : np.ndarray
         vecteur de l'erreur de tangage [mrad] (dim (1,N))
-        
+    budget : int
+        nombre maximal de points par courbe (BUDGET_POINTS si None)
+
     Returns
     -------
     Erreurs d'attitudes : figure 
@@ -586,17 +662,17 @@ def trace_erreurs_attitude(t, err_x, err_y, err_z):
                                         "Erreur Tangage [mrad]"))
 
     # Ajout de la courbe d'erreur du cap en mrad
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_x[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_x[0, :],
                              mode='lines', name='Erreur Cap [mrad]',
                              line=dict(color='blue')), row=1, col=1)
 
     # Ajout de la courbe d'erreur du roulis en mrad
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_y[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_y[0, :],
                              mode='lines', name='Erreur Roulis [mrad]',
                              line=dict(color='green')), row=2, col=1)
 
     # Ajout de la courbe d'erreur du tangage en mrad
-    fig.add_trace(go.Scatter(x=t[0, :], y=err_z[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=err_z[0, :],
                              mode='lines', name='Erreur Tangage [mrad]',
                              line=dict(color='red')), row=3, col=1)
 
@@ -612,7 +688,7 @@ def trace_erreurs_attitude(t, err_x, err_y, err_z):
     return fig
 
 
-def trace_increments(t, inc_vit_x, inc_vit_y, inc_vit_z,inc_ang_x,inc_ang_y,inc_ang_z):
+def trace_increments(t, inc_vit_x, inc_vit_y, inc_vit_z,inc_ang_x,inc_ang_y,inc_ang_z, budget=None):
     fig = make_subplots(rows=3, cols=2, shared_xaxes=True,
                         subplot_titles=("Increment Vit X [m/s]", 
                                         "Increment Angle X [rad]", 
@@ -621,23 +697,23 @@ def trace_increments(t, inc_vit_x, inc_vit_y, inc_vit_z,inc_ang_x,inc_ang_y,inc_
                                         "Increment Vit Z [m/s]",
                                         "Increment Angle Z [rad]"))
 
-    fig.add_trace(go.Scatter(x=t[0, :], y=inc_vit_x[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=inc_vit_x[0, :],
                              mode='lines', name='DV X [m/s]',
                              line=dict(color='blue')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=inc_vit_y[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=inc_vit_y[0, :],
                              mode='lines', name='DV X [m/s]',
                              line=dict(color='green')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=inc_vit_z[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=inc_vit_z[0, :],
                              mode='lines', name='DV X [m/s]',
                              line=dict(color='red')), row=3, col=1)     
 
-    fig.add_trace(go.Scatter(x=t[0, :], y=inc_ang_x[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=inc_ang_x[0, :],
                              mode='lines', name='DA X [rad]',
                              line=dict(color='blue')), row=1, col=2)
-    fig.add_trace(go.Scatter(x=t[0, :], y=inc_ang_y[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=inc_ang_y[0, :],
                              mode='lines', name='DA X [rad]',
                              line=dict(color='green')), row=2, col=2)
-    fig.add_trace(go.Scatter(x=t[0, :], y=inc_ang_z[0, :],
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=inc_ang_z[0, :],
                              mode='lines', name='DA X [rad]',
                              line=dict(color='red')), row=3, col=2)     
 
@@ -659,21 +735,21 @@ def trace_increments(t, inc_vit_x, inc_vit_y, inc_vit_z,inc_ang_x,inc_ang_y,inc_
     return fig
 
 
-def trace_positions_gnss(t, Lg,Gg,Zg,Lr,Gr,Zr):
+def trace_positions_gnss(t, Lg,Gg,Zg,Lr,Gr,Zr, budget=None):
 # Création de la figure avec sous-graphiques (3 lignes, 1 colonne)
     fig = make_subplots(rows=3, cols=1, shared_xaxes=True,
                         subplot_titles=("Lat [deg]", 
                                         "lon [deg]", 
                                         "alt [m]"))
 
-    fig.add_trace(go.Scatter(x=t[0, :], y=Lg[0, :],mode='lines', name='latitude gnss [mrad]',line=dict(color='blue')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=Lr[0, :],mode='lines', name='latitude reference[mrad]',line=dict(color='green')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Lg[0, :],mode='lines', name='latitude gnss [mrad]',line=dict(color='blue')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Lr[0, :],mode='lines', name='latitude reference[mrad]',line=dict(color='green')), row=1, col=1)
 
-    fig.add_trace(go.Scatter(x=t[0, :], y=Gg[0, :],mode='lines', name='longitude gnss [mrad]',line=dict(color='blue')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=Gr[0, :],mode='lines', name='longitude reference[mrad]',line=dict(color='green')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Gg[0, :],mode='lines', name='longitude gnss [mrad]',line=dict(color='blue')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Gr[0, :],mode='lines', name='longitude reference[mrad]',line=dict(color='green')), row=2, col=1)
  
-    fig.add_trace(go.Scatter(x=t[0, :], y=Zg[0, :],mode='lines', name='altitude gnss [mrad]',line=dict(color='blue')), row=3, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=Zr[0, :],mode='lines', name='altitude reference[mrad]',line=dict(color='green')), row=3, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Zg[0, :],mode='lines', name='altitude gnss [mrad]',line=dict(color='blue')), row=3, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Zr[0, :],mode='lines', name='altitude reference[mrad]',line=dict(color='green')), row=3, col=1)
  
 
     # Mise à jour des titres des axes
@@ -685,7 +761,7 @@ def trace_positions_gnss(t, Lg,Gg,Zg,Lr,Gr,Zr):
                       title_x=0.5)
     return fig
 
-def trace_data_vordme(t,vor_bvs,dme_bvs,vor_dvl,dme_dvl,vor_pon,dme_pon,vor_rou,dme_rou):
+def trace_data_vordme(t,vor_bvs,dme_bvs,vor_dvl,dme_dvl,vor_pon,dme_pon,vor_rou,dme_rou,budget=None):
 # Création de la figure avec sous-graphiques (2 lignes, 1 colonne)
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
                         subplot_titles=("VOR [deg]", 
@@ -693,15 +769,15 @@ def trace_data_vordme(t,vor_bvs,dme_bvs,vor_dvl,dme_dvl,vor_pon,dme_pon,vor_rou,
     ilon = 0
     ilat = 1
 
-    fig.add_trace(go.Scatter(x=t[0, :], y=vor_bvs[0, :],mode='lines', name='vor bvs [deg]',line=dict(color='blue')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=vor_dvl[0, :],mode='lines', name='vor dvl [deg]',line=dict(color='red')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=vor_pon[0, :],mode='lines', name='vor pon [deg]',line=dict(color='yellow')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=vor_rou[0, :],mode='lines', name='vor rou [deg]',line=dict(color='black')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vor_bvs[0, :],mode='lines', name='vor bvs [deg]',line=dict(color='blue')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vor_dvl[0, :],mode='lines', name='vor dvl [deg]',line=dict(color='red')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vor_pon[0, :],mode='lines', name='vor pon [deg]',line=dict(color='yellow')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=vor_rou[0, :],mode='lines', name='vor rou [deg]',line=dict(color='black')), row=1, col=1)
 
-    fig.add_trace(go.Scatter(x=t[0, :], y=dme_bvs[0, :],mode='lines', name='dme bvs [m]',line=dict(color='blue')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=dme_dvl[0, :],mode='lines', name='dme dvl [m]',line=dict(color='red')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=dme_pon[0, :],mode='lines', name='dme pon [m]',line=dict(color='yellow')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=dme_rou[0, :],mode='lines', name='dme rou [m]',line=dict(color='black')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=dme_bvs[0, :],mode='lines', name='dme bvs [m]',line=dict(color='blue')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=dme_dvl[0, :],mode='lines', name='dme dvl [m]',line=dict(color='red')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=dme_pon[0, :],mode='lines', name='dme pon [m]',line=dict(color='yellow')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=dme_rou[0, :],mode='lines', name='dme rou [m]',line=dict(color='black')), row=2, col=1)
  
 
     # Mise à jour des titres des axes
@@ -714,48 +790,27 @@ def trace_data_vordme(t,vor_bvs,dme_bvs,vor_dvl,dme_dvl,vor_pon,dme_pon,vor_rou,
     return fig
 
 
-def trace_positions_vordme(t, Lr,Gr,Zr,vor_bvs,dme_bvs,vor_dvl,dme_dvl,vor_pon,dme_pon,vor_rou,dme_rou):
+def trace_positions_vordme(t, Lr,Gr,Zr,vor_bvs,dme_bvs,vor_dvl,dme_dvl,vor_pon,dme_pon,vor_rou,dme_rou, budget=None):
 # Création de la figure avec sous-graphiques (2 lignes, 1 colonne)
-# Attention, il y a plein de bugs ... les unités !!!
+# Points calculés par moindres carrés sur les quatre balises (multilateration_vordme.py)
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
-                        subplot_titles=("Lat [xx]", 
-                                        "lon [xx]"))
-    ilon = 0
-    ilat = 1
-    BVS = np.array([2.114482,49.459839])
-    DVL = np.array([0.312722,49.310750])
-    PON = np.array([2.035889,49.096083])
-    ROU = np.array([1.280639,49.465639])
+                        subplot_titles=("Lat [deg]", 
+                                        "lon [deg]"))
+    points = multilateration_vordme(
+        {'bvs': vor_bvs, 'dvl': vor_dvl, 'pon': vor_pon, 'rou': vor_rou},
+        {'bvs': dme_bvs, 'dvl': dme_dvl, 'pon': dme_pon, 'rou': dme_rou})
 
-    L_bvs = BVS[ilat] + dme_bvs*np.cos(vor_bvs*np.pi/180)
-    G_bvs = BVS[ilon] + dme_bvs*np.sin(vor_bvs*np.pi/180)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=points.Lat_deg,mode='lines', name='latitude vordme [deg]',line=dict(color='blue')), row=1, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Lr[0, :],mode='lines', name='latitude reference [deg]',line=dict(color='green')), row=1, col=1)
 
-    L_dvl = DVL[ilat] + dme_dvl*np.cos(vor_dvl*np.pi/180)
-    G_dvl = DVL[ilon] + dme_dvl*np.sin(vor_dvl*np.pi/180)
-    
-    L_pon = PON[ilat] + dme_pon*np.cos(vor_pon*np.pi/180)
-    G_pon = PON[ilon] + dme_pon*np.sin(vor_pon*np.pi/180)
-    
-    L_rou = ROU[ilat] + dme_rou*np.cos(vor_rou*np.pi/180)
-    G_rou = ROU[ilon] + dme_rou*np.sin(vor_rou*np.pi/180)
-
-    fig.add_trace(go.Scatter(x=t[0, :], y=L_bvs[0, :],mode='lines', name='latitude gnss [xx]',line=dict(color='blue')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=L_dvl[0, :],mode='lines', name='latitude gnss [xx]',line=dict(color='red')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=L_pon[0, :],mode='lines', name='latitude gnss [xx]',line=dict(color='yellow')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=L_rou[0, :],mode='lines', name='latitude gnss [xx]',line=dict(color='black')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=Lr[0, :],mode='lines', name='latitude reference[xx]',line=dict(color='green')), row=1, col=1)
-
-    fig.add_trace(go.Scatter(x=t[0, :], y=G_bvs[0, :],mode='lines', name='longitude gnss [xx]',line=dict(color='blue')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=G_dvl[0, :],mode='lines', name='longitude gnss [xx]',line=dict(color='red')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=G_pon[0, :],mode='lines', name='longitude gnss [xx]',line=dict(color='yellow')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=G_rou[0, :],mode='lines', name='longitude gnss [xx]',line=dict(color='black')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=t[0, :], y=Gr[0, :],mode='lines', name='longitude reference[xx]',line=dict(color='green')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=points.Lon_deg,mode='lines', name='longitude vordme [deg]',line=dict(color='blue')), row=2, col=1)
+    fig.add_trace(trace_serie(budget=budget, x=t[0, :], y=Gr[0, :],mode='lines', name='longitude reference [deg]',line=dict(color='green')), row=2, col=1)
  
 
     # Mise à jour des titres des axes
-    fig.update_xaxes(title_text="Temps [s]", row=3, col=1)
+    fig.update_xaxes(title_text="Temps [s]", row=2, col=1)
 
     # Mise à jour du layout général avec un titre
-    fig.update_layout(height=800, title_text="positions",
+    fig.update_layout(height=800, title_text="positions vordme",
                       title_x=0.5)
-    return fig
\ No newline at end of file
+    return fig
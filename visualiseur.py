@@ -0,0 +1,327 @@
+"""
+Description
+-----------
+
+Visualiseur local des figures temporelles de trace_figures.py en pleine
+résolution : un petit serveur HTTP (bibliothèque standard) sert une page
+plotly qui, à chaque zoom ou déplacement, redemande au serveur la fenêtre de
+temps visible.
+
+   - les variables des fichiers .mat sont lues par projection mémoire
+     (cache_mat.charger_mat) : une fenêtre ne lit que ses propres pages ;
+   - la fenêtre est retrouvée par recherche dichotomique dans temps_s, puis
+     la figure est reconstruite par la fonction trace_* d'origine sur cette
+     seule portion (export_statique.constructeurs_essai), ses courbes étant
+     décimées min / max (decimation.py) à deux points par pixel de largeur ;
+   - seules les courbes (quelques milliers de points) repartent vers le
+     navigateur, les axes et titres restent ceux de la figure affichée.
+
+Un échantillon isolé (ex: une mesure VOR aberrante) reste donc visible à tous
+les niveaux de zoom, et apparaît seul une fois la fenêtre assez étroite.
+
+Classes Disponibles :
+
+   - class FenetreContenu
+   - class Visualiseur
+
+Fonctions Disponibles :
+
+   - servir : lancement du visualiseur d'un essai
+
+Utilisation :
+
+    python visualiseur.py --traj boucle
+    python visualiseur.py --traj aller --suffixe _gps_{traj} --port 8051
+
+--------------------------------
+"""
+
+import argparse
+import html
+import json
+import warnings
+import webbrowser
+from collections.abc import Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import plotly.io as pio
+import plotly.offline
+
+from export_statique import constructeurs_essai
+
+# Port d'écoute par défaut du serveur (adresse locale 127.0.0.1)
+PORT = 8050
+# Points par pixel de largeur de figure (un minimum et un maximum par colonne)
+POINTS_PAR_PIXEL = 2
+# Bornes du nombre de points par courbe renvoyés au navigateur
+BUDGET_MIN, BUDGET_MAX = 200, 4000
+
+_PAGE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>{titre}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0 2em; }}
+nav a {{ margin-right: 1em; }}
+</style>
+<script type="text/javascript" src="/plotly.js"></script>
+</head>
+<body>
+<h1>{titre}</h1>
+<nav>{liens}</nav>
+<div id="figure"></div>
+<script type="text/javascript">
+(function () {{
+  const div = document.getElementById("figure");
+  let nom = null;
+  let requete = 0;
+  function largeur() {{ return Math.max(div.clientWidth, 300); }}
+  async function recharger(t0, t1) {{
+    const numero = ++requete;
+    const params = new URLSearchParams({{nom: nom, px: largeur()}});
+    if (t0 !== undefined) {{ params.set("t0", t0); params.set("t1", t1); }}
+    const reponse = await fetch("/fenetre?" + params);
+    const donnees = await reponse.json();
+    // Réponse périmée : un zoom plus récent est déjà demandé
+    if (numero !== requete) return;
+    Plotly.restyle(div, {{x: donnees.x, y: donnees.y}});
+  }}
+  function surZoom(evenement) {{
+    for (const cle in evenement) {{
+      const plage = /^xaxis\\d*\\.range\\[0\\]$/.test(cle)
+        ? [evenement[cle], evenement[cle.replace("[0]", "[1]")]]
+        : (/^xaxis\\d*\\.range$/.test(cle) ? evenement[cle] : null);
+      if (plage) {{ recharger(plage[0], plage[1]); return; }}
+      if (/^xaxis\\d*\\.autorange$/.test(cle)) {{ recharger(); return; }}
+    }}
+  }}
+  async function ouvrir(choix) {{
+    nom = choix;
+    const reponse = await fetch("/figure?" + new URLSearchParams({{nom: nom, px: largeur()}}));
+    const fig = await reponse.json();
+    Plotly.purge(div);
+    await Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true}});
+    div.on("plotly_relayout", surZoom);
+  }}
+  document.querySelectorAll("nav a").forEach(function (lien) {{
+    lien.addEventListener("click", function (e) {{ e.preventDefault(); ouvrir(lien.dataset.nom); }});
+  }});
+  ouvrir({premier});
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+class FenetreContenu(Mapping):
+    r"""Vue d'un contenu de fichier .mat restreinte à une plage d'échantillons
+
+    Chaque variable est aplatie puis découpée à la demande (une vue sur la
+    projection mémoire : seules les pages de la fenêtre sont lues).
+
+    Parameters
+    ----------
+    contenu : Mapping
+        contenu complet (ex: ContenuMat renvoyé par charger_mat)
+    fenetre : slice
+        plage d'échantillons gardée
+
+    """
+
+    def __init__(self, contenu: Mapping, fenetre: slice):
+        self.contenu = contenu
+        self.fenetre = fenetre
+
+    def __getitem__(self, nom):
+        return np.ravel(self.contenu[nom])[self.fenetre]
+
+    def __iter__(self):
+        return iter(self.contenu)
+
+    def __len__(self):
+        return len(self.contenu)
+
+
+def _liste_json(valeurs):
+    """Liste JSON d'un tableau, valeurs non finies remplacées par null (trous de la courbe)"""
+    valeurs = np.asarray(valeurs, dtype=float)
+    liste = valeurs.astype(object)
+    liste[~np.isfinite(valeurs)] = None
+    return liste.tolist()
+
+
+class Visualiseur:
+    r"""Figures temporelles d'un essai, reconstruites par fenêtre de temps
+
+    Parameters
+    ----------
+    calcule : Mapping
+        contenu de la navigation calculée (de préférence lu par charger_mat)
+    reference : Mapping
+        contenu de la navigation de référence
+    titre : str
+        titre de la page
+
+    """
+
+    def __init__(self, calcule: Mapping, reference: Mapping, titre: str = "Navigation calculée"):
+        self.calcule = calcule
+        self.reference = reference
+        self.titre = titre
+        self.temps_s = np.ravel(calcule["temps_s"])
+        # Figures temporelles uniquement (la trajectoire 2D n'est pas fenêtrée en temps)
+        self.noms = list(constructeurs_essai(calcule, reference))
+        # Figures sur toute la durée, par (nom, budget) : vue initiale et retour au zoom complet
+        self._completes = {}
+
+    def fenetre(self, t0: float = None, t1: float = None):
+        """Plage d'échantillons couvrant [t0, t1], un échantillon de part et d'autre"""
+        n = len(self.temps_s)
+        if t0 is None or t1 is None:
+            return slice(0, n)
+        i0 = max(int(np.searchsorted(self.temps_s, t0, side="right")) - 1, 0)
+        i1 = min(int(np.searchsorted(self.temps_s, t1, side="left")) + 1, n)
+        return slice(i0, max(i1, i0 + 1))
+
+    def figure(self, nom: str, px: int, t0: float = None, t1: float = None):
+        r"""Figure trace_* construite sur la fenêtre [t0, t1]
+
+        Parameters
+        ----------
+        nom : str
+            nom de la figure (voir self.noms)
+        px : int
+            largeur d'affichage de la figure [pixels]
+        t0, t1 : float
+            bornes de la fenêtre [s], toute la durée si None
+
+        Returns
+        -------
+        fig : go.Figure
+            figure dont chaque courbe compte au plus POINTS_PAR_PIXEL * px points
+
+        """
+        if nom not in self.noms:
+            raise KeyError(nom)
+        fenetre = self.fenetre(t0, t1)
+        budget = int(np.clip(POINTS_PAR_PIXEL * px, BUDGET_MIN, BUDGET_MAX))
+        complete = fenetre == slice(0, len(self.temps_s))
+        if complete and (nom, budget) in self._completes:
+            return self._completes[nom, budget]
+        constructeurs = constructeurs_essai(
+            FenetreContenu(self.calcule, fenetre), FenetreContenu(self.reference, fenetre), budget=budget
+        )
+        fig = constructeurs[nom]()
+        if complete:
+            self._completes[nom, budget] = fig
+        return fig
+
+    def courbes(self, nom: str, px: int, t0: float = None, t1: float = None):
+        """Abscisses et ordonnées décimées des courbes de la figure sur la fenêtre"""
+        fig = self.figure(nom, px, t0, t1)
+        return {
+            "x": [_liste_json(trace.x) for trace in fig.data],
+            "y": [_liste_json(trace.y) for trace in fig.data],
+        }
+
+    def page(self):
+        """Page html du visualiseur"""
+        liens = " ".join(
+            f'<a href="#" data-nom="{html.escape(nom)}">{html.escape(nom)}</a>' for nom in self.noms
+        )
+        return _PAGE.format(titre=html.escape(self.titre), liens=liens, premier=json.dumps(self.noms[0]))
+
+
+def _gestionnaire(visualiseur: Visualiseur):
+    """Classe de traitement des requêtes HTTP servant le visualiseur"""
+
+    class Gestionnaire(BaseHTTPRequestHandler):
+        def _repondre(self, contenu: bytes, type_mime: str, code: int = 200):
+            self.send_response(code)
+            self.send_header("Content-Type", type_mime)
+            self.send_header("Content-Length", str(len(contenu)))
+            self.end_headers()
+            self.wfile.write(contenu)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {cle: valeurs[0] for cle, valeurs in parse_qs(url.query).items()}
+            try:
+                if url.path == "/":
+                    self._repondre(visualiseur.page().encode(), "text/html; charset=utf-8")
+                elif url.path == "/plotly.js":
+                    self._repondre(plotly.offline.get_plotlyjs().encode(), "text/javascript")
+                elif url.path in ("/figure", "/fenetre"):
+                    px = int(params.get("px", 1000))
+                    t0 = float(params["t0"]) if "t0" in params else None
+                    t1 = float(params["t1"]) if "t1" in params else None
+                    if url.path == "/figure":
+                        contenu = pio.to_json(visualiseur.figure(params["nom"], px, t0, t1))
+                    else:
+                        contenu = json.dumps(visualiseur.courbes(params["nom"], px, t0, t1))
+                    self._repondre(contenu.encode(), "application/json")
+                else:
+                    self._repondre(b"introuvable", "text/plain", 404)
+            except (KeyError, ValueError) as erreur:
+                self._repondre(f"requête invalide : {erreur}".encode(), "text/plain; charset=utf-8", 400)
+
+        def log_message(self, format, *args):
+            # Pas de journal par requête : une requête par zoom
+            pass
+
+    return Gestionnaire
+
+
+def servir(calcule: Mapping, reference: Mapping, titre: str = "Navigation calculée",
+           port: int = PORT, ouvrir: bool = True):
+    r"""Lance le visualiseur d'un essai sur http://127.0.0.1:<port>/ (Ctrl+C pour l'arrêter)
+
+    Parameters
+    ----------
+    calcule : Mapping
+        contenu de la navigation calculée (de préférence lu par charger_mat)
+    reference : Mapping
+        contenu de la navigation de référence
+    titre : str
+        titre de la page
+    port : int
+        port d'écoute
+    ouvrir : bool
+        ouverture de la page dans le navigateur
+
+    """
+    # Moyennes sur fenêtre vide des titres d'axes de trace_increments, filtre
+    # posé une fois pour tout le processus (catch_warnings n'est pas sûr entre threads)
+    warnings.simplefilter("ignore", RuntimeWarning)
+    serveur = ThreadingHTTPServer(("127.0.0.1", port), _gestionnaire(Visualiseur(calcule, reference, titre)))
+    adresse = f"http://127.0.0.1:{serveur.server_address[1]}/"
+    print(f"Visualiseur sur {adresse} (Ctrl+C pour arrêter)")
+    if ouvrir:
+        webbrowser.open(adresse)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+
+
+if __name__ == "__main__":
+    from cache_mat import charger_mat
+    from export_statique import fichiers_essai
+    from Lecture_donnees import corres_traj_chemin
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--traj", default="boucle", choices=list(corres_traj_chemin))
+    parser.add_argument("--entree", default=".", help="dossier des navigations calculées")
+    parser.add_argument("--suffixe", default="", help="suffixe des fichiers calculés, ex: '_gps_{traj}'")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    chemin_calcule, chemin_reference, _ = fichiers_essai(args.traj, args.entree, args.suffixe)
+    servir(charger_mat(chemin_calcule), charger_mat(chemin_reference), f"Navigation calculée - essai {args.traj}",
+           args.port)